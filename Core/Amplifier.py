@@ -1,7 +1,7 @@
 # Author: Colin Pollard
 # Date: 6/24/2020
 # This class represents an amplifier, designed to handle hall effect sensor inputs.
-import math
+from Core import Backends
 
 
 class Amplifier:
@@ -15,6 +15,8 @@ class Amplifier:
         :param preset: name of preset
         :type preset: string
         """
+        # Incremented by every setter
+        self.__revision = 0
         # Type of amplifier (non-inverting, differential)
         self.__type = None
         self.__gain = None
@@ -22,6 +24,8 @@ class Amplifier:
         self.__vMin = self.__vMax = None
         # Log amplifier parameters
         self.__vt = self.__is = self.__r = None
+        # Input referred voltage noise density in nV/sqrt(Hz)
+        self.__noiseDensity = 0.0
 
         # If no preset is selected, the parameters are kept as None
         if preset is None:
@@ -61,7 +65,6 @@ class Amplifier:
         :return: None
         :raises ValueError: If a special configuration is requested, but no required parameters are detected.
         """
-
         # Differential amplifier requires the voltage to offset by
         if type == "diff" or type == "diffLog":
             if diffVoltage is None:
@@ -78,6 +81,7 @@ class Amplifier:
                 self.__is = isat
                 self.__r = logR
 
+        self.__revision += 1
         self.__type = type
 
     def setGain(self, gain):
@@ -88,6 +92,7 @@ class Amplifier:
         :type gain: float
         :return: None
         """
+        self.__revision += 1
         self.__gain = gain
 
     def setRange(self, min, max):
@@ -100,9 +105,94 @@ class Amplifier:
         :type max: float
         :return: None
         """
+        self.__revision += 1
         self.__vMin = min
         self.__vMax = max
 
+    def setNoiseDensity(self, nVrtHz):
+        """
+        Sets the input referred voltage noise density of the amplifier, which is amplified along with the signal.
+        Multiplied by the square root of the noise bandwidth, this gives the RMS noise in nV (see NoiseAnalysis.py).
+
+        :param nVrtHz: noise density in nV/sqrt(Hz)
+        :type nVrtHz: float
+        :return: None
+        """
+        self.__revision += 1
+        self.__noiseDensity = nVrtHz
+
+    def getNoiseDensity(self):
+        """
+        Gets the input referred voltage noise density, 0 if not set.
+
+        :return: noise density in nV/sqrt(Hz)
+        :rtype: float
+        """
+        return self.__noiseDensity
+
+    def getRevision(self):
+        """
+        Gets the revision of the configuration. It increases every time a setter is called, so cached results can
+        detect changes (see Simulation.py).
+
+        :return: revision
+        :rtype: int
+        """
+        return self.__revision
+
+    def getType(self):
+        """
+        Gets the type of the amplifier.
+
+        :return: type of amplifier
+        :rtype: string
+        :raises AttributeError: If the type of amplifier is not set.
+        """
+        if self.__type is None:
+            raise AttributeError("Type of amplifier not specified. Please select a type first.")
+        return self.__type
+
+    def getGain(self):
+        """
+        Gets the gain of the amplifier.
+
+        :return: Gain in Volts/Volt, None for logarithmic amplifiers without a gain
+        :rtype: float
+        """
+        return self.__gain
+
+    def getDiffVoltage(self):
+        """
+        Gets the positive terminal voltage of differential amplifiers.
+
+        :return: diff voltage, None if not set
+        :rtype: float
+        """
+        return self.__diffVoltage
+
+    def getRange(self):
+        """
+        Gets the output voltage range.
+
+        :return: minimum output voltage, maximum output voltage
+        :rtype: tuple[float, float]
+        :raises AttributeError: If the range is not set.
+        """
+        if self.__vMin is None:
+            raise AttributeError("Voltage range not specified. Please select a voltage first.")
+        return self.__vMin, self.__vMax
+
+    def getDiodeCharacteristics(self):
+        """
+        Gets the diode characteristics of logarithmic amplifiers.
+
+        :return: thermal voltage, saturation current, input resistor. None if not set.
+        :rtype: tuple[float, float, float]
+        """
+        if self.__vt is None:
+            return None
+        return self.__vt, self.__is, self.__r
+
     def vOut(self, vIn):
         """
         Calculates a voltage output given an input voltage.
@@ -113,6 +203,52 @@ class Amplifier:
         :raises AttributeError: If the type of amplifier is not set, or if the type is set but other information such as gain is missing.
         :raises ValueError: If the set gain is unnachievable for the type of amplifier.
         """
+        self.__checkConfiguration()
+        return Backends.amplifierOut(self.__type, self.__gain, self.__diffVoltage, self.getDiodeCharacteristics(), self.__vMin, self.__vMax, vIn)
+
+    def vOutArray(self, vIns, backend=None, precision=None):
+        """
+        Calculates the voltage output for a sequence of input voltages, using the selected compute backend.
+        Results and errors are identical to vOut().
+
+        :param vIns: Input voltages
+        :type vIns: array_like
+        :param backend: Backend to use instead of the selected backend.
+        :type backend: Backends.Backend
+        :param precision: "float64" or "float32", defaults to Backends.getPrecision()
+        :type precision: string
+        :return: Output voltages
+        :rtype: numpy.ndarray, or list with the python backend
+        """
+        self.__checkConfiguration()
+        if backend is None:
+            backend = Backends.getBackend()
+        return backend.amplifierOut(self.__type, self.__gain, self.__diffVoltage, self.getDiodeCharacteristics(), self.__vMin, self.__vMax, vIns, precision)
+
+    def gainArray(self, vIns):
+        """
+        Calculates the small signal gain (dVout/dVin) at each input voltage. Clipped outputs have a gain of 0.
+        Always evaluated in float64, a float32 output rounded onto a rail would not compare equal to the rail.
+        Requires numpy.
+
+        :param vIns: Input voltages
+        :type vIns: array_like
+        :return: Gain in Volts/Volt
+        :rtype: numpy.ndarray
+        :raises ValueError: If a log amplifier input is outside of the log domain.
+        """
+        import numpy as np
+
+        vIn = np.asarray(vIns, dtype=float)
+        vOut = np.asarray(self.vOutArray(vIn.ravel(), precision="float64"), dtype=float).reshape(vIn.shape)
+        if self.__type == "diffLog" or self.__type == "log":
+            vLog = vIn - self.__diffVoltage if self.__type == "diffLog" else vIn
+            gain = -self.__vt / vLog
+        else:
+            gain = np.full(vIn.shape, float(self.__gain))
+        return np.where((vOut > self.__vMin) & (vOut < self.__vMax), gain, 0.0)
+
+    def __checkConfiguration(self):
         # Error check type, gain, voltage
         if self.__type is None:
             raise AttributeError("Type of amplifier not specified. Please select a type first.")
@@ -123,46 +259,21 @@ class Amplifier:
         elif self.__vMin is None:
             raise AttributeError("Voltage range not specified. Please select a voltage first.")
 
-        # Calculate theoretical voltage without clipping
-        if self.__type == "diff":
-            vOut = (vIn - self.__diffVoltage) * self.__gain
-
-        # Logarithmic amplifier with differential input
-        elif self.__type == "diffLog":
-            if self.__vt is None:
-                raise ValueError("To use a logarithmic amplifier, please enter the diode characteristics first.")
-            else:
-                vOut = -self.__vt * math.log((vIn - self.__diffVoltage) / (self.__is * self.__r))
-
-        # Log amplifier
-        elif self.__type == "log":
+        # Logarithmic amplifiers need the diode characteristics
+        if self.__type == "diffLog" or self.__type == "log":
             if self.__vt is None:
                 raise ValueError("To use a logarithmic amplifier, please enter the diode characteristics first.")
-            else:
-                vOut = -self.__vt * math.log((vIn) / (self.__is * self.__r))
 
         # Non inverting gain can never be below unity
         elif self.__type == "noninv":
             if self.__gain < 1:
                 raise ValueError("Invalid gain setting for non inverting op amp")
-            else:
-                vOut = vIn * self.__gain
 
         # Inverting must always be negative, but can be a fraction
         elif self.__type == "inv":
             if self.__gain >= 0:
                 raise ValueError("Invalid gain setting for inverting op amp")
-            else:
-                vOut = vIn * self.__gain
 
         # Unrecognized type
-        else:
+        elif not self.__type == "diff":
             raise AttributeError("Invalid amplifier type selected.")
-
-        # Check for clipping
-        if vOut > self.__vMax:
-            vOut = self.__vMax
-        if vOut < self.__vMin:
-            vOut = self.__vMin
-
-        return vOut
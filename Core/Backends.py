@@ -0,0 +1,695 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Compute backends for the field, sensor and amplifier math.
+#
+# The scalar functions (calculate1DField, HallSensor.voltage, Amplifier.vOut) always use the pure python
+# reference math in this file. Array functions (calculate1DFieldArray, HallSensor.voltageArray, Amplifier.vOutArray)
+# use the selected backend:
+#   python - pure python, no dependencies, returns lists
+#   numpy  - vectorized numpy, returns numpy arrays
+#   numba  - numpy arrays with JIT compiled loops, used by default when numba is installed
+# The backend can be selected with setBackend() or the MTX_BACKEND environment variable.
+#
+# Array results are float64 by default. setPrecision("float32") (or MTX_PRECISION=float32) halves their memory and
+# bandwidth for Monte Carlo and field map work:
+#   numpy - computes in float32. The reference cylinder, ring and cubic formulas subtract two nearly equal terms far
+#           from the magnet, which float32 can not afford (the cylinder formula is off by 4400x at 2000 mm from a
+#           6 mm magnet), so float32 uses algebraically identical forms without the subtraction.
+#   numba - computes in float64 and rounds the results to float32.
+#   python - always float64.
+# Every array method also takes precision= to override the selected precision. Solvers (Calibration, the SensorArray
+# estimator, NoiseAnalysis, LookupTable, Amplifier.gainArray) pass "float64".
+# Largest float32 field errors, with eps = 2 ** -23 (1.2e-7), including the rounding of the distances:
+#   cylinder, cubic, sphere - 8 eps relative to the field, at every distance
+#   ring - 8 eps relative to the sum of the outer and inner cylinder fields. The ring field is the difference of
+#          the two, so the error relative to the ring field grows where they cancel: for thin walled rings, and close
+#          to the distance where the on-axis field of the ring changes sign.
+# Field slopes of cylinders and rings have the same bounds. The cubic slope subtracts two terms, so its error is
+# 8 eps relative to the larger term. Sensor and amplifier outputs are within a few eps of their inputs, except that
+# values within eps of a clipping limit may clip differently.
+# tests/test_precision.py measures these errors against the float64 reference.
+# In float64 every backend matches the reference functions, including their cancellation: far from a cylinder the
+# relative error is about 1e-16 * (distance / radius) ** 2 * distance / thickness.
+import math
+import os
+
+# Shape and amplifier type codes used by the compiled kernels
+_SHAPES = {"cylinder": 0, "cubic": 1, "ring": 2, "sphere": 3}
+_AMPLIFIERS = {"diff": 0, "diffLog": 1, "log": 2, "noninv": 3, "inv": 4}
+
+_LOG_DOMAIN_ERROR = "Logarithmic amplifier input must be above the diff voltage (or above zero for log amplifiers)."
+
+# Precisions of array results
+PRECISIONS = ("float64", "float32")
+
+
+def _checkShape(shape):
+    if shape not in _SHAPES:
+        raise NotImplementedError("Type of magnet not recognized for this field calculation. Double check the type of magnet is set.")
+
+
+def _checkAmplifier(ampType):
+    if ampType not in _AMPLIFIERS:
+        raise AttributeError("Invalid amplifier type selected.")
+
+
+def field1D(shape, dimensions, strength, distance):
+    """
+    Reference calculation of the on-axis field strength of a magnet.
+    The equations used to calculate the field can be found at: https://www.supermagnete.de/eng/faq/How-do-you-calculate-the-magnetic-flux-density
+
+    :param shape: Shape of the magnet
+    :type shape: string
+    :param dimensions: Size of the magnet, as returned by the matching Magnet.get...Size method
+    :type dimensions: tuple[float]
+    :param strength: Remanence of the magnet, as returned by Magnet.getStrengthMT
+    :type strength: float
+    :param distance: Distance between magnet and point.
+    :type distance: float
+    :return: Field density
+    :rtype: float
+    """
+    if shape == "cylinder":
+        diameter, thickness = dimensions
+        radius = diameter / 2
+        B = (strength / 2) * (((thickness + distance) / math.sqrt(radius ** 2 + (thickness + distance) ** 2)) - (distance / math.sqrt(radius ** 2 + distance ** 2)))
+
+    elif shape == "cubic":
+        length, width, thickness = dimensions
+        B = (strength / math.pi) * \
+            (math.atan((length * width) / (2 * distance * math.sqrt(4 * distance ** 2 + length ** 2 + width ** 2)))
+             - math.atan((length * width) / (2 * (thickness + distance) * math.sqrt(4 * (thickness + distance) ** 2 + length ** 2 + width ** 2))))
+
+    elif shape == "ring":
+        diameter, iDiameter, thickness = dimensions
+        outerRadius = diameter / 2
+        innerRadius = iDiameter / 2
+        B = (strength / 2) * (((thickness + distance)/(math.sqrt(outerRadius ** 2 + (thickness + distance) ** 2))) -
+                              (distance / (math.sqrt(outerRadius ** 2 + distance ** 2))) -
+                              (((thickness + distance) / (math.sqrt(innerRadius ** 2 + (thickness + distance) ** 2))) -
+                               (distance / (math.sqrt(innerRadius ** 2 + distance ** 2)))))
+    elif shape == "sphere":
+        diameter, = dimensions
+        radius = diameter / 2
+        B = strength * (2 / 3) * ((radius ** 3) / ((radius + distance) ** 3))
+
+    else:
+        _checkShape(shape)
+    return B
+
+
+def field1DSlope(shape, dimensions, strength, distance):
+    """
+    Reference calculation of the derivative of field1D with respect to distance.
+
+    :param shape: Shape of the magnet
+    :type shape: string
+    :param dimensions: Size of the magnet, as returned by the matching Magnet.get...Size method
+    :type dimensions: tuple[float]
+    :param strength: Remanence of the magnet, as returned by Magnet.getStrengthMT
+    :type strength: float
+    :param distance: Distance between magnet and point.
+    :type distance: float
+    :return: Field slope per unit distance
+    :rtype: float
+    """
+    if shape == "cylinder":
+        diameter, thickness = dimensions
+        radius = diameter / 2
+        # d/dz of z / sqrt(r^2 + z^2) is r^2 / (r^2 + z^2)^(3/2)
+        dB = (strength / 2) * ((radius ** 2 / (radius ** 2 + (thickness + distance) ** 2) ** 1.5) - (radius ** 2 / (radius ** 2 + distance ** 2) ** 1.5))
+
+    elif shape == "cubic":
+        length, width, thickness = dimensions
+        dB = (strength / math.pi) * (_atanSlope(length, width, distance) - _atanSlope(length, width, thickness + distance))
+
+    elif shape == "ring":
+        diameter, iDiameter, thickness = dimensions
+        outerRadius = diameter / 2
+        innerRadius = iDiameter / 2
+        dB = (strength / 2) * ((outerRadius ** 2 / (outerRadius ** 2 + (thickness + distance) ** 2) ** 1.5) -
+                               (outerRadius ** 2 / (outerRadius ** 2 + distance ** 2) ** 1.5) -
+                               ((innerRadius ** 2 / (innerRadius ** 2 + (thickness + distance) ** 2) ** 1.5) -
+                                (innerRadius ** 2 / (innerRadius ** 2 + distance ** 2) ** 1.5)))
+    elif shape == "sphere":
+        diameter, = dimensions
+        radius = diameter / 2
+        dB = -3 * strength * (2 / 3) * ((radius ** 3) / ((radius + distance) ** 4))
+
+    else:
+        _checkShape(shape)
+    return dB
+
+
+def _atanSlope(length, width, z):
+    # Derivative of atan(lw / (2z * sqrt(4z^2 + l^2 + w^2))) with respect to z
+    sides = length ** 2 + width ** 2
+    root = math.sqrt(4 * z ** 2 + sides)
+    u = (length * width) / (2 * z * root)
+    return -(length * width / 2) * (8 * z ** 2 + sides) / ((1 + u ** 2) * z ** 2 * root ** 3)
+
+
+def sensorVoltage(limits, sensitivity, minRange, maxRange, field):
+    """
+    Reference calculation of a linear hall effect sensor output, including clipping.
+
+    :param limits: Quiescent voltage, minimum and maximum output voltage
+    :type limits: tuple[float, float, float]
+    :param sensitivity: Sensitivity in V/mT
+    :type sensitivity: float
+    :param minRange: Minimum sensible field in mT
+    :type minRange: float
+    :param maxRange: Maximum sensible field in mT
+    :type maxRange: float
+    :param field: Field strength in mT
+    :type field: float
+    :return: voltage
+    :rtype: float
+    """
+    vQ, vMin, vMax = limits
+    vOut = vQ + field * sensitivity
+
+    # Check for clipping based on both the voltage and field range, may create strange behavior at limits.
+    if vOut > vMax or field > maxRange:
+        vOut = vMax
+    elif vOut < vMin or field < minRange:
+        vOut = vMin
+    return vOut
+
+
+def amplifierOut(ampType, gain, diffVoltage, diode, vMin, vMax, vIn):
+    """
+    Reference calculation of an amplifier output, including clipping.
+    Configuration is checked by Amplifier.vOut before it is passed here.
+
+    :param ampType: Type of amplifier
+    :type ampType: string
+    :param gain: Gain in Volts/Volt (unused for log amplifiers)
+    :type gain: float
+    :param diffVoltage: Positive terminal voltage of differential amplifiers
+    :type diffVoltage: float
+    :param diode: Thermal voltage, saturation current and input resistor of log amplifiers
+    :type diode: tuple[float, float, float]
+    :param vMin: Minimum output voltage
+    :type vMin: float
+    :param vMax: Maximum output voltage
+    :type vMax: float
+    :param vIn: Input voltage
+    :type vIn: float
+    :return: Output voltage
+    :rtype: float
+    :raises ValueError: If a log amplifier input is outside of the log domain.
+    """
+    if ampType == "diff":
+        vOut = (vIn - diffVoltage) * gain
+    elif ampType == "diffLog" or ampType == "log":
+        vt, isat, r = diode
+        vLog = vIn - diffVoltage if ampType == "diffLog" else vIn
+        if not vLog > 0:
+            raise ValueError(_LOG_DOMAIN_ERROR)
+        vOut = -vt * math.log(vLog / (isat * r))
+    elif ampType == "noninv" or ampType == "inv":
+        vOut = vIn * gain
+    else:
+        _checkAmplifier(ampType)
+
+    # Check for clipping
+    if vOut > vMax:
+        vOut = vMax
+    if vOut < vMin:
+        vOut = vMin
+    return vOut
+
+
+class Backend:
+    """
+    Compute backend interface. Every method takes the configuration of one component and a 1D sequence of inputs,
+    and returns a sequence of outputs of the same length. Results must match the reference functions in this module.
+    precision selects the precision of the results, defaulting to getPrecision(). Solvers pass "float64".
+    """
+    name = None
+
+    def field1D(self, shape, dimensions, strength, distances, precision=None):
+        """
+        Vectorized field1D.
+
+        :return: Field density for each distance
+        """
+        raise NotImplementedError()
+
+    def field1DSlope(self, shape, dimensions, strength, distances, precision=None):
+        """
+        Vectorized field1DSlope.
+
+        :return: Field slope for each distance
+        """
+        raise NotImplementedError()
+
+    def sensorVoltage(self, limits, sensitivity, minRange, maxRange, fields, precision=None):
+        """
+        Vectorized sensorVoltage.
+
+        :return: Voltage for each field strength
+        """
+        raise NotImplementedError()
+
+    def amplifierOut(self, ampType, gain, diffVoltage, diode, vMin, vMax, vIns, precision=None):
+        """
+        Vectorized amplifierOut.
+
+        :return: Output voltage for each input voltage
+        """
+        raise NotImplementedError()
+
+
+class PythonBackend(Backend):
+    """
+    Pure python backend. Applies the reference functions to every element, returns lists.
+    """
+    name = "python"
+
+    def field1D(self, shape, dimensions, strength, distances, precision=None):
+        _checkShape(shape)
+        return [field1D(shape, dimensions, strength, float(distance)) for distance in distances]
+
+    def field1DSlope(self, shape, dimensions, strength, distances, precision=None):
+        _checkShape(shape)
+        return [field1DSlope(shape, dimensions, strength, float(distance)) for distance in distances]
+
+    def sensorVoltage(self, limits, sensitivity, minRange, maxRange, fields, precision=None):
+        return [sensorVoltage(limits, sensitivity, minRange, maxRange, float(field)) for field in fields]
+
+    def amplifierOut(self, ampType, gain, diffVoltage, diode, vMin, vMax, vIns, precision=None):
+        _checkAmplifier(ampType)
+        return [amplifierOut(ampType, gain, diffVoltage, diode, vMin, vMax, float(vIn)) for vIn in vIns]
+
+
+class NumpyBackend(Backend):
+    """
+    Vectorized numpy backend, returns numpy arrays.
+    """
+    name = "numpy"
+
+    def __init__(self):
+        import numpy
+        self._np = numpy
+
+    def field1D(self, shape, dimensions, strength, distances, precision=None):
+        np = self._np
+        _checkShape(shape)
+        distance = np.asarray(distances, dtype=_dtype(precision))
+        if distance.dtype == np.float32 and shape != "sphere":
+            return _stableField1D(np, shape, dimensions, strength, distance)
+
+        if shape == "cylinder":
+            diameter, thickness = dimensions
+            radius = diameter / 2
+            B = (strength / 2) * (((thickness + distance) / np.sqrt(radius ** 2 + (thickness + distance) ** 2)) - (distance / np.sqrt(radius ** 2 + distance ** 2)))
+
+        elif shape == "cubic":
+            length, width, thickness = dimensions
+            B = (strength / math.pi) * \
+                (np.arctan((length * width) / (2 * distance * np.sqrt(4 * distance ** 2 + length ** 2 + width ** 2)))
+                 - np.arctan((length * width) / (2 * (thickness + distance) * np.sqrt(4 * (thickness + distance) ** 2 + length ** 2 + width ** 2))))
+
+        elif shape == "ring":
+            diameter, iDiameter, thickness = dimensions
+            outerRadius = diameter / 2
+            innerRadius = iDiameter / 2
+            B = (strength / 2) * (((thickness + distance) / (np.sqrt(outerRadius ** 2 + (thickness + distance) ** 2))) -
+                                  (distance / (np.sqrt(outerRadius ** 2 + distance ** 2))) -
+                                  (((thickness + distance) / (np.sqrt(innerRadius ** 2 + (thickness + distance) ** 2))) -
+                                   (distance / (np.sqrt(innerRadius ** 2 + distance ** 2)))))
+        else:
+            diameter, = dimensions
+            radius = diameter / 2
+            B = strength * (2 / 3) * ((radius ** 3) / ((radius + distance) ** 3))
+        return B
+
+    def field1DSlope(self, shape, dimensions, strength, distances, precision=None):
+        np = self._np
+        _checkShape(shape)
+        distance = np.asarray(distances, dtype=_dtype(precision))
+        if distance.dtype == np.float32 and shape in ("cylinder", "ring"):
+            return _stableField1DSlope(np, shape, dimensions, strength, distance)
+
+        if shape == "cylinder":
+            diameter, thickness = dimensions
+            radius = diameter / 2
+            dB = (strength / 2) * ((radius ** 2 / (radius ** 2 + (thickness + distance) ** 2) ** 1.5) - (radius ** 2 / (radius ** 2 + distance ** 2) ** 1.5))
+
+        elif shape == "cubic":
+            length, width, thickness = dimensions
+            sides = length ** 2 + width ** 2
+
+            def atanSlope(z):
+                root = np.sqrt(4 * z ** 2 + sides)
+                u = (length * width) / (2 * z * root)
+                return -(length * width / 2) * (8 * z ** 2 + sides) / ((1 + u ** 2) * z ** 2 * root ** 3)
+
+            dB = (strength / math.pi) * (atanSlope(distance) - atanSlope(thickness + distance))
+
+        elif shape == "ring":
+            diameter, iDiameter, thickness = dimensions
+            outerRadius = diameter / 2
+            innerRadius = iDiameter / 2
+            dB = (strength / 2) * ((outerRadius ** 2 / (outerRadius ** 2 + (thickness + distance) ** 2) ** 1.5) -
+                                   (outerRadius ** 2 / (outerRadius ** 2 + distance ** 2) ** 1.5) -
+                                   ((innerRadius ** 2 / (innerRadius ** 2 + (thickness + distance) ** 2) ** 1.5) -
+                                    (innerRadius ** 2 / (innerRadius ** 2 + distance ** 2) ** 1.5)))
+        else:
+            diameter, = dimensions
+            radius = diameter / 2
+            dB = -3 * strength * (2 / 3) * ((radius ** 3) / ((radius + distance) ** 4))
+        return dB
+
+    def sensorVoltage(self, limits, sensitivity, minRange, maxRange, fields, precision=None):
+        np = self._np
+        vQ, vMin, vMax = limits
+        field = np.asarray(fields, dtype=_dtype(precision))
+        vOut = vQ + field * sensitivity
+
+        # The upper limit takes precedence, same as the reference
+        vOut = np.where((vOut < vMin) | (field < minRange), vMin, vOut)
+        vOut = np.where((vQ + field * sensitivity > vMax) | (field > maxRange), vMax, vOut)
+        return vOut
+
+    def amplifierOut(self, ampType, gain, diffVoltage, diode, vMin, vMax, vIns, precision=None):
+        np = self._np
+        _checkAmplifier(ampType)
+        vIn = np.asarray(vIns, dtype=_dtype(precision))
+
+        if ampType == "diff":
+            vOut = (vIn - diffVoltage) * gain
+        elif ampType == "diffLog" or ampType == "log":
+            vt, isat, r = diode
+            vLog = vIn - diffVoltage if ampType == "diffLog" else vIn
+            if not np.all(vLog > 0):
+                raise ValueError(_LOG_DOMAIN_ERROR)
+            vOut = -vt * np.log(vLog / (isat * r))
+        else:
+            vOut = vIn * gain
+
+        vOut = np.where(vOut > vMax, vMax, vOut)
+        vOut = np.where(vOut < vMin, vMin, vOut)
+        return vOut
+
+
+class NumbaBackend(NumpyBackend):
+    """
+    JIT compiled backend. Loops are compiled with numba on first use and cached on disk.
+    """
+    name = "numba"
+
+    def __init__(self):
+        NumpyBackend.__init__(self)
+        self._kernels = _compileKernels()
+
+    def field1D(self, shape, dimensions, strength, distances, precision=None):
+        _checkShape(shape)
+        distance = self._np.ascontiguousarray(distances, dtype=float)
+        size = tuple(dimensions) + (0.0,) * (3 - len(dimensions))
+        return self._kernels[0](_SHAPES[shape], size[0], size[1], size[2], strength, distance.ravel()).reshape(distance.shape).astype(_dtype(precision), copy=False)
+
+    def field1DSlope(self, shape, dimensions, strength, distances, precision=None):
+        _checkShape(shape)
+        distance = self._np.ascontiguousarray(distances, dtype=float)
+        size = tuple(dimensions) + (0.0,) * (3 - len(dimensions))
+        return self._kernels[1](_SHAPES[shape], size[0], size[1], size[2], strength, distance.ravel()).reshape(distance.shape).astype(_dtype(precision), copy=False)
+
+    def sensorVoltage(self, limits, sensitivity, minRange, maxRange, fields, precision=None):
+        field = self._np.ascontiguousarray(fields, dtype=float)
+        vQ, vMin, vMax = limits
+        return self._kernels[2](vQ, vMin, vMax, sensitivity, minRange, maxRange, field.ravel()).reshape(field.shape).astype(_dtype(precision), copy=False)
+
+    def amplifierOut(self, ampType, gain, diffVoltage, diode, vMin, vMax, vIns, precision=None):
+        _checkAmplifier(ampType)
+        vIn = self._np.ascontiguousarray(vIns, dtype=float)
+        vt, isat, r = diode if diode is not None else (0.0, 1.0, 1.0)
+        vOut, inDomain = self._kernels[3](_AMPLIFIERS[ampType], _orZero(gain), _orZero(diffVoltage), vt, isat, r, vMin, vMax, vIn.ravel())
+        if not inDomain:
+            raise ValueError(_LOG_DOMAIN_ERROR)
+        return vOut.reshape(vIn.shape).astype(_dtype(precision), copy=False)
+
+
+def _stableField1D(np, shape, dimensions, strength, distance):
+    # field1D without cancellation between nearly equal terms, for float32.
+    # For a cylinder, with a = thickness + distance, b = distance and s(x) = sqrt(r ** 2 + x ** 2):
+    #   a / s(a) - b / s(b) = r ** 2 (a - b) (a + b) / (s(a) s(b) (a s(b) + b s(a)))
+    # For a cubic, with g(x) = x sqrt(4 x ** 2 + l ** 2 + w ** 2), the difference of the two atan terms is
+    #   atan((u - v) / (1 + u v)), u = l w / (2 g(b)), v = l w / (2 g(a)) and
+    #   u - v = (l w / 2) (a - b) (a + b) (4 (a ** 2 + b ** 2) + l ** 2 + w ** 2) / ((g(a) + g(b)) g(a) g(b))
+    if shape == "cubic":
+        length, width, thickness = dimensions
+        sides = length ** 2 + width ** 2
+        far = thickness + distance
+        gFar = far * np.sqrt(4 * far ** 2 + sides)
+        gNear = distance * np.sqrt(4 * distance ** 2 + sides)
+        difference = (length * width / 2) * thickness * (far + distance) * (4 * (far ** 2 + distance ** 2) + sides) / ((gFar + gNear) * gFar * gNear)
+        product = (length * width / 2) ** 2 / (gFar * gNear)
+        return (strength / math.pi) * np.arctan(difference / (1 + product))
+
+    def cylinder(radius, thickness):
+        far = thickness + distance
+        sFar = np.sqrt(radius ** 2 + far ** 2)
+        sNear = np.sqrt(radius ** 2 + distance ** 2)
+        return radius ** 2 * thickness * (far + distance) / (sFar * sNear * (far * sNear + distance * sFar))
+
+    if shape == "cylinder":
+        diameter, thickness = dimensions
+        return (strength / 2) * cylinder(diameter / 2, thickness)
+    diameter, iDiameter, thickness = dimensions
+    return (strength / 2) * (cylinder(diameter / 2, thickness) - cylinder(iDiameter / 2, thickness))
+
+
+def _stableField1DSlope(np, shape, dimensions, strength, distance):
+    # field1DSlope of cylinders and rings without cancellation, for float32. With p = r ** 2 + a ** 2 and
+    # q = r ** 2 + b ** 2, p ** -1.5 - q ** -1.5 = (b - a) (a + b) (p ** 2 + p q + q ** 2) / ((p ** 1.5 + q ** 1.5) (p q) ** 1.5)
+    def cylinder(radius, thickness):
+        far = thickness + distance
+        p = radius ** 2 + far ** 2
+        q = radius ** 2 + distance ** 2
+        return -radius ** 2 * thickness * (far + distance) * (p ** 2 + p * q + q ** 2) / ((p ** 1.5 + q ** 1.5) * (p * q) ** 1.5)
+
+    if shape == "cylinder":
+        diameter, thickness = dimensions
+        return (strength / 2) * cylinder(diameter / 2, thickness)
+    diameter, iDiameter, thickness = dimensions
+    return (strength / 2) * (cylinder(diameter / 2, thickness) - cylinder(iDiameter / 2, thickness))
+
+
+def _orZero(value):
+    return 0.0 if value is None else float(value)
+
+
+def _compileKernels():
+    import numba
+    import numpy as np
+
+    @numba.njit(cache=True)
+    def atanSlope(length, width, z):
+        sides = length ** 2 + width ** 2
+        root = math.sqrt(4 * z ** 2 + sides)
+        u = (length * width) / (2 * z * root)
+        return -(length * width / 2) * (8 * z ** 2 + sides) / ((1 + u ** 2) * z ** 2 * root ** 3)
+
+    @numba.njit(cache=True)
+    def field(shape, a, b, c, strength, distances):
+        out = np.empty(distances.shape[0])
+        for i in range(distances.shape[0]):
+            distance = distances[i]
+            if shape == 0:
+                radius = a / 2
+                out[i] = (strength / 2) * (((b + distance) / math.sqrt(radius ** 2 + (b + distance) ** 2)) - (distance / math.sqrt(radius ** 2 + distance ** 2)))
+            elif shape == 1:
+                out[i] = (strength / math.pi) * \
+                    (math.atan((a * b) / (2 * distance * math.sqrt(4 * distance ** 2 + a ** 2 + b ** 2)))
+                     - math.atan((a * b) / (2 * (c + distance) * math.sqrt(4 * (c + distance) ** 2 + a ** 2 + b ** 2))))
+            elif shape == 2:
+                outerRadius = a / 2
+                innerRadius = b / 2
+                out[i] = (strength / 2) * (((c + distance) / (math.sqrt(outerRadius ** 2 + (c + distance) ** 2))) -
+                                           (distance / (math.sqrt(outerRadius ** 2 + distance ** 2))) -
+                                           (((c + distance) / (math.sqrt(innerRadius ** 2 + (c + distance) ** 2))) -
+                                            (distance / (math.sqrt(innerRadius ** 2 + distance ** 2)))))
+            else:
+                radius = a / 2
+                out[i] = strength * (2 / 3) * ((radius ** 3) / ((radius + distance) ** 3))
+        return out
+
+    @numba.njit(cache=True)
+    def slope(shape, a, b, c, strength, distances):
+        out = np.empty(distances.shape[0])
+        for i in range(distances.shape[0]):
+            distance = distances[i]
+            if shape == 0:
+                radius = a / 2
+                out[i] = (strength / 2) * ((radius ** 2 / (radius ** 2 + (b + distance) ** 2) ** 1.5) - (radius ** 2 / (radius ** 2 + distance ** 2) ** 1.5))
+            elif shape == 1:
+                out[i] = (strength / math.pi) * (atanSlope(a, b, distance) - atanSlope(a, b, c + distance))
+            elif shape == 2:
+                outerRadius = a / 2
+                innerRadius = b / 2
+                out[i] = (strength / 2) * ((outerRadius ** 2 / (outerRadius ** 2 + (c + distance) ** 2) ** 1.5) -
+                                           (outerRadius ** 2 / (outerRadius ** 2 + distance ** 2) ** 1.5) -
+                                           ((innerRadius ** 2 / (innerRadius ** 2 + (c + distance) ** 2) ** 1.5) -
+                                            (innerRadius ** 2 / (innerRadius ** 2 + distance ** 2) ** 1.5)))
+            else:
+                radius = a / 2
+                out[i] = -3 * strength * (2 / 3) * ((radius ** 3) / ((radius + distance) ** 4))
+        return out
+
+    @numba.njit(cache=True)
+    def sensor(vQ, vMin, vMax, sensitivity, minRange, maxRange, fields):
+        out = np.empty(fields.shape[0])
+        for i in range(fields.shape[0]):
+            vOut = vQ + fields[i] * sensitivity
+            if vOut > vMax or fields[i] > maxRange:
+                vOut = vMax
+            elif vOut < vMin or fields[i] < minRange:
+                vOut = vMin
+            out[i] = vOut
+        return out
+
+    @numba.njit(cache=True)
+    def amplifier(ampType, gain, diffVoltage, vt, isat, r, vMin, vMax, vIns):
+        out = np.empty(vIns.shape[0])
+        for i in range(vIns.shape[0]):
+            vIn = vIns[i]
+            if ampType == 0:
+                vOut = (vIn - diffVoltage) * gain
+            elif ampType == 1 or ampType == 2:
+                vLog = vIn - diffVoltage if ampType == 1 else vIn
+                # Domain errors are reported to the caller, which raises the same error as the reference
+                if not vLog > 0:
+                    return out, False
+                vOut = -vt * math.log(vLog / (isat * r))
+            else:
+                vOut = vIn * gain
+            if vOut > vMax:
+                vOut = vMax
+            if vOut < vMin:
+                vOut = vMin
+            out[i] = vOut
+        return out, True
+
+    return field, slope, sensor, amplifier
+
+
+# Backends in order of preference, and the instances created so far
+_BACKENDS = {"numba": NumbaBackend, "numpy": NumpyBackend, "python": PythonBackend}
+_instances = {}
+_active = None
+_precision = None
+
+
+def availableBackends():
+    """
+    Gets the names of the backends that can be used in this environment, fastest first.
+
+    :return: backend names
+    :rtype: list[string]
+    """
+    names = []
+    for name in _BACKENDS:
+        try:
+            _instance(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def _instance(name):
+    if name not in _BACKENDS:
+        raise ValueError("Unrecognized backend. Choose from: " + ", ".join(_BACKENDS))
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+def setBackend(name):
+    """
+    Selects the backend used by array calculations.
+
+    :param name: "python", "numpy" or "numba"
+    :type name: string
+    :return: None
+    :raises ValueError: If the backend name is not recognized.
+    :raises ImportError: If the backend's dependency is not installed.
+    """
+    global _active
+    _active = _instance(name)
+
+
+def getBackend():
+    """
+    Gets the backend used by array calculations. On first use this is the backend named by the MTX_BACKEND
+    environment variable, or the fastest available backend.
+
+    :return: active backend
+    :rtype: Backend
+    """
+    if _active is None:
+        requested = os.environ.get("MTX_BACKEND")
+        setBackend(requested if requested else availableBackends()[0])
+    return _active
+
+
+def setPrecision(precision):
+    """
+    Selects the precision of array results.
+
+    :param precision: "float64" or "float32"
+    :type precision: string
+    :return: None
+    :raises ValueError: If the precision is not recognized.
+    """
+    global _precision
+    if precision not in PRECISIONS:
+        raise ValueError("Unrecognized precision. Choose from: " + ", ".join(PRECISIONS))
+    _precision = precision
+
+
+def getPrecision():
+    """
+    Gets the precision of array results. On first use this is the precision named by the MTX_PRECISION environment
+    variable, or float64.
+
+    :return: "float64" or "float32"
+    :rtype: string
+    """
+    if _precision is None:
+        setPrecision(os.environ.get("MTX_PRECISION") or "float64")
+    return _precision
+
+
+def _dtype(precision):
+    # Precision of an array result: the one asked for, or the selected precision
+    if precision is None:
+        return getPrecision()
+    if precision not in PRECISIONS:
+        raise ValueError("Unrecognized precision. Choose from: " + ", ".join(PRECISIONS))
+    return precision
+
+
+def magnetDimensions(magnet):
+    """
+    Gets the dimensions of a magnet for its configured shape, in the order used by the backends.
+    This is the dimensions argument of every field function in this module.
+
+    :param magnet: Configured magnet
+    :type magnet: Magnet
+    :return: dimensions
+    :rtype: tuple[float]
+    """
+    shape = magnet.shape()
+    if shape == "cylinder":
+        return magnet.getCylinderSize()
+    elif shape == "cubic":
+        return magnet.getCubicSize()
+    elif shape == "ring":
+        return magnet.getRingSize()
+    elif shape == "sphere":
+        return magnet.getSphereSize(),
+    _checkShape(shape)
@@ -0,0 +1,261 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# This class collects voltage calculations from many threads or asyncio tasks and evaluates them together.
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core import Backends
+import queue
+import threading
+import time
+
+
+class BatchEvaluator:
+    """
+    Request coalescing evaluator for calculateVoltage1D.
+
+    Calls are queued and resolved by a single worker thread. The worker waits up to maxLatency seconds after the
+    first queued call (or until maxBatchSize points are queued), groups the calls by magnet and sensor
+    configuration, and evaluates each group as one numpy array. Requires numpy.
+
+    The configuration of the magnet and sensor is copied when a call is queued. Calls with equal configurations share
+    an evaluation even if each caller built its own Magnet and HallSensor, and changing a magnet or sensor after
+    submitting does not change the results of calls that are already queued.
+    """
+    def __init__(self, maxBatchSize=65536, maxLatency=0.001):
+        """
+        Creates a new evaluator. The worker thread is started on the first call.
+
+        :param maxBatchSize: Number of points that triggers a batch before the latency window ends.
+        :type maxBatchSize: int
+        :param maxLatency: Time in seconds a call may wait for other calls to join its batch.
+        :type maxLatency: float
+        """
+        self.__queue = queue.Queue()
+        self.__lock = threading.Lock()
+        self.__worker = None
+        self.__closed = False
+        self.setBatchSize(maxBatchSize)
+        self.setLatency(maxLatency)
+        self.resetStatistics()
+
+    def setBatchSize(self, maxBatchSize):
+        """
+        Sets the number of points that triggers a batch before the latency window ends.
+
+        :param maxBatchSize: Maximum points per batch
+        :type maxBatchSize: int
+        :return: None
+        :raises ValueError: If the batch size is less than one.
+        """
+        if maxBatchSize < 1:
+            raise ValueError("Batch size must be at least one point.")
+        self.__maxBatchSize = maxBatchSize
+
+    def setLatency(self, maxLatency):
+        """
+        Sets the time a call may wait for other calls to join its batch.
+
+        :param maxLatency: Latency bound in seconds
+        :type maxLatency: float
+        :return: None
+        :raises ValueError: If the latency is negative.
+        """
+        if maxLatency < 0:
+            raise ValueError("Latency must not be negative.")
+        self.__maxLatency = maxLatency
+
+    def submit(self, magnet, sensor, distance):
+        """
+        Queues a voltage calculation and returns immediately.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param sensor: Sensor to simulate.
+        :type sensor: HallSensor
+        :param distance: Distance, or sequence of distances, between magnet and sensor.
+        :type distance: float or array_like
+        :return: Future resolving to the voltage (float for a single distance, numpy.ndarray otherwise). A magnet or
+            sensor that is not fully configured resolves the future with the error.
+        :rtype: concurrent.futures.Future
+        :raises ValueError: If the magnet or sensor are not valid instances.
+        :raises RuntimeError: If the evaluator has been closed.
+        """
+        import concurrent.futures
+        import numpy as np
+
+        if not isinstance(magnet, Magnet):
+            raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+        if not isinstance(sensor, HallSensor):
+            raise ValueError("Sensor provided is not a valid HallSensor.py instance.")
+
+        scalar = np.ndim(distance) == 0
+        distances = np.atleast_1d(np.asarray(distance, dtype=float)).ravel()
+        future = concurrent.futures.Future()
+        try:
+            configuration = _configuration(magnet, sensor)
+        except Exception as error:
+            future.set_exception(error)
+            return future
+
+        with self.__lock:
+            if self.__closed:
+                raise RuntimeError("Evaluator has been closed.")
+            if self.__worker is None:
+                self.__worker = threading.Thread(target=self.__run, name="BatchEvaluator", daemon=True)
+                self.__worker.start()
+            self.__queue.put((configuration, distances, scalar, future, time.perf_counter()))
+        return future
+
+    def calculateVoltage1D(self, magnet, sensor, distance):
+        """
+        Calculates a sensor voltage output from a 1D magnetic field, batched with concurrent callers.
+        Blocks until the batch containing this call is evaluated.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param sensor: Sensor to simulate.
+        :type sensor: HallSensor
+        :param distance: Distance, or sequence of distances, between magnet and sensor.
+        :type distance: float or array_like
+        :return: Voltage output of sensor.
+        :rtype: float or numpy.ndarray
+        """
+        return self.submit(magnet, sensor, distance).result()
+
+    async def calculateVoltage1DAsync(self, magnet, sensor, distance):
+        """
+        Asyncio version of calculateVoltage1D. Awaits the batch without blocking the event loop.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param sensor: Sensor to simulate.
+        :type sensor: HallSensor
+        :param distance: Distance, or sequence of distances, between magnet and sensor.
+        :type distance: float or array_like
+        :return: Voltage output of sensor.
+        :rtype: float or numpy.ndarray
+        """
+        import asyncio
+
+        return await asyncio.wrap_future(self.submit(magnet, sensor, distance))
+
+    def getStatistics(self):
+        """
+        Gets statistics about the calls and batches evaluated so far.
+
+        :return: calls, points, batches, groups (evaluations), largest batch in points, mean points per batch,
+                 mean and maximum latency in seconds from submission to result.
+        :rtype: dict
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+        stats["meanBatchSize"] = stats["points"] / stats["batches"] if stats["batches"] else 0.0
+        stats["meanLatency"] = stats.pop("totalLatency") / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+    def resetStatistics(self):
+        """
+        Resets all statistics to zero.
+
+        :return: None
+        """
+        with self.__lock:
+            self.__stats = {"calls": 0, "points": 0, "batches": 0, "groups": 0, "largestBatch": 0,
+                            "totalLatency": 0.0, "maxLatency": 0.0}
+
+    def close(self):
+        """
+        Stops accepting calls, resolves every queued call, and stops the worker thread.
+
+        :return: None
+        """
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            worker = self.__worker
+            self.__queue.put(None)
+        if worker is not None:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __run(self):
+        stopping = False
+        while not stopping:
+            request = self.__queue.get()
+            if request is None:
+                break
+            batch = [request]
+            points = len(request[1])
+            deadline = time.perf_counter() + self.__maxLatency
+
+            # Collect calls until the latency window closes or the batch is full
+            while points < self.__maxBatchSize:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = self.__queue.get(timeout=remaining) if remaining > 0 else self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                points += len(request[1])
+
+            self.__evaluate(batch, points)
+
+    def __evaluate(self, batch, points):
+        import numpy as np
+
+        # Group calls sharing a magnet and sensor configuration
+        groups = {}
+        for request in batch:
+            if request[3].set_running_or_notify_cancel():
+                groups.setdefault(request[0], []).append(request)
+
+        for configuration, requests in groups.items():
+            shape, dimensions, strength, magnetization, sensorType, limits, sensitivity, minRange, maxRange = configuration
+            # Any error, including a backend that fails to load, resolves the futures of the group instead of
+            # stopping the worker
+            try:
+                backend = Backends.getBackend()
+                distances = np.concatenate([request[1] for request in requests])
+                # Convert from Teslas to mT, same as the sweep functions
+                field = np.asarray(backend.field1D(shape, dimensions, strength, distances)) * 1000
+                voltages = np.asarray(backend.sensorVoltage(limits, sensitivity, minRange, maxRange, field))
+            except Exception as error:
+                for request in requests:
+                    request[3].set_exception(error)
+                continue
+
+            start = 0
+            for request in requests:
+                end = start + len(request[1])
+                request[3].set_result(float(voltages[start]) if request[2] else voltages[start:end])
+                start = end
+
+        finished = time.perf_counter()
+        latencies = [finished - request[4] for request in batch]
+        with self.__lock:
+            self.__stats["calls"] += len(batch)
+            self.__stats["points"] += points
+            self.__stats["batches"] += 1
+            self.__stats["groups"] += len(groups)
+            self.__stats["largestBatch"] = max(self.__stats["largestBatch"], points)
+            self.__stats["totalLatency"] += sum(latencies)
+            self.__stats["maxLatency"] = max([self.__stats["maxLatency"]] + latencies)
+
+
+def _configuration(magnet, sensor):
+    # Everything the voltage depends on, copied into a hashable key, in the same spirit as ResultCache.describe
+    if magnet.getMagnetization() != "axial":
+        raise NotImplementedError("1D field calculations require an axially magnetized magnet. Use FieldCalculations3D for diametric magnets.")
+    minRange, maxRange = sensor.getRange()
+    return (magnet.shape(), tuple(float(value) for value in Backends.magnetDimensions(magnet)), float(magnet.getStrengthMT()),
+            magnet.getMagnetization(), sensor.getType(), tuple(float(value) for value in sensor.getOutputLimits()),
+            float(sensor.getSensitivity()), float(minRange), float(maxRange))
@@ -0,0 +1,446 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Checkpointed batch runner for long simulation campaigns, such as a sensor catalog swept over a grid of magnets with
+# tolerance samples.
+#
+# A job is described by a JSON spec, and expanded into work units: one unit per magnet, sensor, amplifier and sweep.
+# Units are run on a pool of processes, and every finished unit is written to its own file in the job directory
+# (written to a temporary file and renamed into place, so a unit file is either complete or absent). A run that is
+# stopped, by Ctrl-C or otherwise, loses only the units in progress: running the same job on the same directory again
+# skips the units that are already on disk.
+#
+# Run a job from the command line with: python -m Core.BatchRunner job.json directory
+#
+# Example spec:
+# {
+#     "magnets": [{"shape": "cylinder", "sizes": [[6, 3], [8, 3]], "grades": ["N42", "N52"]}],
+#     "sensors": ["DRV5055-A1", "DRV5055-A3", {"type": "bipolar5", "sensitivity": 30, "range": [-70, 70]}],
+#     "amplifiers": [null, "Diff-3.3-1.65-10"],
+#     "sweeps": [{"start": 1, "end": 50}],
+#     "tolerances": {"samples": 1000, "seed": 1, "remanence": 200, "sensitivity": 2, "offset": 0.01, "gap": 0.1}
+# }
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+from Core.Calibration import Calibration
+import itertools
+import os
+import time
+
+# Version of the unit file layout, part of the stored job so old checkpoints are not mixed with new ones
+FORMAT_VERSION = 1
+
+# Parameters that can be sampled, and their units: Gauss, mV/mT, Volts and the units of the distances
+TOLERANCES = ("remanence", "sensitivity", "offset", "gap")
+
+
+def loadJob(path):
+    """
+    Reads a job spec from a JSON file.
+
+    :param path: Path of the spec
+    :type path: string
+    :return: job spec
+    :rtype: dict
+    """
+    import json
+
+    with open(path, "r") as spec:
+        return json.load(spec)
+
+
+def expandJob(job):
+    """
+    Expands a job spec into its work units, in a fixed order: magnets, then sensors, then amplifiers, then sweeps.
+    Magnet entries with "sizes" or "grades" lists expand into one magnet per combination.
+
+    :param job: Job spec
+    :type job: dict
+    :return: unit specs, each with one magnet, sensor, amplifier and sweep
+    :rtype: list[dict]
+    :raises ValueError: If the spec has no magnets, sensors or sweeps.
+    """
+    for section in ("magnets", "sensors", "sweeps"):
+        if not job.get(section):
+            raise ValueError("Job spec must list at least one entry in " + section + ".")
+
+    magnets = []
+    for magnet in job["magnets"]:
+        sizes = magnet.get("sizes", [magnet.get("size")])
+        grades = magnet.get("grades", [magnet.get("grade")])
+        for size, grade in itertools.product(sizes, grades):
+            entry = {name: value for name, value in magnet.items() if name not in ("sizes", "grades")}
+            entry["size"] = size
+            if grade is not None:
+                entry["grade"] = grade
+            magnets.append(entry)
+
+    amplifiers = job.get("amplifiers") or [None]
+    return [{"magnet": magnet, "sensor": sensor, "amplifier": amplifier, "sweep": sweep}
+            for magnet, sensor, amplifier, sweep in itertools.product(magnets, job["sensors"], amplifiers, job["sweeps"])]
+
+
+def makeMagnet(spec):
+    """
+    Creates a magnet from its spec: shape, size, and grade or remanence (Gauss), optionally magnetization.
+
+    :param spec: Magnet spec
+    :type spec: dict
+    :return: magnet
+    :rtype: Magnet
+    :raises ValueError: If the shape is not recognized or no strength is given.
+    """
+    magnet = Magnet()
+    setters = {"cylinder": magnet.setCylinderSize, "cubic": magnet.setCubicSize, "ring": magnet.setRingSize,
+               "sphere": magnet.setSphereSize}
+    if spec.get("shape") not in setters:
+        raise ValueError("Unrecognized magnet shape. Use cylinder, cubic, ring or sphere.")
+    setters[spec["shape"]](*spec["size"])
+    if "remanence" in spec:
+        magnet.setRemanence(spec["remanence"])
+    elif "grade" in spec:
+        magnet.setGrade(spec["grade"])
+    else:
+        raise ValueError("Magnet spec needs a grade or a remanence.")
+    if "magnetization" in spec:
+        magnet.setMagnetization(spec["magnetization"])
+    return magnet
+
+
+def makeSensor(spec):
+    """
+    Creates a sensor from its spec: a preset name, or a dict with type, sensitivity (mV/mT) and range (mT).
+
+    :param spec: Sensor spec
+    :type spec: string or dict
+    :return: sensor
+    :rtype: HallSensor
+    """
+    if isinstance(spec, str):
+        return HallSensor(spec)
+    if "preset" in spec:
+        return HallSensor(spec["preset"])
+    sensor = HallSensor()
+    sensor.setType(spec["type"])
+    sensor.setSensitivity(spec["sensitivity"])
+    sensor.setRange(*spec["range"])
+    return sensor
+
+
+def makeAmplifier(spec):
+    """
+    Creates an amplifier from its spec: None for no amplifier, a preset name, or a dict with type, gain, diffVoltage,
+    range and, for log amplifiers, diode (thermal voltage, saturation current and input resistor).
+
+    :param spec: Amplifier spec
+    :type spec: string or dict
+    :return: amplifier, None if there is none
+    :rtype: Amplifier
+    """
+    if spec is None:
+        return None
+    if isinstance(spec, str):
+        return Amplifier(spec)
+    if "preset" in spec:
+        return Amplifier(spec["preset"])
+    amplifier = Amplifier()
+    vt, isat, logR = spec.get("diode", (None, None, None))
+    amplifier.setType(spec["type"], diffVoltage=spec.get("diffVoltage"), vt=vt, isat=isat, logR=logR)
+    if "gain" in spec:
+        amplifier.setGain(spec["gain"])
+    amplifier.setRange(*spec["range"])
+    return amplifier
+
+
+def runUnit(unit, tolerances=None, index=0):
+    """
+    Simulates one work unit: the nominal output over the sweep, and the output of every tolerance sample.
+    Requires numpy.
+
+    Samples are drawn from a generator seeded with the job seed and the unit index, so a unit gives the same samples
+    whether it runs first, last, or after a restart.
+
+    :param unit: Unit spec, as returned by expandJob
+    :type unit: dict
+    :param tolerances: Tolerance spec: samples, seed, and the standard deviation of each of TOLERANCES
+    :type tolerances: dict
+    :param index: Index of the unit in the job
+    :type index: int
+    :return: distance, nominal output, sampled parameters (one row per sample, columns in TOLERANCES order), and
+        sampled outputs (one row per sample)
+    :rtype: dict[string, numpy.ndarray]
+    """
+    import numpy as np
+
+    magnet = makeMagnet(unit["magnet"])
+    sensor = makeSensor(unit["sensor"])
+    model = Calibration(magnet, sensor, makeAmplifier(unit["amplifier"]))
+
+    sweep = unit["sweep"]
+    step = sweep.get("step", 0.1)
+    distance = np.arange(round(sweep["start"] / step), round(sweep["end"] / step)) * step
+    result = {"distance": distance, "nominal": model.model(distance)}
+
+    tolerances = tolerances or {}
+    samples = tolerances.get("samples", 0)
+    nominal = np.array([magnet.getStrengthGauss(), sensor.getSensitivity() * 1000, 0.0, 0.0])
+    spread = np.array([tolerances.get(name, 0.0) for name in TOLERANCES])
+    generator = np.random.default_rng([tolerances.get("seed", 0), index])
+    parameters = nominal + spread * generator.standard_normal((samples, len(TOLERANCES)))
+    result["parameters"] = parameters
+    result["samples"] = model.model(distance, *parameters.T) if samples else np.empty((0, distance.shape[0]))
+    return result
+
+
+class BatchRunner:
+    """
+    Runs a job spec in a directory, one checkpoint file per work unit.
+
+    The spec is stored in the directory with the first run. Later runs on the same directory resume the stored job,
+    and refuse a different spec so checkpoints of two jobs are never mixed. Only one runner works in a directory at a
+    time, a second one waits for the first to finish (where fcntl exists).
+    """
+    def __init__(self, job, directory):
+        """
+        Opens (and creates if needed) the directory of a job.
+
+        :param job: Job spec
+        :type job: dict
+        :param directory: Directory of the checkpoints
+        :type directory: string
+        :raises ValueError: If the spec is not valid, or the directory holds a different job.
+        """
+        import json
+
+        self.__job = job
+        self.__directory = directory
+        self.__units = expandJob(job)
+
+        os.makedirs(os.path.join(directory, "units"), exist_ok=True)
+        stored = os.path.join(directory, "job.json")
+        canonical = json.dumps({"format": FORMAT_VERSION, "job": job}, sort_keys=True, indent=1)
+        if os.path.exists(stored):
+            with open(stored, "r") as spec:
+                if spec.read() != canonical:
+                    raise ValueError("Directory holds checkpoints of a different job. Use a new directory.")
+        else:
+            _writeAtomic(stored, canonical.encode("utf-8"))
+
+    def getDirectory(self):
+        """
+        Gets the directory of the checkpoints.
+
+        :return: directory
+        :rtype: string
+        """
+        return self.__directory
+
+    def getUnits(self):
+        """
+        Gets the work units of the job.
+
+        :return: unit specs, in index order
+        :rtype: list[dict]
+        """
+        return list(self.__units)
+
+    def getCompleted(self):
+        """
+        Gets the indices of the units that are checkpointed.
+
+        :return: unit indices
+        :rtype: set[int]
+        """
+        completed = set()
+        for name in os.listdir(os.path.join(self.__directory, "units")):
+            if name.endswith(".npz") and name[:-4].isdigit():
+                completed.add(int(name[:-4]))
+        return completed
+
+    def run(self, processes=None, progress=None, interval=1.0):
+        """
+        Runs every unit that is not checkpointed yet. Requires numpy.
+
+        :param processes: Number of worker processes, defaults to the number of cores. 1 runs in this process.
+        :type processes: int
+        :param progress: Called with a progress dict (completed, total, skipped, elapsed, unitsPerSecond,
+            pointsPerSecond, remaining) at most once per interval, and once at the end.
+        :type progress: callable
+        :param interval: Seconds between progress calls
+        :type interval: float
+        :return: final progress dict
+        :rtype: dict
+        """
+        from Core.ResultCache import _Lock
+
+        with _Lock(os.path.join(self.__directory, ".lock")):
+            # Left over from units that were in progress when a previous run stopped
+            units = os.path.join(self.__directory, "units")
+            for name in os.listdir(units):
+                if name.endswith(".tmp"):
+                    os.remove(os.path.join(units, name))
+
+            completed = self.getCompleted()
+            pending = [index for index in range(len(self.__units)) if index not in completed]
+            tolerances = self.__job.get("tolerances")
+            work = [(self.__directory, index, self.__units[index], tolerances) for index in pending]
+
+            state = {"completed": len(completed), "total": len(self.__units), "skipped": len(completed),
+                     "elapsed": 0.0, "unitsPerSecond": 0.0, "pointsPerSecond": 0.0, "remaining": None}
+            start = reported = time.time()
+            points = 0
+
+            if processes is None:
+                processes = os.cpu_count() or 1
+            processes = max(1, min(processes, len(work)))
+            if processes == 1:
+                results = map(_workerUnit, work)
+                pool = None
+            else:
+                import multiprocessing
+
+                pool = multiprocessing.Pool(processes)
+                results = pool.imap_unordered(_workerUnit, work)
+
+            try:
+                for index, unitPoints in results:
+                    points += unitPoints
+                    state["completed"] += 1
+                    now = time.time()
+                    _updateProgress(state, now - start, points)
+                    if progress is not None and now - reported >= interval and state["completed"] < state["total"]:
+                        reported = now
+                        progress(dict(state))
+            finally:
+                if pool is not None:
+                    # Stops units in progress on an interrupt, their temporary files are removed by the next run
+                    pool.terminate()
+                    pool.join()
+
+            _updateProgress(state, time.time() - start, points)
+            if progress is not None:
+                progress(dict(state))
+            return state
+
+    def load(self, index):
+        """
+        Loads the result of a checkpointed unit. Requires numpy.
+
+        :param index: Unit index
+        :type index: int
+        :return: result, as returned by runUnit, None if the unit is not checkpointed
+        :rtype: dict[string, numpy.ndarray]
+        """
+        import numpy as np
+
+        try:
+            with np.load(_unitPath(self.__directory, index)) as stored:
+                return {name: stored[name] for name in stored.files}
+        except FileNotFoundError:
+            return None
+
+    def results(self):
+        """
+        Loads every checkpointed unit in index order.
+
+        :return: generator of (unit spec, result)
+        """
+        for index in sorted(self.getCompleted()):
+            yield self.__units[index], self.load(index)
+
+
+def _updateProgress(state, elapsed, points):
+    ran = state["completed"] - state["skipped"]
+    state["elapsed"] = elapsed
+    if elapsed > 0 and ran:
+        state["unitsPerSecond"] = ran / elapsed
+        state["pointsPerSecond"] = points / elapsed
+        state["remaining"] = (state["total"] - state["completed"]) / state["unitsPerSecond"]
+    elif state["completed"] == state["total"]:
+        state["remaining"] = 0.0
+
+
+def _unitPath(directory, index):
+    return os.path.join(directory, "units", str(index) + ".npz")
+
+
+def _writeAtomic(path, data):
+    import tempfile
+
+    handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, "wb") as output:
+            output.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _workerUnit(work):
+    import io
+    import numpy as np
+
+    directory, index, unit, tolerances = work
+    result = runUnit(unit, tolerances, index)
+    buffer = io.BytesIO()
+    np.savez(buffer, **result)
+    _writeAtomic(_unitPath(directory, index), buffer.getvalue())
+    # Simulated points: the nominal curve and every sample
+    return index, result["nominal"].size + result["samples"].size
+
+
+def _printProgress(state):
+    import sys
+
+    remaining = "-" if state["remaining"] is None else _duration(state["remaining"])
+    sys.stderr.write("{completed}/{total} units, {rate:.2f} units/s, {points:.3g} points/s, {remaining} remaining\n".format(
+        completed=state["completed"], total=state["total"], rate=state["unitsPerSecond"],
+        points=state["pointsPerSecond"], remaining=remaining))
+    sys.stderr.flush()
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "{0}:{1:02d}:{2:02d}".format(hours, minutes, seconds)
+
+
+def main(arguments=None):
+    """
+    Command line entry point: runs (or resumes) a job spec in a directory, reporting progress on stderr.
+
+    :param arguments: Command line arguments, defaults to sys.argv
+    :type arguments: list[string]
+    :return: exit code
+    :rtype: int
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m Core.BatchRunner",
+                                     description="Run or resume a checkpointed simulation job.")
+    parser.add_argument("job", help="JSON job spec")
+    parser.add_argument("directory", help="checkpoint directory, reuse it to resume")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, defaults to the number of cores")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between progress reports")
+    parser.add_argument("--status", action="store_true", help="report the checkpointed units and exit")
+    options = parser.parse_args(arguments)
+
+    runner = BatchRunner(loadJob(options.job), options.directory)
+    if options.status:
+        print(str(len(runner.getCompleted())) + "/" + str(len(runner.getUnits())) + " units completed")
+        return 0
+    try:
+        state = runner.run(options.processes, _printProgress, options.interval)
+    except KeyboardInterrupt:
+        print("Interrupted, " + str(len(runner.getCompleted())) + "/" + str(len(runner.getUnits())) +
+              " units are checkpointed. Run again to resume.")
+        return 130
+    print("Completed " + str(state["total"] - state["skipped"]) + " units in " + _duration(state["elapsed"]) +
+          " (" + str(state["skipped"]) + " resumed from checkpoints)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
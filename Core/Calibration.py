@@ -0,0 +1,338 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# This class fits per unit magnet and sensor parameters to measured voltage versus distance data, for end of line calibration.
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+from Core.FieldCalculations import calculate1DFieldArray, calculate1DFieldSlope
+
+# Parameters that can be fitted, in the order they are returned by fit()
+PARAMETERS = ("remanence", "sensitivity", "offset", "gap")
+
+
+def _fieldArray(function, magnet, distance):
+    # Backends work on flat sequences and may return lists, the fit needs arrays shaped like the distances. The fit
+    # always runs in float64, whatever the selected precision.
+    import numpy as np
+    return np.asarray(function(magnet, distance.ravel(), precision="float64"), dtype=float).reshape(distance.shape)
+
+
+class Calibration:
+    """
+    Calibration fit of a magnet, sensor and optional amplifier against measured output voltage versus distance.
+
+    Each unit is described by four parameters:
+    - remanence: effective remanence of the magnet in Gauss
+    - sensitivity: sensitivity of the sensor in mV/mT
+    - offset: offset of the sensor output from its quiescent voltage in Volts
+    - gap: mounting gap error, added to every measured distance
+    The free parameters are fitted, the others are held at nominal (the magnet and sensor settings, 0 offset and gap).
+
+    Remanence and sensitivity only appear in the output as a product, so one voltage curve can not tell them apart.
+    To fit both, give at least one of them a tolerance with setTolerances. The fit then splits the product according
+    to the tolerances, as a maximum a posteriori estimate with gaussian priors around nominal.
+
+    Units are fitted together: residuals and analytic jacobians are evaluated for every unit at once and each
+    Levenberg-Marquardt iteration solves one small normal equation per unit in a single batched call.
+    """
+    def __init__(self, magnet, sensor, amplifier=None):
+        """
+        Creates a new calibration fit for a nominal chain.
+
+        :param magnet: Nominal magnet, used for the shape, size and nominal remanence.
+        :type magnet: Magnet
+        :param sensor: Nominal sensor, used for the type, range and nominal sensitivity.
+        :type sensor: HallSensor
+        :param amplifier: Amplifier after the sensor, None if the sensor output is measured directly.
+        :type amplifier: Amplifier
+        :raises ValueError: If a component is not a valid instance.
+        """
+        if not isinstance(magnet, Magnet):
+            raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+        if not isinstance(sensor, HallSensor):
+            raise ValueError("Sensor provided is not a valid HallSensor.py instance.")
+        if amplifier is not None and not isinstance(amplifier, Amplifier):
+            raise ValueError("Amplifier provided is not a valid Amplifier.py instance.")
+
+        self.__magnet = magnet
+        self.__sensor = sensor
+        self.__amplifier = amplifier
+        self.__free = ("remanence", "offset", "gap")
+        self.__tolerances = {}
+        self.__noise = 0.001
+        self.__maxIterations = 100
+        self.__tolerance = 1e-12
+        self.__blockSize = 4096
+
+    def setFreeParameters(self, *names):
+        """
+        Selects the parameters that are fitted. Defaults to remanence, offset and gap.
+
+        :param names: Names from PARAMETERS
+        :type names: string
+        :return: None
+        :raises ValueError: If a name is not recognized.
+        """
+        for name in names:
+            if name not in PARAMETERS:
+                raise ValueError("Unrecognized parameter. Choose from: " + ", ".join(PARAMETERS))
+        self.__free = tuple(name for name in PARAMETERS if name in names)
+
+    def setTolerances(self, remanence=None, sensitivity=None, offset=None, gap=None):
+        """
+        Sets the expected spread (one standard deviation) of each parameter around nominal. Parameters with a
+        tolerance are pulled towards nominal as much as the data allows, None leaves a parameter unconstrained.
+
+        :param remanence: Remanence tolerance in Gauss
+        :type remanence: float
+        :param sensitivity: Sensitivity tolerance in mV/mT
+        :type sensitivity: float
+        :param offset: Offset tolerance in Volts
+        :type offset: float
+        :param gap: Gap tolerance, in the units of the distances
+        :type gap: float
+        :return: None
+        """
+        tolerances = {"remanence": remanence, "sensitivity": sensitivity, "offset": offset, "gap": gap}
+        self.__tolerances = {name: value for name, value in tolerances.items() if value is not None}
+
+    def setNoise(self, volts):
+        """
+        Sets the measurement noise (one standard deviation), which weighs the data against the tolerances.
+
+        :param volts: Noise in Volts
+        :type volts: float
+        :return: None
+        """
+        self.__noise = volts
+
+    def setIterations(self, maxIterations, tolerance):
+        """
+        Sets the iteration limit and the relative decrease of the cost below which a unit counts as converged.
+
+        :param maxIterations: Maximum Levenberg-Marquardt iterations.
+        :type maxIterations: int
+        :param tolerance: Convergence tolerance on the relative cost decrease.
+        :type tolerance: float
+        :return: None
+        """
+        self.__maxIterations = maxIterations
+        self.__tolerance = tolerance
+
+    def setBlockSize(self, blockSize):
+        """
+        Sets the number of units fitted together, which bounds memory use.
+
+        :param blockSize: Units per block
+        :type blockSize: int
+        :return: None
+        """
+        self.__blockSize = blockSize
+
+    def model(self, distances, remanence=None, sensitivity=None, offset=0.0, gap=0.0):
+        """
+        Calculates the output voltage of the chain for a set of parameters. Requires numpy.
+        Each parameter may also be an array with one value per unit, such as tolerance samples. All units are then
+        evaluated together and the result has one row per unit.
+
+        :param distances: Measured distances
+        :type distances: array_like
+        :param remanence: Remanence in Gauss, defaults to the magnet remanence
+        :type remanence: float or array_like
+        :param sensitivity: Sensitivity in mV/mT, defaults to the sensor sensitivity
+        :type sensitivity: float or array_like
+        :param offset: Sensor output offset in Volts
+        :type offset: float or array_like
+        :param gap: Gap error
+        :type gap: float or array_like
+        :return: voltages, shaped like the distances, or (units, distances) if a parameter is an array
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        distance = np.asarray(distances, dtype=float)
+        parameters = self.__toState(remanence, sensitivity, offset, gap)
+        state = np.column_stack(np.broadcast_arrays(*(np.ravel(parameter) for parameter in parameters)))
+        output = self.__evaluate(np.broadcast_to(distance.reshape(1, -1), (state.shape[0], distance.size)), state)
+        if all(np.ndim(parameter) == 0 for parameter in parameters):
+            return output[0].reshape(distance.shape)
+        return output.reshape((state.shape[0],) + distance.shape)
+
+    def fit(self, distances, voltages):
+        """
+        Fits every unit to its measurements. Requires numpy.
+        Measurements on the output rails carry no information and are ignored, as are NaN measurements, so units
+        may have different numbers of points.
+
+        :param distances: Distances, one row per unit, or a single row shared by every unit.
+        :type distances: array_like
+        :param voltages: Measured voltages, one row per unit.
+        :type voltages: array_like
+        :return: remanence in Gauss, sensitivity in mV/mT, offset in Volts, gap error, RMS residual in Volts, converged flag
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        :raises ValueError: If remanence and sensitivity are both free without a tolerance, or the shapes do not match.
+        """
+        import numpy as np
+
+        if "remanence" in self.__free and "sensitivity" in self.__free and \
+                "remanence" not in self.__tolerances and "sensitivity" not in self.__tolerances:
+            raise ValueError("Remanence and sensitivity only appear as a product. Set a tolerance on one of them or hold one fixed.")
+
+        voltages = np.atleast_2d(np.asarray(voltages, dtype=float))
+        try:
+            distances = np.broadcast_to(np.asarray(distances, dtype=float), voltages.shape)
+        except ValueError:
+            raise ValueError("Distances must have one row per unit, or a single row with one distance per voltage.")
+
+        results = [self.__fitBlock(distances[start:start + self.__blockSize], voltages[start:start + self.__blockSize])
+                   for start in range(0, voltages.shape[0], self.__blockSize)]
+        if not results:
+            empty = np.empty(0)
+            return empty, empty, empty, empty, empty, np.empty(0, dtype=bool)
+        state, rms, converged = (np.concatenate(column) for column in zip(*results))
+        remanence = state[:, 0] * self.__magnet.getStrengthGauss()
+        sensitivity = state[:, 1] * self.__sensor.getSensitivity() * 1000
+        return remanence, sensitivity, state[:, 2], state[:, 3], rms, converged
+
+    def __toState(self, remanence, sensitivity, offset, gap):
+        # Remanence and sensitivity are solved as scales of nominal, which keeps every parameter close to unit size
+        import numpy as np
+
+        remanenceScale = 1.0 if remanence is None else np.asarray(remanence, dtype=float) / self.__magnet.getStrengthGauss()
+        sensitivityScale = 1.0 if sensitivity is None else np.asarray(sensitivity, dtype=float) / (self.__sensor.getSensitivity() * 1000)
+        return [remanenceScale, sensitivityScale, offset, gap]
+
+    def __outputLimits(self):
+        # Rails of the measured output
+        if self.__amplifier is None:
+            vQ, vMin, vMax = self.__sensor.getOutputLimits()
+            return vMin, vMax
+        return self.__amplifier.getRange()
+
+    def __evaluate(self, distance, state, jacobian=False):
+        import numpy as np
+
+        remanence, sensitivity, offset, gap = (state[:, index:index + 1] for index in range(4))
+        nominal = self.__sensor.getSensitivity()
+        vQ, vMin, vMax = self.__sensor.getOutputLimits()
+        minRange, maxRange = self.__sensor.getRange()
+
+        # Field of the nominal magnet in mT, and of the unit
+        shifted = distance + gap
+        field = _fieldArray(calculate1DFieldArray, self.__magnet, shifted) * 1000
+        unitField = remanence * field
+        voltage = vQ + offset + nominal * sensitivity * unitField
+
+        # Same clipping as the sensor, the upper limit takes precedence
+        linear = (voltage > vMin) & (voltage < vMax) & (unitField >= minRange) & (unitField <= maxRange)
+        output = np.where((voltage < vMin) | (unitField < minRange), vMin, voltage)
+        output = np.where((voltage > vMax) | (unitField > maxRange), vMax, output)
+        gain = linear.astype(float)
+
+        if self.__amplifier is not None:
+            output, amplifierGain = _amplify(self.__amplifier, output)
+            gain = gain * amplifierGain
+        if not jacobian:
+            return output
+
+        # Analytic jacobian of the output with respect to remanence scale, sensitivity scale, offset and gap
+        slope = _fieldArray(calculate1DFieldSlope, self.__magnet, shifted) * 1000
+        derivatives = np.empty(distance.shape + (4,))
+        derivatives[:, :, 0] = nominal * sensitivity * field
+        derivatives[:, :, 1] = nominal * remanence * field
+        derivatives[:, :, 2] = 1.0
+        derivatives[:, :, 3] = nominal * sensitivity * remanence * slope
+        return output, derivatives * gain[:, :, np.newaxis]
+
+    def __fitBlock(self, distance, readings):
+        import numpy as np
+
+        units = readings.shape[0]
+        free = [PARAMETERS.index(name) for name in self.__free]
+        nominal = np.array(self.__toState(None, None, 0.0, 0.0))
+        state = np.tile(nominal, (units, 1))
+
+        # Readings on the rails carry no information
+        rail = 1e-9
+        vMin, vMax = self.__outputLimits()
+        valid = np.isfinite(readings) & np.isfinite(distance) & (readings > vMin + rail) & (readings < vMax - rail)
+        readings = np.where(valid, readings, 0.0)
+        # Ignored points are evaluated at the farthest valid distance of their unit, where the model is well defined
+        farthest = np.max(np.where(valid, distance, -np.inf), axis=1, keepdims=True)
+        distance = np.where(valid, distance, np.where(np.isfinite(farthest), farthest, 1.0))
+        # The gap error can not move any point onto or behind the magnet face
+        minimumGap = -0.5 * np.min(distance, axis=1)
+
+        # Tolerances, scaled like the state, become extra residual rows (nominal - parameter) / tolerance
+        scales = np.array([self.__magnet.getStrengthGauss(), self.__sensor.getSensitivity() * 1000, 1.0, 1.0])
+        priors = [(column, index) for column, index in enumerate(free) if PARAMETERS[index] in self.__tolerances]
+        weights = np.array([scales[index] / self.__tolerances[PARAMETERS[index]] for column, index in priors])
+
+        def evaluate(state):
+            output, derivatives = self.__evaluate(distance, state, jacobian=True)
+            residual = (readings - output) * valid / self.__noise
+            jacobian = derivatives[:, :, free] * valid[:, :, np.newaxis] / self.__noise
+            if priors:
+                indices = [index for column, index in priors]
+                priorResidual = (nominal[indices] - state[:, indices]) * weights
+                priorJacobian = np.zeros((units, len(priors), len(free)))
+                for row, (column, index) in enumerate(priors):
+                    priorJacobian[:, row, column] = weights[row]
+                residual = np.concatenate((residual, priorResidual), axis=1)
+                jacobian = np.concatenate((jacobian, priorJacobian), axis=1)
+            return residual, jacobian, (residual ** 2).sum(axis=1)
+
+        # Levenberg-Marquardt damping per unit, steps that increase the cost are rejected
+        damping = np.full(units, 1e-3)
+        converged = np.zeros(units, dtype=bool)
+        identity = np.eye(len(free))
+        residual, jacobian, cost = evaluate(state)
+
+        for iteration in range(self.__maxIterations):
+            normal = np.einsum("nsi,nsj->nij", jacobian, jacobian)
+            scale = np.einsum("nii->ni", normal)[:, np.newaxis, :] * identity + 1e-30 * identity
+            gradient = np.einsum("nsi,ns->ni", jacobian, residual)
+            step = np.linalg.solve(normal + damping[:, np.newaxis, np.newaxis] * scale, gradient[:, :, np.newaxis])[:, :, 0]
+            step[converged] = 0
+
+            trial = state.copy()
+            trial[:, free] += step
+            # Remanence and sensitivity scales are magnitudes
+            trial[:, :2] = np.abs(trial[:, :2])
+            trial[:, 3] = np.maximum(trial[:, 3], minimumGap)
+            trialResidual, trialJacobian, trialCost = evaluate(trial)
+
+            accept = (trialCost <= cost) & ~converged
+            decrease = cost - trialCost
+            state[accept] = trial[accept]
+            residual[accept], jacobian[accept], cost[accept] = trialResidual[accept], trialJacobian[accept], trialCost[accept]
+            damping = np.where(accept, damping / 10, damping * 10)
+
+            converged |= accept & (decrease <= self.__tolerance * cost)
+            # Rejecting even heavily damped steps means the minimum has been reached
+            converged |= ~accept & (damping > 1e4)
+            if converged.all():
+                break
+
+        used = valid.sum(axis=1)
+        dataCost = ((readings - self.__evaluate(distance, state)) * valid) ** 2
+        rms = np.sqrt(dataCost.sum(axis=1) / np.maximum(used, 1))
+        # A unit needs at least as many unclipped readings as free parameters
+        converged &= used >= len(free)
+        return state, rms, converged
+
+
+def _amplify(amplifier, vIns):
+    # Amplifier output and small signal gain, in float64. Inputs outside the domain of a log amplifier drive the
+    # output to its upper rail, so trial steps of the fit do not raise.
+    import numpy as np
+
+    ampType = amplifier.getType()
+    if ampType == "log" or ampType == "diffLog":
+        edge = amplifier.getDiffVoltage() if ampType == "diffLog" else 0.0
+        inDomain = vIns > edge
+        safe = np.where(inDomain, vIns, edge + 1.0)
+        vMin, vMax = amplifier.getRange()
+        output = np.where(inDomain, np.asarray(amplifier.vOutArray(safe.ravel(), precision="float64"), dtype=float).reshape(safe.shape), vMax)
+        return output, np.where(inDomain, amplifier.gainArray(safe), 0.0)
+    return np.asarray(amplifier.vOutArray(vIns.ravel(), precision="float64"), dtype=float).reshape(vIns.shape), amplifier.gainArray(vIns)
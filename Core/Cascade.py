@@ -0,0 +1,401 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# This file represents signal chains made of several amplifier and filter stages.
+from Core.Amplifier import Amplifier
+from Core.FieldCalculations import calculate1DFieldArray
+import math
+
+
+class LowPassFilter:
+    """
+    Low pass filter representation, first or second order, running at a fixed sample rate.
+
+    Time series are processed in chunks. The filter state is kept between chunks, so a long capture can be processed
+    piece by piece with the same result as processing it at once. Each chunk is evaluated in blocks with matrix
+    products (numpy), the recursion only runs once per block rather than once per sample.
+    """
+    # Samples per block in process()
+    blockSize = 256
+
+    def __init__(self, sampleRate):
+        """
+        Creates a new filter. Configure it with setCutoff or setRC before use.
+
+        :param sampleRate: Sample rate of the signal in Hz
+        :type sampleRate: float
+        """
+        self.__sampleRate = sampleRate
+        # Incremented every time the filter is configured
+        self.__revision = 0
+        self.__order = self.__cutoff = self.__q = None
+        # Normalized transfer function coefficients, numerator b and denominator a
+        self.__b = self.__a = None
+        self.__state = None
+        self.__blocks = None
+
+    def setCutoff(self, cutoff, order=1, q=None):
+        """
+        Configures the filter from its cutoff frequency.
+        First order filters match an RC filter exactly at the sample points. Second order filters are a bilinear
+        transform of an analog second order low pass, prewarped to the cutoff.
+
+        :param cutoff: Cutoff (-3dB for first order and Butterworth) frequency in Hz
+        :type cutoff: float
+        :param order: 1 or 2
+        :type order: int
+        :param q: Quality factor of a second order filter, defaults to Butterworth (0.707)
+        :type q: float
+        :return: None
+        :raises ValueError: If the order is not 1 or 2, or the cutoff is not below half the sample rate.
+        """
+        if order not in (1, 2):
+            raise ValueError("Only first and second order filters are supported.")
+        if not 0 < cutoff < self.__sampleRate / 2:
+            raise ValueError("Cutoff must be above zero and below half the sample rate.")
+
+        if order == 1:
+            decay = math.exp(-2 * math.pi * cutoff / self.__sampleRate)
+            b = [1 - decay]
+            a = [1, -decay]
+        else:
+            if q is None:
+                q = 1 / math.sqrt(2)
+            w0 = 2 * math.pi * cutoff / self.__sampleRate
+            alpha = math.sin(w0) / (2 * q)
+            cos = math.cos(w0)
+            a0 = 1 + alpha
+            b = [(1 - cos) / 2 / a0, (1 - cos) / a0, (1 - cos) / 2 / a0]
+            a = [1, -2 * cos / a0, (1 - alpha) / a0]
+
+        self.__revision += 1
+        self.__order = order
+        self.__cutoff = cutoff
+        self.__q = q
+        self.__b = b
+        self.__a = a
+        self.__blocks = None
+        self.reset()
+
+    def setRC(self, r, c, order=1):
+        """
+        Configures the filter from resistor and capacitor values. The cutoff is 1 / (2 pi R C).
+        A second order RC filter is modeled as a unity gain Sallen-Key stage with equal resistors and capacitors (Q = 0.5).
+
+        :param r: Resistance in Ohms
+        :type r: float
+        :param c: Capacitance in Farads
+        :type c: float
+        :param order: 1 or 2
+        :type order: int
+        :return: None
+        """
+        self.setCutoff(1 / (2 * math.pi * r * c), order=order, q=0.5 if order == 2 else None)
+
+    def getCutoff(self):
+        """
+        Gets the cutoff frequency of the filter.
+
+        :return: cutoff in Hz
+        :rtype: float
+        :raises AttributeError: If the filter is not configured.
+        """
+        self.__checkConfigured()
+        return self.__cutoff
+
+    def getOrder(self):
+        """
+        Gets the order of the filter.
+
+        :return: 1 or 2
+        :rtype: int
+        :raises AttributeError: If the filter is not configured.
+        """
+        self.__checkConfigured()
+        return self.__order
+
+    def getRevision(self):
+        """
+        Gets the revision of the configuration. It increases every time the filter is configured.
+
+        :return: revision
+        :rtype: int
+        """
+        return self.__revision
+
+    def getSampleRate(self):
+        """
+        Gets the sample rate the filter runs at.
+
+        :return: sample rate in Hz
+        :rtype: float
+        """
+        return self.__sampleRate
+
+    def getCoefficients(self):
+        """
+        Gets the transfer function coefficients, normalized so a[0] is 1.
+
+        :return: numerator b, denominator a
+        :rtype: tuple[list[float], list[float]]
+        :raises AttributeError: If the filter is not configured.
+        """
+        self.__checkConfigured()
+        return list(self.__b), list(self.__a)
+
+    def dcGain(self):
+        """
+        Gets the gain of the filter for a constant input.
+
+        :return: DC gain in Volts/Volt
+        :rtype: float
+        """
+        self.__checkConfigured()
+        return sum(self.__b) / sum(self.__a)
+
+    def vOut(self, vIn):
+        """
+        Calculates the settled output for a constant input voltage, so filters can be used in static sweeps.
+
+        :param vIn: Input voltage
+        :type vIn: float
+        :return: Output voltage
+        :rtype: float
+        """
+        return vIn * self.dcGain()
+
+    def reset(self, vIn=0.0):
+        """
+        Resets the filter as if the input had been held at vIn forever.
+
+        :param vIn: Settled input voltage
+        :type vIn: float
+        :return: None
+        """
+        self.__checkConfigured()
+        # In the controllable canonical form used here every state element settles to u / sum(a)
+        self.__state = [vIn / sum(self.__a)] * (len(self.__a) - 1)
+
+    def process(self, chunk):
+        """
+        Filters the next chunk of a time series. Requires numpy.
+
+        :param chunk: Input samples
+        :type chunk: array_like
+        :return: Output samples
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        self.__checkConfigured()
+        u = np.asarray(chunk, dtype=float).ravel()
+        if self.__blocks is None:
+            self.__blocks = self.__buildBlocks(np)
+        transfer, observe, update, inputToState, powers = self.__blocks
+        length = self.blockSize
+        state = np.asarray(self.__state, dtype=float)
+        output = np.empty(u.shape[0])
+
+        # Full blocks: every block input contributes to the next state through inputToState, only the small state
+        # recursion runs in python.
+        blocks = u.shape[0] // length
+        if blocks:
+            inputs = u[:blocks * length].reshape(blocks, length)
+            stateInputs = inputs @ inputToState.T
+            states = np.empty((blocks, state.shape[0]))
+            for index in range(blocks):
+                states[index] = state
+                state = update @ state + stateInputs[index]
+            output[:blocks * length] = (inputs @ transfer.T + states @ observe.T).ravel()
+
+        # Remaining samples use the leading part of the block matrices
+        remaining = u.shape[0] - blocks * length
+        if remaining:
+            tail = u[blocks * length:]
+            output[blocks * length:] = transfer[:remaining, :remaining] @ tail + observe[:remaining] @ state
+            state = powers[remaining] @ state + inputToState[:, length - remaining:] @ tail
+
+        self.__state = state.tolist()
+        return output
+
+    def __buildBlocks(self, np):
+        # State space form of the transfer function (controllable canonical form)
+        b = np.zeros(len(self.__a))
+        b[:len(self.__b)] = self.__b
+        a = np.asarray(self.__a, dtype=float)
+        order = len(a) - 1
+        A = np.zeros((order, order))
+        A[0] = -a[1:]
+        A[1:, :-1] = np.eye(order - 1)
+        B = np.zeros(order)
+        B[0] = 1
+        C = b[1:] - a[1:] * b[0]
+        D = b[0]
+
+        length = self.blockSize
+        powers = [np.eye(order)]
+        for index in range(length):
+            powers.append(A @ powers[-1])
+
+        # Response of each block output to the state at the start of the block
+        observe = np.array([C @ powers[k] for k in range(length)])
+        # Response of each block output to each block input
+        impulse = np.concatenate(([D], [C @ powers[k] @ B for k in range(length - 1)]))
+        rows, columns = np.indices((length, length))
+        transfer = np.where(rows >= columns, impulse[np.clip(rows - columns, 0, None)], 0.0)
+        # Contribution of each block input to the state after the block
+        inputToState = np.array([powers[length - 1 - j] @ B for j in range(length)]).T
+        return transfer, observe, powers[length], inputToState, powers
+
+    def __checkConfigured(self):
+        if self.__b is None:
+            raise AttributeError("Filter not configured. Please call setCutoff or setRC first.")
+
+
+class Cascade:
+    """
+    Signal chain made of amplifier and filter stages, evaluated in the order they were added.
+
+    vOut evaluates the settled (DC) response, so a cascade can be used anywhere an Amplifier is used, for example in
+    sweepAmplifiedSensors. process evaluates a time series in chunks, carrying filter state between chunks.
+    """
+    def __init__(self, stages=None):
+        """
+        Creates a new cascade, optionally from a list of stages.
+
+        :param stages: Amplifier and LowPassFilter stages, input first
+        :type stages: list
+        """
+        self.__stages = []
+        self.__revision = 0
+        for stage in stages or []:
+            self.addStage(stage)
+
+    def addStage(self, stage):
+        """
+        Adds a stage to the output end of the cascade.
+
+        :param stage: Amplifier, LowPassFilter or Cascade
+        :return: None
+        :raises ValueError: If the stage is not a supported type.
+        """
+        if not isinstance(stage, (Amplifier, LowPassFilter, Cascade)):
+            raise ValueError("Stage must be an Amplifier, LowPassFilter or Cascade instance.")
+        self.__revision += 1
+        self.__stages.append(stage)
+
+    def getStages(self):
+        """
+        Gets the stages, input first.
+
+        :return: stages
+        :rtype: list
+        """
+        return list(self.__stages)
+
+    def getRevision(self):
+        """
+        Gets the revision of the cascade. It increases when a stage is added or any stage is reconfigured.
+
+        :return: revision
+        :rtype: int
+        """
+        return self.__revision + sum(stage.getRevision() for stage in self.__stages)
+
+    def vOut(self, vIn):
+        """
+        Calculates the settled output voltage for a constant input voltage.
+
+        :param vIn: Input voltage
+        :type vIn: float
+        :return: Output voltage
+        :rtype: float
+        """
+        for stage in self.__stages:
+            vIn = stage.vOut(vIn)
+        return vIn
+
+    def vOutArray(self, vIns, backend=None, precision=None):
+        """
+        Calculates the settled output voltage for a sequence of constant input voltages.
+
+        :param vIns: Input voltages
+        :type vIns: array_like
+        :param backend: Backend to use instead of the selected backend.
+        :type backend: Backends.Backend
+        :param precision: "float64" or "float32", defaults to Backends.getPrecision()
+        :type precision: string
+        :return: Output voltages
+        :rtype: numpy.ndarray, or list with the python backend
+        """
+        for stage in self.__stages:
+            if isinstance(stage, LowPassFilter):
+                gain = stage.dcGain()
+                vIns = vIns * gain if hasattr(vIns, "shape") else [vIn * gain for vIn in vIns]
+            else:
+                vIns = stage.vOutArray(vIns, backend, precision)
+        return vIns
+
+    def process(self, chunk):
+        """
+        Runs the next chunk of a time series through every stage. Requires numpy.
+
+        :param chunk: Input samples
+        :type chunk: array_like
+        :return: Output samples
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        signal = np.asarray(chunk, dtype=float).ravel()
+        for stage in self.__stages:
+            if isinstance(stage, Amplifier):
+                signal = np.asarray(stage.vOutArray(signal), dtype=float)
+            else:
+                signal = stage.process(signal)
+        return signal
+
+    def processStream(self, chunks):
+        """
+        Runs a stream of chunks through the cascade, such as the blocks of a long capture.
+
+        :param chunks: Iterable of input chunks
+        :type chunks: iterable
+        :return: generator of output chunks
+        """
+        for chunk in chunks:
+            yield self.process(chunk)
+
+    def reset(self, vIn=0.0):
+        """
+        Resets every filter as if the cascade input had been held at vIn forever.
+
+        :param vIn: Settled input voltage
+        :type vIn: float
+        :return: None
+        """
+        for stage in self.__stages:
+            if isinstance(stage, (LowPassFilter, Cascade)):
+                stage.reset(vIn)
+            vIn = stage.vOut(vIn)
+
+
+def streamAmplifiedSensor(magnet, sensor, cascade, distanceChunks):
+    """
+    Simulates a sensor and cascade over a time series of magnet distances, chunk by chunk.
+    Memory use depends on the chunk size only, so arbitrarily long captures can be processed.
+
+    :param magnet: Magnet to simulate.
+    :type magnet: Magnet
+    :param sensor: Sensor to simulate.
+    :type sensor: HallSensor
+    :param cascade: Signal chain after the sensor.
+    :type cascade: Cascade
+    :param distanceChunks: Iterable of distance chunks, one distance per sample.
+    :type distanceChunks: iterable
+    :return: generator of cascade output chunks
+    """
+    import numpy as np
+
+    for distances in distanceChunks:
+        field = np.asarray(calculate1DFieldArray(magnet, distances), dtype=float) * 1000
+        yield cascade.process(np.asarray(sensor.voltageArray(field), dtype=float))
@@ -3,7 +3,25 @@
 from Core.Magnet import Magnet
 from Core.HallSensor import HallSensor
 from Core.Amplifier import Amplifier
-import math
+from Core.HallSwitch import HallSwitch
+from Core import Backends
+
+
+def _checkMagnet(magnet):
+    if not isinstance(magnet, Magnet):
+        raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+    # The on-axis field of a diametric magnet has no axial component, use FieldCalculations3D instead
+    if magnet.getMagnetization() != "axial":
+        raise NotImplementedError("1D field calculations require an axially magnetized magnet. Use FieldCalculations3D for diametric magnets.")
+
+
+def _roundSweep(precision, distance, strength, voltages):
+    # The sweeps calculate with the float64 reference math. In float32 the results are rounded, like the array backends.
+    if precision == "float64":
+        return distance, strength, voltages
+    import numpy as np
+    return (np.asarray(distance, dtype=precision), np.asarray(strength, dtype=precision),
+            np.asarray(voltages, dtype=precision).reshape(len(voltages), len(distance)))
 
 
 def calculate1DField(magnet, distance):
@@ -19,39 +37,54 @@ def calculate1DField(magnet, distance):
     """
 
     # Type check that the magnet is a Magnet.py instance
-    if not isinstance(magnet, Magnet):
-        raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+    _checkMagnet(magnet)
 
-    # Determine magnet shape
-    if magnet.shape() == "cylinder":
-        diameter, thickness = magnet.getCylinderSize()
-        radius = diameter / 2
-        # Calculate field strength, B
-        B = (magnet.getStrengthMT() / 2) * (((thickness + distance) / math.sqrt(radius ** 2 + (thickness + distance) ** 2)) - (distance / math.sqrt(radius ** 2 + distance ** 2)))
-
-    elif magnet.shape() == "cubic":
-        length, width, thickness = magnet.getCubicSize()
-        B = (magnet.getStrengthMT() / math.pi) * \
-            (math.atan((length * width) / (2 * distance * math.sqrt(4 * distance ** 2 + length ** 2 + width ** 2)))
-             - math.atan((length * width) / (2 * (thickness + distance) * math.sqrt(4 * (thickness + distance) ** 2 + length ** 2 + width ** 2))))
-
-    elif magnet.shape() == "ring":
-        diameter, iDiameter, thickness = magnet.getRingSize()
-        outerRadius = diameter / 2
-        innerRadius = iDiameter / 2
-        B = (magnet.getStrengthMT() / 2) * (((thickness + distance)/(math.sqrt(outerRadius ** 2 + (thickness + distance) ** 2))) -
-                                            (distance / (math.sqrt(outerRadius ** 2 + distance ** 2))) -
-                                            (((thickness + distance) / (math.sqrt(innerRadius ** 2 + (thickness + distance) ** 2))) -
-                                             (distance / (math.sqrt(innerRadius ** 2 + distance ** 2)))))
-    elif magnet.shape() == "sphere":
-        diameter = magnet.getSphereSize()
-        radius = diameter / 2
-        B = magnet.getStrengthMT() * (2 / 3) * ((radius ** 3) / ((radius + distance) ** 3))
-
-    else:
-        raise NotImplementedError("Type of magnet not recognized for this field calculation. Double check the type of magnet is set.")
     # The equations used to calculate the field can be found at: https://www.supermagnete.de/eng/faq/How-do-you-calculate-the-magnetic-flux-density
-    return B
+    return Backends.field1D(magnet.shape(), Backends.magnetDimensions(magnet), magnet.getStrengthMT(), distance)
+
+
+def calculate1DFieldArray(magnet, distances, backend=None, precision=None):
+    """
+    Calculates the magnetic field strength at a sequence of distances away from a magnet.
+    Uses the same equations as calculate1DField, evaluated by the selected compute backend (see Backends.py).
+
+    :param magnet: Magnet to simulate
+    :type magnet: Magnet
+    :param distances: Distances between magnet and points.
+    :type distances: array_like
+    :param backend: Backend to use instead of the selected backend.
+    :type backend: Backends.Backend
+    :param precision: "float64" or "float32", defaults to Backends.getPrecision()
+    :type precision: string
+    :return: Field density in T (multiply by 1000 for mT)
+    :rtype: numpy.ndarray, or list with the python backend
+    """
+    _checkMagnet(magnet)
+    if backend is None:
+        backend = Backends.getBackend()
+    return backend.field1D(magnet.shape(), Backends.magnetDimensions(magnet), magnet.getStrengthMT(), distances, precision)
+
+
+def calculate1DFieldSlope(magnet, distances, backend=None, precision=None):
+    """
+    Calculates the derivative of the field strength with respect to distance, dB/dd, for a sequence of distances.
+    These are the analytic derivatives of the equations used by calculate1DField.
+
+    :param magnet: Magnet to simulate
+    :type magnet: Magnet
+    :param distances: Distances between magnet and points.
+    :type distances: array_like
+    :param backend: Backend to use instead of the selected backend.
+    :type backend: Backends.Backend
+    :param precision: "float64" or "float32", defaults to Backends.getPrecision()
+    :type precision: string
+    :return: Field slope in T per unit distance
+    :rtype: numpy.ndarray, or list with the python backend
+    """
+    _checkMagnet(magnet)
+    if backend is None:
+        backend = Backends.getBackend()
+    return backend.field1DSlope(magnet.shape(), Backends.magnetDimensions(magnet), magnet.getStrengthMT(), distances, precision)
 
 
 def calculateVoltage1D(magnet, sensor, distance):
@@ -128,9 +161,10 @@ def sweepSensor(magnet, startDistance, endDistance, sensor):
     return distance, strength, voltage
 
 
-def sweepSensors(magnet, startDistance, endDistance, sensors):
+def sweepSensors(magnet, startDistance, endDistance, sensors, precision=None):
     """
     Runs a sweep simulation of a magnet and set of sensors.
+    Results are calculated in float64. With float32 precision they are returned as float32 numpy arrays.
 
     :param magnet: Magnet to simulate.
     :type magnet: Magnet
@@ -140,9 +174,14 @@ def sweepSensors(magnet, startDistance, endDistance, sensors):
     :type endDistance: float
     :param sensors: List of sensors to simulate
     :type sensors: list[HallSensor]
+    :param precision: "float64" or "float32", defaults to Backends.getPrecision()
+    :type precision: string
     :return: List of distance values (x-axis), list of field strength, list of list of sensor voltage.
+        numpy arrays (one row of voltages per sensor) in float32.
     :rtype: tuple[list[float], list[float], list[list[float]]]
+    :raises ValueError: If the precision is not valid.
     """
+    precision = Backends._dtype(precision)
 
     voltages = []
     # The voltages array must have the correct number of lists in it based on the number of sensors
@@ -162,7 +201,7 @@ def sweepSensors(magnet, startDistance, endDistance, sensors):
         for sensorIndex in range(0, len(sensors)):
             voltages[sensorIndex].append(sensors[sensorIndex].voltage(field))
 
-    return distance, strength, voltages
+    return _roundSweep(precision, distance, strength, voltages)
 
 
 def sweepAmplifiedSensor(magnet, startDistance, endDistance, sensor, amplifier):
@@ -177,7 +216,7 @@ def sweepAmplifiedSensor(magnet, startDistance, endDistance, sensor, amplifier):
     :type endDistance: float
     :param sensor: Sensors to simulate
     :type sensor: HallSensor
-    :param amplifier: Amplifiers to simulate
+    :param amplifier: Amplifiers to simulate, or a Cascade of stages (evaluated at steady state)
     :type amplifier: Amplifier
     :return: List of distance values (x-axis), list of field strength, list of sensor voltages.
     :rtype: tuple[list[float], list[float], list[float]]
@@ -198,9 +237,10 @@ def sweepAmplifiedSensor(magnet, startDistance, endDistance, sensor, amplifier):
     return distance, strength, voltage
 
 
-def sweepAmplifiedSensors(magnet, startDistance, endDistance, sensors, amplifiers):
+def sweepAmplifiedSensors(magnet, startDistance, endDistance, sensors, amplifiers, precision=None):
     """
     Runs a sweep simulation of a set of sensors, each connected to a unique amplifier.
+    Results are calculated in float64. With float32 precision they are returned as float32 numpy arrays.
 
     :param magnet: Magnet to simulate.
     :type magnet: Magnet
@@ -210,11 +250,16 @@ def sweepAmplifiedSensors(magnet, startDistance, endDistance, sensors, amplifier
     :type endDistance: float
     :param sensors: List of sensors to simulate
     :type sensors: list[HallSensor]
-    :param amplifiers: List of amplifiers to simulate
+    :param amplifiers: List of amplifiers to simulate, each may also be a Cascade of stages (evaluated at steady state)
     :type amplifiers: list[Amplifier]
+    :param precision: "float64" or "float32", defaults to Backends.getPrecision()
+    :type precision: string
     :return: List of distance values (x-axis), list of field strength, list of list of sensor voltages.
+        numpy arrays (one row of voltages per sensor) in float32.
     :rtype: tuple[list[float], list[float], list[list[float]]]
+    :raises ValueError: If the precision is not valid.
     """
+    precision = Backends._dtype(precision)
 
     voltages = []
     # The voltages array must have the correct number of lists in it based on the number of sensors
@@ -234,4 +279,50 @@ def sweepAmplifiedSensors(magnet, startDistance, endDistance, sensors, amplifier
         for sensorIndex in range(0, len(sensors)):
             voltages[sensorIndex].append(amplifiers[sensorIndex].vOut(sensors[sensorIndex].voltage(field)))
 
-    return distance, strength, voltages
\ No newline at end of file
+    return _roundSweep(precision, distance, strength, voltages)
+
+
+def sweepSwitch(magnet, startDistance, endDistance, switch, step=0.1, speed=None):
+    """
+    Runs a bidirectional sweep of a hall effect switch or latch: the magnet approaches from endDistance to
+    startDistance, then retreats back to endDistance. Switching points are found on both legs, so the hysteresis is
+    visible. Requires numpy.
+
+    If a speed is given, the sweep is sampled in time (one sample per step) and the output is delayed by the response
+    time of the switch, which shifts the switching points at speed.
+
+    :param magnet: Magnet to simulate.
+    :type magnet: Magnet
+    :param startDistance: Closest distance
+    :type startDistance: float
+    :param endDistance: Farthest distance
+    :type endDistance: float
+    :param switch: Switch to simulate. It is reset before the sweep.
+    :type switch: HallSwitch
+    :param step: Distance between samples
+    :type step: float
+    :param speed: Speed of the magnet in distance units per second, None for a quasi-static sweep
+    :type speed: float
+    :return: distance, field strength in mT, switch voltage, and the switching points as (distance, operated) pairs
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, list[tuple[float, bool]]]
+    """
+    import numpy as np
+
+    if not isinstance(switch, HallSwitch):
+        raise ValueError("Switch provided is not a valid HallSwitch.py instance.")
+
+    approach = np.arange(endDistance, startDistance, -step)
+    distance = np.concatenate((approach, approach[::-1]))
+    strength = np.asarray(calculate1DFieldArray(magnet, distance), dtype=float) * 1000
+
+    switch.reset()
+    sampleRate = speed / step if speed is not None else None
+    states = switch.statesArray(strength, sampleRate)
+    vOperate, vRelease = switch.getOutput()
+    voltage = np.where(states, vOperate, vRelease)
+
+    # The output changed at every index where the state differs from the previous sample
+    changes = np.flatnonzero(np.diff(states.astype(np.int8))) + 1
+    switchPoints = [(float(distance[index]), bool(states[index])) for index in changes]
+    return distance, strength, voltage, switchPoints
+
@@ -0,0 +1,346 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# 3D field calculations, for points off the magnet axis and for diametrically magnetized magnets.
+#
+# Coordinates are in the same units as the magnet size. The magnet axis is z, the top face of the magnet is at z = 0
+# and the magnet extends down to z = -thickness, so a point at (0, 0, d) is at distance d in calculate1DField.
+# Diametric magnets are magnetized along +x.
+#
+# Closed form fields are used where they exist:
+#   axial cylinders and rings - equivalent solenoid, Derby & Olbert, "Cylindrical magnets and ideal solenoids" (2010)
+#   cubics (axial or diametric) - analytic integral of the surface charge over each rectangular face
+#   spheres - exact dipole field
+# Diametric cylinders and rings integrate the magnetic surface charge (M . n on the curved surfaces) with
+# Gauss-Legendre quadrature. Their accuracy is best for points a few quadrature spacings away from the surface.
+# Fields are only valid outside of the magnet.
+from Core.Magnet import Magnet
+from Core.Hall3DSensor import Hall3DSensor
+import math
+
+# Quadrature nodes: around the circumference, and across each radius, height or side
+AROUND = 96
+ACROSS = 32
+
+# Points evaluated together, bounds the memory used by the quadrature
+_CHUNK_ELEMENTS = 1 << 21
+
+
+def _surfaceCharges(magnet):
+    # Quadrature nodes on the charged surfaces of the magnet, and the charge times area of each node
+    import numpy as np
+
+    shape = magnet.shape()
+    diametric = magnet.getMagnetization() == "diametric"
+    radial, radialWeights = np.polynomial.legendre.leggauss(ACROSS)
+    around = (np.arange(AROUND) + 0.5) * 2 * math.pi / AROUND
+    step = 2 * math.pi / AROUND
+    nodes, charges = [], []
+
+    def interval(low, high):
+        # Gauss-Legendre nodes and weights mapped to [low, high]
+        return (radial + 1) * (high - low) / 2 + low, radialWeights * (high - low) / 2
+
+    if shape in ("cylinder", "ring"):
+        if shape == "cylinder":
+            diameter, thickness = magnet.getCylinderSize()
+            inner = 0.0
+        else:
+            diameter, iDiameter, thickness = magnet.getRingSize()
+            inner = iDiameter / 2
+        outer = diameter / 2
+
+        if diametric:
+            # Curved surfaces carry cos(phi), negative on the inner surface of a ring where the normal points inward
+            z, zWeights = interval(-thickness, 0)
+            phi, height = np.meshgrid(around, z, indexing="ij")
+            weight = np.outer(np.ones(AROUND), zWeights) * np.cos(phi) * step
+            for radius, sign in ((outer, 1), (inner, -1)):
+                if radius > 0:
+                    nodes.append(np.stack((radius * np.cos(phi), radius * np.sin(phi), height), axis=-1).reshape(-1, 3))
+                    charges.append((sign * radius * weight).ravel())
+        else:
+            # Top face is positive, bottom face negative
+            r, rWeights = interval(inner, outer)
+            phi, radius = np.meshgrid(around, r, indexing="ij")
+            weight = (np.outer(np.ones(AROUND), rWeights) * radius * step).ravel()
+            for height, sign in ((0.0, 1), (-thickness, -1)):
+                nodes.append(np.stack((radius * np.cos(phi), radius * np.sin(phi), np.full(phi.shape, height)), axis=-1).reshape(-1, 3))
+                charges.append(sign * weight)
+
+    elif shape == "cubic":
+        length, width, thickness = magnet.getCubicSize()
+        if diametric:
+            # Faces at x = +-length / 2
+            y, yWeights = interval(-width / 2, width / 2)
+            z, zWeights = interval(-thickness, 0)
+            first, second = np.meshgrid(y, z, indexing="ij")
+            weight = np.outer(yWeights, zWeights).ravel()
+            for x, sign in ((length / 2, 1), (-length / 2, -1)):
+                nodes.append(np.stack((np.full(first.shape, x), first, second), axis=-1).reshape(-1, 3))
+                charges.append(sign * weight)
+        else:
+            x, xWeights = interval(-length / 2, length / 2)
+            y, yWeights = interval(-width / 2, width / 2)
+            first, second = np.meshgrid(x, y, indexing="ij")
+            weight = np.outer(xWeights, yWeights).ravel()
+            for height, sign in ((0.0, 1), (-thickness, -1)):
+                nodes.append(np.stack((first, second, np.full(first.shape, height)), axis=-1).reshape(-1, 3))
+                charges.append(sign * weight)
+    else:
+        raise NotImplementedError("Type of magnet not recognized for this field calculation. Double check the type of magnet is set.")
+
+    return np.concatenate(nodes), np.concatenate(charges)
+
+
+def _cel(kc, p, c, s):
+    # Bulirsch's generalized complete elliptic integral, vectorized (algorithm as given by Derby & Olbert)
+    import numpy as np
+
+    # Points on an edge of the magnet (p = 0 and kc = 0), where the field is infinite, give a result that is not
+    # finite. They are expected in field maps, so they do not warn.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.abs(kc)
+        positive = p > 0
+        # p > 0 branch
+        safeP = np.where(positive, p, 1.0)
+        pp = np.sqrt(safeP)
+        ss = s / pp
+        cc = np.broadcast_to(c, pp.shape).astype(float)
+        # p <= 0 branch, evaluated with p = 0 where p is positive so it does not divide by 1 - p = 0
+        if not np.all(positive):
+            negativeP = np.where(positive, 0.0, p)
+            f = kc * kc
+            q = (1 - f) * (s - c * negativeP)
+            g = 1 - negativeP
+            negativePP = np.sqrt((f - negativeP) / g)
+            negativeCC = (c - s) / g
+            negativeSS = -q / (g * g * negativePP) + negativeCC * negativePP
+            pp = np.where(positive, pp, negativePP)
+            cc = np.where(positive, cc, negativeCC)
+            ss = np.where(positive, ss, negativeSS)
+
+        em = np.ones(k.shape)
+        f = cc
+        cc = cc + ss / pp
+        g = k / pp
+        ss = 2 * (ss + f * g)
+        pp = g + pp
+        g = em
+        em = k + em
+        kk = k
+        for iteration in range(50):
+            # Points that are not finite never converge, and are left out of the test
+            if np.all((np.abs(g - k) <= g * 1e-14) | ~np.isfinite(pp)):
+                break
+            k = 2 * np.sqrt(kk)
+            kk = k * em
+            f = cc
+            cc = cc + ss / pp
+            g = kk / pp
+            ss = 2 * (ss + f * g)
+            pp = g + pp
+            g = em
+            em = k + em
+        return (math.pi / 2) * (ss + cc * em) / (em * (em + pp))
+
+
+def _solenoidField(radius, halfLength, rho, z):
+    # Field of an ideal solenoid (axial cylinder) centered at the origin, per unit remanence, in cylindrical components
+    import numpy as np
+
+    gamma = (radius - rho) / (radius + rho)
+    bRho = np.zeros(rho.shape)
+    bZ = np.zeros(rho.shape)
+    for sign, zEnd in ((1, z + halfLength), (-1, z - halfLength)):
+        root = np.sqrt(zEnd ** 2 + (radius + rho) ** 2)
+        alpha = radius / root
+        beta = zEnd / root
+        kc = np.sqrt((zEnd ** 2 + (radius - rho) ** 2) / (zEnd ** 2 + (radius + rho) ** 2))
+        bRho += sign * alpha * _cel(kc, 1.0, 1.0, -1.0)
+        bZ += sign * beta * _cel(kc, gamma ** 2, 1.0, gamma)
+    return bRho / math.pi, bZ * radius / ((radius + rho) * math.pi)
+
+
+def _rectangleField(u1, u2, v1, v2, w):
+    # Field of a unit surface charge on a rectangle in the plane w = 0, times 4 pi. u1, u2, v1 and v2 are the offsets
+    # of the points from the low and high edges of the rectangle along u and v, w is the offset from the plane.
+    import numpy as np
+
+    fieldU = fieldV = fieldW = 0.0
+    for u, uSign in ((u1, 1), (u2, -1)):
+        for v, vSign in ((v1, 1), (v2, -1)):
+            sign = uSign * vSign
+            distance = np.sqrt(u ** 2 + v ** 2 + w ** 2)
+            fieldW = fieldW + sign * np.arctan2(u * v, w * distance)
+            # log(v + R) without cancellation when v is negative. np.where evaluates both forms, the unused one
+            # divides by zero on the lines through the edges of the rectangle.
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fieldU = fieldU - sign * np.where(v >= 0, np.log(v + distance), np.log((u ** 2 + w ** 2) / (distance - v)))
+                fieldV = fieldV - sign * np.where(u >= 0, np.log(u + distance), np.log((v ** 2 + w ** 2) / (distance - u)))
+    return fieldU, fieldV, fieldW
+
+
+def calculate3DField(magnet, points):
+    """
+    Calculates the magnetic field vector at points around a magnet. Requires numpy.
+
+    :param magnet: Magnet to simulate, axial or diametric
+    :type magnet: Magnet
+    :param points: Points outside of the magnet, with x, y and z in the last dimension, shape (..., 3)
+    :type points: array_like
+    :return: Field density in T, with x, y and z in the last dimension
+    :rtype: numpy.ndarray
+    """
+    import numpy as np
+
+    if not isinstance(magnet, Magnet):
+        raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+    points = np.asarray(points, dtype=float)
+    flat = points.reshape(-1, 3)
+    x, y, z = flat[:, 0], flat[:, 1], flat[:, 2]
+    strength = magnet.getStrengthMT()
+    shape = magnet.shape()
+    diametric = magnet.getMagnetization() == "diametric"
+    field = np.empty(flat.shape)
+
+    if shape == "sphere":
+        # Exact dipole field outside of a uniformly magnetized sphere
+        radius = magnet.getSphereSize() / 2
+        moment = np.array([1.0, 0, 0]) if diametric else np.array([0, 0, 1.0])
+        offset = flat - np.array([0, 0, -radius])
+        distance = np.linalg.norm(offset, axis=1)[:, np.newaxis]
+        unit = offset / distance
+        field[:] = (strength / 3) * radius ** 3 * (3 * (unit @ moment)[:, np.newaxis] * unit - moment) / distance ** 3
+
+    elif shape == "cubic":
+        length, width, thickness = magnet.getCubicSize()
+        field[:] = 0
+        # Charged faces lie across the magnetization: z faces for axial magnets, x faces for diametric magnets
+        if diametric:
+            for position, sign in ((length / 2, 1), (-length / 2, -1)):
+                # Local axes of the face are u = y, v = z and w = x
+                fieldU, fieldV, fieldW = _rectangleField(y + width / 2, y - width / 2, z + thickness, z, _offPlane(x - position))
+                field += sign * np.stack((fieldW, fieldU, fieldV), axis=1)
+        else:
+            for position, sign in ((0.0, 1), (-thickness, -1)):
+                fieldU, fieldV, fieldW = _rectangleField(x + length / 2, x - length / 2, y + width / 2, y - width / 2, _offPlane(z - position))
+                field += sign * np.stack((fieldU, fieldV, fieldW), axis=1)
+        field *= strength / (4 * math.pi)
+
+    elif not diametric and shape in ("cylinder", "ring"):
+        if shape == "cylinder":
+            diameter, thickness = magnet.getCylinderSize()
+            radii = ((diameter / 2, 1),)
+        else:
+            diameter, iDiameter, thickness = magnet.getRingSize()
+            # A ring is the outer solenoid minus the inner solenoid
+            radii = ((diameter / 2, 1), (iDiameter / 2, -1))
+        rho = np.hypot(x, y)
+        bRho = bZ = 0.0
+        for radius, sign in radii:
+            partRho, partZ = _solenoidField(radius, thickness / 2, rho, z + thickness / 2)
+            bRho = bRho + sign * partRho
+            bZ = bZ + sign * partZ
+        # Radial direction, taken as x on the axis where it is undefined
+        safe = np.where(rho > 0, rho, 1.0)
+        field[:, 0] = strength * bRho * np.where(rho > 0, x / safe, 1.0)
+        field[:, 1] = strength * bRho * np.where(rho > 0, y / safe, 0.0)
+        field[:, 2] = strength * bZ
+
+    else:
+        nodes, charges = _surfaceCharges(magnet)
+        chunk = max(1, _CHUNK_ELEMENTS // nodes.shape[0])
+        for start in range(0, flat.shape[0], chunk):
+            offset = flat[start:start + chunk, np.newaxis, :] - nodes[np.newaxis, :, :]
+            inverse = np.sum(offset ** 2, axis=2) ** -1.5
+            field[start:start + chunk] = np.einsum("pk,pkc->pc", inverse * charges, offset)
+        field *= strength / (4 * math.pi)
+
+    return field.reshape(points.shape)
+
+
+def _offPlane(w):
+    # Points exactly in the plane of a face are moved off it by a negligible amount, the field is continuous there
+    # outside of the face, but the analytic expressions are not defined
+    import numpy as np
+    return np.where(w == 0, 1e-12, w)
+
+
+def sweepAngle(magnet, sensor, angles, airGaps, misalignments=((0, 0),), removeOffset=True):
+    """
+    Runs a rotary sweep: the magnet spins about its axis above a 3 axis sensor, for every combination of angle,
+    air gap and sensor misalignment. Returns the field components seen by the sensor and the error of the angle
+    decoded with atan2. Requires numpy.
+
+    Cylinders, rings and spheres are symmetric about their axis, so the field of a diametric magnet varies with
+    cos and sin of the angle. The quadrature only runs twice per air gap and misalignment, and every angle is
+    evaluated with array arithmetic. Cubic magnets are evaluated at every point.
+
+    :param magnet: Magnet to simulate, normally diametric
+    :type magnet: Magnet
+    :param sensor: Sensor to simulate
+    :type sensor: Hall3DSensor
+    :param angles: Mechanical angles of the magnet in degrees
+    :type angles: array_like
+    :param airGaps: Distances between the top face of the magnet and the sensor
+    :type airGaps: array_like
+    :param misalignments: (x, y) offsets of the sensor from the rotation axis
+    :type misalignments: array_like
+    :param removeOffset: Remove the mean angle error of each curve, as a zero position calibration would
+    :type removeOffset: bool
+    :return: bx, by, bz in mT and angle error in degrees, each with shape (air gaps, misalignments, angles)
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    import numpy as np
+
+    if not isinstance(sensor, Hall3DSensor):
+        raise ValueError("Sensor provided is not a valid Hall3DSensor.py instance.")
+    angle = np.radians(np.asarray(angles, dtype=float).ravel())
+    gaps = np.asarray(airGaps, dtype=float).ravel()
+    offsets = np.asarray(misalignments, dtype=float).reshape(-1, 2)
+
+    # Sensor position in cylindrical coordinates, for every air gap and misalignment
+    radius = np.broadcast_to(np.hypot(offsets[:, 0], offsets[:, 1])[np.newaxis, :], (gaps.shape[0], offsets.shape[0]))
+    azimuth = np.arctan2(offsets[:, 1], offsets[:, 0])[np.newaxis, :, np.newaxis]
+    height = np.broadcast_to(gaps[:, np.newaxis], radius.shape)
+
+    if magnet.shape() in ("cylinder", "ring", "sphere"):
+        # Field of the unrotated magnet at azimuth 0 and 90 degrees gives the radial, tangential and axial harmonics
+        zero = calculate3DField(magnet, np.stack((radius, np.zeros(radius.shape), height), axis=-1))
+        quarter = calculate3DField(magnet, np.stack((np.zeros(radius.shape), radius, height), axis=-1))
+        # Azimuth of the sensor in the frame of the rotated magnet
+        relative = azimuth - angle[np.newaxis, np.newaxis, :]
+        if magnet.getMagnetization() == "diametric":
+            radial = zero[..., 0, np.newaxis] * np.cos(relative)
+            tangential = -quarter[..., 0, np.newaxis] * np.sin(relative)
+            axial = zero[..., 2, np.newaxis] * np.cos(relative)
+        else:
+            # Axial magnets look the same at every angle
+            radial = np.broadcast_to(zero[..., 0, np.newaxis], relative.shape)
+            tangential = np.zeros(relative.shape)
+            axial = np.broadcast_to(zero[..., 2, np.newaxis], relative.shape)
+        bx = radial * np.cos(azimuth) - tangential * np.sin(azimuth)
+        by = radial * np.sin(azimuth) + tangential * np.cos(azimuth)
+        bz = axial
+    else:
+        # Rotate every sensor position into the frame of the magnet, then rotate the field back
+        sensorX = (radius[..., np.newaxis] * np.cos(azimuth))
+        sensorY = (radius[..., np.newaxis] * np.sin(azimuth))
+        cos, sin = np.cos(angle), np.sin(angle)
+        localX = sensorX * cos + sensorY * sin
+        localY = -sensorX * sin + sensorY * cos
+        localZ = np.broadcast_to(height[..., np.newaxis], localX.shape)
+        local = calculate3DField(magnet, np.stack((localX, localY, localZ), axis=-1))
+        bx = local[..., 0] * cos - local[..., 1] * sin
+        by = local[..., 0] * sin + local[..., 1] * cos
+        bz = local[..., 2]
+
+    # Convert from Teslas to mT
+    bx, by, bz = bx * 1000, by * 1000, bz * 1000
+    error = sensor.angle(bx, by, bz) - np.degrees(angle)
+    error = (error + 180) % 360 - 180
+    if removeOffset:
+        # Circular mean, so curves near +-180 degrees are handled
+        mean = np.degrees(np.arctan2(np.mean(np.sin(np.radians(error)), axis=-1), np.mean(np.cos(np.radians(error)), axis=-1)))
+        error = (error - mean[..., np.newaxis] + 180) % 360 - 180
+    return bx, by, bz, error
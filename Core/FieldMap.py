@@ -0,0 +1,187 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Field maps, the field of a magnet over a 2D grid of points, for heatmaps and placement reviews.
+#
+# The grid is split into square tiles that are evaluated by a pool of processes. Every tile is written straight into
+# a memory mapped .npy file, so the map is never copied into (or out of) a worker. Each worker only holds the points
+# and field of the tile it is working on. Without a path the map is returned in memory, and the file the workers
+# share is temporary.
+from Core.Magnet import Magnet
+from Core.FieldCalculations3D import calculate3DField
+from Core import Backends
+import os
+import tempfile
+
+# Field components that can be mapped
+COMPONENTS = ("x", "y", "z", "magnitude", "vector")
+
+# Planes that can be mapped, and the indices of their horizontal, vertical and fixed axes
+_PLANES = {"xz": (0, 2, 1), "yz": (1, 2, 0), "xy": (0, 1, 2)}
+
+# Set in each worker by _startWorker, so the magnet and grid are sent once per worker rather than once per tile
+_worker = None
+
+
+def calculateFieldMap(magnet, horizontal, vertical, resolution, plane="xz", offset=0.0, component="magnitude",
+                      tileSize=256, processes=None, path=None, dtype=None):
+    """
+    Calculates the field of a magnet over a 2D grid of points. Requires numpy.
+    Coordinates follow FieldCalculations3D: z is the magnet axis and the top face of the magnet is at z = 0.
+    Points inside the magnet are NaN, points on its edges (where the field is infinite) are not finite.
+
+    :param magnet: Magnet to simulate.
+    :type magnet: Magnet
+    :param horizontal: First and last coordinate along the horizontal axis of the plane (x for xz and xy, y for yz)
+    :type horizontal: tuple[float, float]
+    :param vertical: First and last coordinate along the vertical axis of the plane (z for xz and yz, y for xy)
+    :type vertical: tuple[float, float]
+    :param resolution: Number of columns and rows in the map
+    :type resolution: tuple[int, int]
+    :param plane: "xz", "yz" or "xy"
+    :type plane: string
+    :param offset: Coordinate of the plane along the remaining axis
+    :type offset: float
+    :param component: "x", "y", "z", "magnitude" or "vector" for all three components
+    :type component: string
+    :param tileSize: Rows and columns per tile
+    :type tileSize: int
+    :param processes: Number of worker processes, defaults to the number of cores. 1 calculates in this process.
+    :type processes: int
+    :param path: .npy file to write the map to. None returns the map in memory, give a path for maps that do not fit.
+    :type path: string
+    :param dtype: "float64" or "float32" storage of the map, defaults to Backends.getPrecision(). The field is always
+        calculated in float64, float32 halves the size of the file.
+    :type dtype: string
+    :return: Field in mT, shape (rows, columns), or (rows, columns, 3) for "vector". Row 0 is the first vertical coordinate.
+    :rtype: numpy.memmap, or numpy.ndarray without a path
+    :raises ValueError: If the magnet, plane, component, resolution, tile size or dtype is not valid.
+    """
+    import numpy as np
+
+    if not isinstance(magnet, Magnet):
+        raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+    if plane not in _PLANES:
+        raise ValueError("Unrecognized plane. Use xz, yz or xy.")
+    if component not in COMPONENTS:
+        raise ValueError("Unrecognized component. Use x, y, z, magnitude or vector.")
+    columns, rows = resolution
+    if columns < 1 or rows < 1 or tileSize < 1:
+        raise ValueError("Resolution and tile size must be at least 1.")
+    if dtype is None:
+        dtype = Backends.getPrecision()
+    if dtype not in Backends.PRECISIONS:
+        raise ValueError("Unrecognized dtype. Use float64 or float32.")
+
+    shape = (rows, columns, 3) if component == "vector" else (rows, columns)
+    grid = (tuple(horizontal), tuple(vertical), (columns, rows), plane, offset, component)
+    tiles = [(row, min(row + tileSize, rows), column, min(column + tileSize, columns))
+             for row in range(0, rows, tileSize) for column in range(0, columns, tileSize)]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tiles))
+
+    if processes <= 1:
+        output = np.empty(shape, dtype=dtype) if path is None else np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        _calculateTiles(magnet, grid, output, tiles)
+        return output
+
+    import multiprocessing
+
+    temporary = path is None
+    if temporary:
+        handle, path = tempfile.mkstemp(suffix=".npy", prefix="fieldmap-")
+        os.close(handle)
+    try:
+        output = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        # Workers open the file themselves, the parent's pages are flushed first so the header is visible
+        output.flush()
+        with multiprocessing.Pool(processes, initializer=_startWorker, initargs=(magnet, grid, path)) as pool:
+            for _ in pool.imap_unordered(_workerTile, tiles):
+                pass
+        if temporary:
+            # Copied out of the file, the mapping is released before the file is removed
+            output = np.array(output)
+    finally:
+        if temporary:
+            os.remove(path)
+    return output
+
+
+def _gridPoints(grid, tile):
+    # Points of one tile, shape (rows, columns, 3)
+    import numpy as np
+
+    horizontal, vertical, (columns, rows), plane, offset, component = grid
+    row0, row1, column0, column1 = tile
+    first, second, fixed = _PLANES[plane]
+    points = np.empty((row1 - row0, column1 - column0, 3))
+    points[:, :, first] = _coordinates(horizontal, columns, column0, column1)[np.newaxis, :]
+    points[:, :, second] = _coordinates(vertical, rows, row0, row1)[:, np.newaxis]
+    points[:, :, fixed] = offset
+    return points
+
+
+def _coordinates(limits, count, start, end):
+    # Coordinates start to end (exclusive) of count evenly spaced points from limits[0] to limits[1]
+    import numpy as np
+
+    step = (limits[1] - limits[0]) / (count - 1) if count > 1 else 0.0
+    return limits[0] + np.arange(start, end) * step
+
+
+def _inside(magnet, points):
+    # True for points inside the magnet, where the field calculations are not valid
+    import numpy as np
+
+    x, y, z = points[..., 0], points[..., 1], points[..., 2]
+    shape = magnet.shape()
+    if shape == "sphere":
+        radius = magnet.getSphereSize() / 2
+        return x ** 2 + y ** 2 + (z + radius) ** 2 < radius ** 2
+    if shape == "cubic":
+        length, width, thickness = magnet.getCubicSize()
+        return (np.abs(x) < length / 2) & (np.abs(y) < width / 2) & (z < 0) & (z > -thickness)
+    if shape == "cylinder":
+        diameter, thickness = magnet.getCylinderSize()
+        inner = 0.0
+    else:
+        diameter, inner, thickness = magnet.getRingSize()
+    radius = np.hypot(x, y)
+    # A solid cylinder includes its axis, a ring excludes its bore
+    return (radius < diameter / 2) & (radius >= inner / 2) & (z < 0) & (z > -thickness)
+
+
+def _calculateTiles(magnet, grid, output, tiles):
+    import numpy as np
+
+    component = grid[5]
+    for tile in tiles:
+        points = _gridPoints(grid, tile)
+        # Convert from Teslas to mT, same as the sweep functions. Points inside the magnet are not defined, they are
+        # masked below rather than warned about.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            field = calculate3DField(magnet, points) * 1000
+        field[_inside(magnet, points)] = np.nan
+        if component == "vector":
+            values = field
+        elif component == "magnitude":
+            values = np.linalg.norm(field, axis=-1)
+        else:
+            values = field[..., "xyz".index(component)]
+        row0, row1, column0, column1 = tile
+        # Rounded to the dtype of the map as it is stored
+        output[row0:row1, column0:column1] = values
+
+
+def _startWorker(magnet, grid, path):
+    import numpy as np
+
+    global _worker
+    # Opening the map is a mapping of the file, pages are only read or written for the tiles of this worker
+    _worker = (magnet, grid, np.lib.format.open_memmap(path, mode="r+"))
+
+
+def _workerTile(tile):
+    magnet, grid, output = _worker
+    _calculateTiles(magnet, grid, output, [tile])
+    output.flush()
@@ -0,0 +1,155 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# This class represents a 3 axis hall effect sensor, such as those used for rotary angle sensing.
+
+
+class Hall3DSensor:
+    """
+    3 axis hall effect sensor representation. Readings are field strengths in mT for the x, y and z axes.
+
+    Each axis has a relative gain (sensitivity mismatch), an offset in mT and a symmetric range it clips to.
+    The angle in the x-y plane is decoded with atan2, as angle sensors do internally.
+    """
+    def __init__(self, preset=None):
+        """
+        Creates a new 3 axis sensor. If a preset exists for the sensor, the preset attribute will set all parameters.
+
+        :param preset: preset name
+        :type preset: string
+        """
+        # Incremented by every setter
+        self.__revision = 0
+        self.__range = None
+        self.__gains = (1.0, 1.0, 1.0)
+        self.__offsets = (0.0, 0.0, 0.0)
+        self.name = preset
+
+        # If no preset is selected, the range is kept as None
+        if preset is None:
+            pass
+        # Presets for the TMAG5273 series, at their lower range setting
+        elif preset == "TMAG5273-A1":
+            self.setRange(40)
+        elif preset == "TMAG5273-A2":
+            self.setRange(133)
+        else:
+            raise NotImplementedError("The desired preset does not exist... yet. Double check your syntax against the Hall3DSensor constructor.")
+
+    def setRange(self, mT):
+        """
+        Sets the range of every axis to +-mT.
+
+        :param mT: Maximum sensible field strength in mT
+        :type mT: float
+        :return: None
+        """
+        self.__revision += 1
+        self.__range = mT
+
+    def setGains(self, x, y, z):
+        """
+        Sets the relative gain of each axis. 1 is nominal, so 1.01 is a 1% sensitivity error.
+
+        :param x: x axis gain
+        :type x: float
+        :param y: y axis gain
+        :type y: float
+        :param z: z axis gain
+        :type z: float
+        :return: None
+        """
+        self.__revision += 1
+        self.__gains = (x, y, z)
+
+    def setOffsets(self, x, y, z):
+        """
+        Sets the offset of each axis in mT.
+
+        :param x: x axis offset
+        :type x: float
+        :param y: y axis offset
+        :type y: float
+        :param z: z axis offset
+        :type z: float
+        :return: None
+        """
+        self.__revision += 1
+        self.__offsets = (x, y, z)
+
+    def getRange(self):
+        """
+        Gets the range of the sensor in mT.
+
+        :return: maximum sensible field strength (range is +-range)
+        :rtype: float
+        :raises AttributeError: If the range is not set.
+        """
+        if self.__range is None:
+            raise AttributeError("No range set. Please call setRange first.")
+        return self.__range
+
+    def getGains(self):
+        """
+        Gets the relative gain of each axis.
+
+        :return: x, y and z gain
+        :rtype: tuple[float, float, float]
+        """
+        return self.__gains
+
+    def getOffsets(self):
+        """
+        Gets the offset of each axis in mT.
+
+        :return: x, y and z offset
+        :rtype: tuple[float, float, float]
+        """
+        return self.__offsets
+
+    def getRevision(self):
+        """
+        Gets the revision of the configuration. It increases every time a setter is called.
+
+        :return: revision
+        :rtype: int
+        """
+        return self.__revision
+
+    def measure(self, bx, by, bz):
+        """
+        Calculates the readings of the sensor for field components in mT. Requires numpy.
+
+        :param bx: x component of the field in mT
+        :type bx: array_like
+        :param by: y component of the field in mT
+        :type by: array_like
+        :param bz: z component of the field in mT
+        :type bz: array_like
+        :return: x, y and z readings in mT
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        import numpy as np
+
+        limit = self.getRange()
+        readings = []
+        for field, gain, offset in zip((bx, by, bz), self.__gains, self.__offsets):
+            readings.append(np.clip(np.asarray(field, dtype=float) * gain + offset, -limit, limit))
+        return tuple(readings)
+
+    def angle(self, bx, by, bz):
+        """
+        Decodes the angle of the field in the x-y plane from the sensor readings. Requires numpy.
+
+        :param bx: x component of the field in mT
+        :type bx: array_like
+        :param by: y component of the field in mT
+        :type by: array_like
+        :param bz: z component of the field in mT
+        :type bz: array_like
+        :return: angle in degrees, from -180 to 180
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        x, y, z = self.measure(bx, by, bz)
+        return np.degrees(np.arctan2(y, x))
@@ -1,7 +1,16 @@
 # Author: Colin Pollard
 # Date: 6/24/2020
 # This class represents a basic hall effect sensor
+from Core import Backends
 
+# Quiescent voltage, lower and upper linear limits of each sensor type, in Volts.
+# These are based on the DRV5055 datasheet (0.2 volts are limits to linear range for this sensor)
+_OUTPUT_LIMITS = {
+    "bipolar3.3": (3.3 / 2, 0.2, 3.3 - 0.2),
+    "bipolar5": (5 / 2, 0.2, 4.8),
+    "unipolar3.3": (0, 0.2, 3.1),
+    "unipolar5": (0, 0.2, 4.8),
+}
 
 class HallSensor:
     """
@@ -14,6 +23,11 @@ class HallSensor:
         :param preset: preset name
         :type preset: string
         """
+        # Incremented by every setter
+        self.__revision = 0
+        # Input referred noise density in nT/sqrt(Hz), 130 for the DRV5055 series (every preset)
+        self.__noiseDensity = 0.0 if preset is None else 130.0
+
         if preset is None:
             self.__sensitivity = None
             self.__maxRange = self.__minRange = None
@@ -55,6 +69,7 @@ class HallSensor:
         :param mVmT: sensitivity in mV/mT
         :return: None
         """
+        self.__revision += 1
         self.__sensitivity = mVmT / 1000
 
     def setRange(self, min, max):
@@ -67,6 +82,7 @@ class HallSensor:
         :type max: float
         :return: None
         """
+        self.__revision += 1
         self.__minRange = min
         self.__maxRange = max
 
@@ -78,6 +94,7 @@ class HallSensor:
         :type input: float
         :return: None
         """
+        self.__revision += 1
         self.__maxRange = input
         self.__minRange = -input
 
@@ -89,8 +106,40 @@ class HallSensor:
         :type inputType: string
         :return: None
         """
+        self.__revision += 1
         self.__type = inputType
 
+    def setNoiseDensity(self, nTrtHz):
+        """
+        Sets the input referred noise density, the magnetic noise that would produce the noise at the output.
+        Multiplied by the square root of the noise bandwidth, this gives the RMS noise in nT (see NoiseAnalysis.py).
+
+        :param nTrtHz: noise density in nT/sqrt(Hz)
+        :type nTrtHz: float
+        :return: None
+        """
+        self.__revision += 1
+        self.__noiseDensity = nTrtHz
+
+    def getNoiseDensity(self):
+        """
+        Gets the input referred noise density, 0 if not set.
+
+        :return: noise density in nT/sqrt(Hz)
+        :rtype: float
+        """
+        return self.__noiseDensity
+
+    def getRevision(self):
+        """
+        Gets the revision of the configuration. It increases every time a setter is called, so cached results can
+        detect changes (see Simulation.py).
+
+        :return: revision
+        :rtype: int
+        """
+        return self.__revision
+
     def getSensitivity(self):
         """
         Gets the sensitivity of the sensor in mV/mT
@@ -113,6 +162,30 @@ class HallSensor:
             raise AttributeError("No range set. Please call setRange or setSymRange first.")
         return self.__minRange, self.__maxRange
 
+    def getType(self):
+        """
+        Gets the type of the sensor.
+
+        :return: sensor type
+        :rtype: string
+        :raises AttributeError: If the type of sensor is not set.
+        """
+        if self.__type is None:
+            raise AttributeError("No type set. Please call setType first.")
+        return self.__type
+
+    def getOutputLimits(self):
+        """
+        Gets the quiescent voltage and the linear output limits of the sensor type.
+
+        :return: quiescent voltage, minimum output voltage, maximum output voltage
+        :rtype: tuple[float, float, float]
+        :raises AttributeError: If the type of sensor is not set or not recognized.
+        """
+        if self.getType() not in _OUTPUT_LIMITS:
+            raise AttributeError("Invalid sensor type selected.")
+        return _OUTPUT_LIMITS[self.__type]
+
     def voltage(self, field):
         """
         Calculates the output voltage for a given field strength in mT
@@ -122,45 +195,22 @@ class HallSensor:
         :return: voltage
         :rtype float
         """
-        if self.__type == "bipolar3.3":
-            # These calculations are based on a DRV5055 running at 3.3v
-            vQ = 3.3 / 2
-            vOut = vQ + field * self.__sensitivity
-
-            # Check for clipping (0.2 volts are limits to linear range for this sensor)
-            if vOut > 3.3 - 0.2 or field > self.__maxRange:
-                vOut = 3.3 - 0.2
-            elif vOut < 0.2 or field < self.__minRange:
-                vOut = 0.2
-
-        elif self.__type == "bipolar5":
-            # These calculations are based on a DRV5055 running at 3.3v
-            vQ = 5 / 2
-            vOut = vQ + field * self.__sensitivity
-
-            # Check for clipping
-            if vOut > 4.8 or field > self.__maxRange:
-                vOut = 4.8
-            elif vOut < 0.2 or field < self.__minRange:
-                vOut = 0.2
-
-        elif self.__type == "unipolar3.3":
-            vOut = field * self.__sensitivity
-
-            # Check for clipping based on field range, may create strange behavior at limits.
-            # Checking by voltage range may work better, but YMMV
-            if vOut > 3.1 or field > self.__maxRange:
-                vOut = 3.1
-            elif vOut < 0.2 or field < self.__minRange:
-                vOut = 0.2
-
-        elif self.__type == "unipolar5":
-            vOut = field * self.__sensitivity
-
-            # Check for clipping - same note as above
-            if vOut > 4.8 or field > self.__maxRange:
-                vOut = 4.8
-            elif vOut < 0.2 or field < self.__minRange:
-                vOut = 0.2
-
-        return vOut
+        return Backends.sensorVoltage(self.getOutputLimits(), self.__sensitivity, self.__minRange, self.__maxRange, field)
+
+    def voltageArray(self, fields, backend=None, precision=None):
+        """
+        Calculates the output voltage for a sequence of field strengths in mT, using the selected compute backend.
+        Clipping is identical to voltage().
+
+        :param fields: field strengths in mT.
+        :type fields: array_like
+        :param backend: Backend to use instead of the selected backend.
+        :type backend: Backends.Backend
+        :param precision: "float64" or "float32", defaults to Backends.getPrecision()
+        :type precision: string
+        :return: voltages
+        :rtype: numpy.ndarray, or list with the python backend
+        """
+        if backend is None:
+            backend = Backends.getBackend()
+        return backend.sensorVoltage(self.getOutputLimits(), self.__sensitivity, self.__minRange, self.__maxRange, fields, precision)
@@ -0,0 +1,265 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# This class represents a hall effect switch or latch, a sensor with a digital output and hysteresis.
+
+
+class HallSwitch:
+    """
+    Hall effect switch and latch representation.
+
+    The output operates when the field reaches the operate point (BOP) and releases when it falls to the release point
+    (BRP). Between the two the output holds its previous state, so the output depends on the history of the field.
+    - switch: unipolar switch, 0 < BRP < BOP
+    - omnipolar: switch that responds to either pole, compares |B| against 0 < BRP < BOP
+    - latch: BRP < 0 < BOP, releases only when the opposite pole is applied
+    Outputs are open drain and active low by default: operated pulls low, released is pulled up.
+    """
+    def __init__(self, preset=None):
+        """
+        Creates a new Hall effect switch. If a preset exists for the part, the preset attribute will set all parameters.
+
+        :param preset: preset name
+        :type preset: string
+        """
+        self.__type = None
+        self.__bop = self.__brp = None
+        self.__vOperate = 0.0
+        self.__vRelease = 3.3
+        self.__responseTime = 0.0
+        self.__initialState = False
+        self.name = preset
+
+        # State of the output, and the delayed outputs not yet visible
+        self.__state = False
+        self.__delayLine = []
+
+        # If no preset is selected, the parameters are kept as None
+        if preset is None:
+            pass
+        # Typical thresholds of the DRV5013 latch series, with a 3.3v pull up
+        elif preset == "DRV5013-AD":
+            self.setType("latch")
+            self.setThresholds(2.7, -2.7)
+            self.setResponseTime(13e-6)
+        elif preset == "DRV5013-FA":
+            self.setType("latch")
+            self.setThresholds(6, -6)
+            self.setResponseTime(13e-6)
+        elif preset == "DRV5013-AG":
+            self.setType("latch")
+            self.setThresholds(12, -12)
+            self.setResponseTime(13e-6)
+        elif preset == "DRV5013-BC":
+            self.setType("latch")
+            self.setThresholds(21, -21)
+            self.setResponseTime(13e-6)
+        # Typical thresholds of the DRV5023 unipolar and DRV5033 omnipolar switches, FA version
+        elif preset == "DRV5023-FA":
+            self.setType("switch")
+            self.setThresholds(6.8, 4)
+            self.setResponseTime(13e-6)
+        elif preset == "DRV5033-FA":
+            self.setType("omnipolar")
+            self.setThresholds(6.8, 4)
+            self.setResponseTime(13e-6)
+        else:
+            raise NotImplementedError("The desired preset does not exist... yet. Double check your syntax against the HallSwitch constructor.")
+
+    def setType(self, switchType):
+        """
+        Sets the type of switch.
+
+        :param switchType: "switch", "omnipolar" or "latch"
+        :type switchType: string
+        :return: None
+        :raises ValueError: If the type is not recognized.
+        """
+        if switchType not in ("switch", "omnipolar", "latch"):
+            raise ValueError("Unrecognized switch type. Use switch, omnipolar or latch.")
+        self.__type = switchType
+
+    def setThresholds(self, bop, brp):
+        """
+        Sets the operate and release points in mT.
+
+        :param bop: Operate point (BOP) in mT
+        :type bop: float
+        :param brp: Release point (BRP) in mT
+        :type brp: float
+        :return: None
+        :raises ValueError: If the operate point is not above the release point.
+        """
+        if not bop > brp:
+            raise ValueError("The operate point must be above the release point.")
+        self.__bop = bop
+        self.__brp = brp
+
+    def setOutput(self, vOperate, vRelease):
+        """
+        Sets the output voltages. Defaults to an active low output with a 3.3v pull up.
+
+        :param vOperate: Output voltage while operated
+        :type vOperate: float
+        :param vRelease: Output voltage while released
+        :type vRelease: float
+        :return: None
+        """
+        self.__vOperate = vOperate
+        self.__vRelease = vRelease
+
+    def setResponseTime(self, seconds):
+        """
+        Sets the delay between the field crossing a threshold and the output changing.
+        Only used when a sample rate is given, such as in sweepSwitch with a speed.
+
+        :param seconds: Response time in seconds
+        :type seconds: float
+        :return: None
+        """
+        self.__responseTime = seconds
+
+    def setInitialState(self, operated):
+        """
+        Sets the state of the output at power up (or reset), used until the field crosses a threshold.
+
+        :param operated: True if the output starts operated
+        :type operated: bool
+        :return: None
+        """
+        self.__initialState = operated
+        self.reset()
+
+    def getType(self):
+        """
+        Gets the type of switch.
+
+        :return: switch type
+        :rtype: string
+        :raises AttributeError: If the type is not set.
+        """
+        if self.__type is None:
+            raise AttributeError("No type set. Please call setType first.")
+        return self.__type
+
+    def getThresholds(self):
+        """
+        Gets the operate and release points in mT.
+
+        :return: operate point, release point
+        :rtype: tuple[float, float]
+        :raises AttributeError: If the thresholds are not set.
+        """
+        if self.__bop is None:
+            raise AttributeError("No thresholds set. Please call setThresholds first.")
+        return self.__bop, self.__brp
+
+    def getOutput(self):
+        """
+        Gets the output voltages.
+
+        :return: voltage while operated, voltage while released
+        :rtype: tuple[float, float]
+        """
+        return self.__vOperate, self.__vRelease
+
+    def getResponseTime(self):
+        """
+        Gets the response time in seconds.
+
+        :return: response time
+        :rtype: float
+        """
+        return self.__responseTime
+
+    def isOperated(self):
+        """
+        Gets the current state of the comparator.
+
+        :return: True if operated
+        :rtype: bool
+        """
+        return self.__state
+
+    def reset(self):
+        """
+        Returns the output to its initial state.
+
+        :return: None
+        """
+        self.__state = self.__initialState
+        self.__delayLine = []
+
+    def voltage(self, field):
+        """
+        Calculates the output voltage for the next field strength in mT. The switch keeps its state between calls,
+        so consecutive calls (such as in sweepSensors) follow the hysteresis.
+
+        :param field: field strength in mT.
+        :type field: float
+        :return: voltage
+        :rtype: float
+        """
+        bop, brp = self.getThresholds()
+        if self.getType() == "omnipolar":
+            field = abs(field)
+
+        if field >= bop:
+            self.__state = True
+        elif field <= brp:
+            self.__state = False
+        return self.__vOperate if self.__state else self.__vRelease
+
+    def statesArray(self, fields, sampleRate=None):
+        """
+        Calculates the output state for a sequence of field strengths in mT, continuing from the current state.
+        Threshold crossings are found with array operations. Requires numpy.
+
+        :param fields: field strengths in mT, in time order.
+        :type fields: array_like
+        :param sampleRate: Sample rate in Hz. If given, the output is delayed by the response time.
+        :type sampleRate: float
+        :return: True where the output is operated
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        bop, brp = self.getThresholds()
+        field = np.asarray(fields, dtype=float).ravel()
+        if self.getType() == "omnipolar":
+            field = np.abs(field)
+
+        # Output state before this chunk, which fills a delay line that is shorter than the delay
+        previous = self.__state
+
+        # Index of the last threshold event at or before each sample, -1 before the first event
+        operate = field >= bop
+        events = np.where(operate | (field <= brp), np.arange(field.shape[0]), -1)
+        last = np.maximum.accumulate(events) if field.shape[0] else events
+        states = np.where(last >= 0, operate[np.maximum(last, 0)], self.__state)
+        if field.shape[0]:
+            self.__state = bool(states[-1])
+
+        if sampleRate is not None and self.__responseTime > 0:
+            # Output lags the comparator by the response time, rounded to whole samples
+            delay = int(round(self.__responseTime * sampleRate))
+            pending = self.__delayLine + [previous] * (delay - len(self.__delayLine))
+            combined = np.concatenate((np.asarray(pending[-delay:] if delay else [], dtype=bool), states))
+            self.__delayLine = combined[combined.shape[0] - delay:].tolist() if delay else []
+            states = combined[:states.shape[0]]
+        return states
+
+    def voltageArray(self, fields, sampleRate=None):
+        """
+        Calculates the output voltage for a sequence of field strengths in mT, continuing from the current state.
+        Requires numpy.
+
+        :param fields: field strengths in mT, in time order.
+        :type fields: array_like
+        :param sampleRate: Sample rate in Hz. If given, the output is delayed by the response time.
+        :type sampleRate: float
+        :return: voltages
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        return np.where(self.statesArray(fields, sampleRate), self.__vOperate, self.__vRelease)
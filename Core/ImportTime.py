@@ -0,0 +1,117 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Import time benchmark, with a budget that can be enforced in CI: python -m Core.ImportTime --budget 25
+#
+# Every measurement runs in a fresh interpreter, so nothing is cached in memory between runs. Bytecode is compiled
+# by a first, unmeasured run (even if PYTHONDONTWRITEBYTECODE is set), because compiling the sources is a one time
+# cost of installing, not of starting.
+import os
+import subprocess
+import sys
+
+# Modules short lived scripts and command line wrappers import, which must stay fast and dependency free
+CRITICAL_MODULES = ("Core", "Core.Magnet", "Core.HallSensor", "Core.Amplifier", "Core.FieldCalculations")
+
+# Modules that must not be imported by the critical modules
+HEAVY_MODULES = ("numpy", "numba", "matplotlib", "scipy", "multiprocessing", "asyncio")
+
+# Import time budget of each critical module in milliseconds, including the modules it imports
+DEFAULT_BUDGET = 25.0
+
+_MEASURE = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import {module}\n"
+            "elapsed = time.perf_counter() - start\n"
+            "print(elapsed, ','.join(name for name in {heavy} if name in sys.modules))\n")
+
+
+def measureImportTime(module, repeats=7):
+    """
+    Measures the time taken to import a module in a fresh interpreter.
+
+    :param module: Module name, such as Core.FieldCalculations
+    :type module: string
+    :param repeats: Number of measured runs
+    :type repeats: int
+    :return: median import time in milliseconds, heavy modules that were imported along with it
+    :rtype: tuple[float, list[string]]
+    :raises RuntimeError: If the module can not be imported.
+    """
+    # The directory holding the Core package, so the benchmark works without installing it
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [root, environment.get("PYTHONPATH")]))
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    code = _MEASURE.format(module=module, heavy=repr(HEAVY_MODULES))
+
+    times = []
+    heavy = []
+    for run in range(repeats + 1):
+        process = subprocess.run([sys.executable, "-c", code], env=environment, capture_output=True, text=True)
+        if process.returncode:
+            raise RuntimeError("Importing " + module + " failed:\n" + process.stderr)
+        elapsed, loaded = process.stdout.split(" ", 1)
+        heavy = [name for name in loaded.strip().split(",") if name]
+        # The first run compiles the bytecode
+        if run:
+            times.append(float(elapsed) * 1000)
+    times.sort()
+    return times[len(times) // 2], heavy
+
+
+def checkImportBudget(modules=CRITICAL_MODULES, budget=DEFAULT_BUDGET, repeats=7):
+    """
+    Measures the import time of each module and checks it against the budget. A module also fails if it imports any
+    of HEAVY_MODULES.
+
+    :param modules: Module names
+    :type modules: tuple[string]
+    :param budget: Largest allowed import time in milliseconds
+    :type budget: float
+    :param repeats: Number of measured runs per module
+    :type repeats: int
+    :return: median import time in milliseconds of each module
+    :rtype: dict[string, float]
+    :raises AssertionError: If a module is over the budget or imports a heavy module.
+    """
+    report = {}
+    for module in modules:
+        elapsed, heavy = measureImportTime(module, repeats)
+        if heavy:
+            raise AssertionError(module + " imports " + ", ".join(heavy) + ", which should only be imported when used.")
+        if elapsed > budget:
+            raise AssertionError(module + " takes " + format(elapsed, ".1f") + " ms to import, the budget is " +
+                                 format(budget, ".1f") + " ms.")
+        report[module] = elapsed
+    return report
+
+
+def main(arguments=None):
+    """
+    Command line entry point: reports the import time of each module, and fails if one is over the budget.
+
+    :param arguments: Command line arguments, defaults to sys.argv
+    :type arguments: list[string]
+    :return: exit code
+    :rtype: int
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m Core.ImportTime", description="Check module import times.")
+    parser.add_argument("modules", nargs="*", default=list(CRITICAL_MODULES), help="modules to measure")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="budget per module in milliseconds")
+    parser.add_argument("--repeats", type=int, default=7, help="measured runs per module")
+    options = parser.parse_args(arguments)
+
+    failed = False
+    for module in options.modules:
+        elapsed, heavy = measureImportTime(module, options.repeats)
+        over = elapsed > options.budget or heavy
+        failed = failed or over
+        print("{0:<30} {1:8.2f} ms{2}{3}".format(module, elapsed, "  OVER BUDGET" if elapsed > options.budget else "",
+                                                  "  imports " + ", ".join(heavy) if heavy else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,370 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Generates firmware lookup tables that convert ADC codes back to distance, with a bounded position error.
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+from Core.FieldCalculations import calculate1DFieldArray, calculate1DFieldSlope
+import struct
+
+# Header of the binary format: magic, version, ADC bits, number of points, distance resolution
+_MAGIC = b"MTXL"
+_HEADER = struct.Struct("<4sBBId")
+
+
+class LookupTable:
+    """
+    Piecewise linear lookup table from ADC code to distance, as used by firmware.
+
+    Breakpoints are ADC codes (increasing) and the distance at each breakpoint is stored as an integer number of
+    resolution steps. Between breakpoints the distance is interpolated with integer math, rounding to the nearest
+    step, and codes outside the table use the first or last entry. distance() gives exactly what the C code from
+    toCHeader() returns.
+    """
+    def __init__(self, codes, distances, bits, resolution):
+        """
+        Creates a table from its breakpoints.
+
+        :param codes: Breakpoint ADC codes, increasing
+        :type codes: list[int]
+        :param distances: Distance at each breakpoint, in resolution steps
+        :type distances: list[int]
+        :param bits: ADC resolution in bits
+        :type bits: int
+        :param resolution: Distance of one step, in the units of the magnet
+        :type resolution: float
+        :raises ValueError: If the breakpoints are not increasing or the lengths differ.
+        """
+        if len(codes) != len(distances) or len(codes) < 2:
+            raise ValueError("A table needs at least two breakpoints, with one distance per code.")
+        if any(second <= first for first, second in zip(codes, codes[1:])):
+            raise ValueError("Breakpoint codes must be increasing.")
+        self.__codes = [int(code) for code in codes]
+        self.__distances = [int(distance) for distance in distances]
+        self.__bits = bits
+        self.__resolution = resolution
+        self.__maxError = None
+
+    def __len__(self):
+        return len(self.__codes)
+
+    def getCodes(self):
+        """
+        Gets the breakpoint ADC codes.
+
+        :return: codes
+        :rtype: list[int]
+        """
+        return list(self.__codes)
+
+    def getDistances(self):
+        """
+        Gets the distance at each breakpoint.
+
+        :return: distances, in the units of the magnet
+        :rtype: list[float]
+        """
+        return [distance * self.__resolution for distance in self.__distances]
+
+    def getBits(self):
+        """
+        Gets the ADC resolution the table was made for.
+
+        :return: bits
+        :rtype: int
+        """
+        return self.__bits
+
+    def getResolution(self):
+        """
+        Gets the distance of one stored step.
+
+        :return: resolution, in the units of the magnet
+        :rtype: float
+        """
+        return self.__resolution
+
+    def getMaxError(self):
+        """
+        Gets the largest position error of the table against the exact inverse of the chain, over every code in the
+        table range. Only known for tables made by generateLookupTable.
+
+        :return: error in the units of the magnet, None if unknown
+        :rtype: float
+        """
+        return self.__maxError
+
+    def setMaxError(self, error):
+        """
+        Records the verified error of the table.
+
+        :param error: Largest position error
+        :type error: float
+        :return: None
+        """
+        self.__maxError = error
+
+    def distance(self, codes):
+        """
+        Looks up the distance for ADC codes, with the same integer interpolation as the firmware. Requires numpy.
+
+        :param codes: ADC codes
+        :type codes: array_like
+        :return: distances, in the units of the magnet
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        table = np.asarray(self.__codes, dtype=np.int64)
+        values = np.asarray(self.__distances, dtype=np.int64)
+        code = np.clip(np.asarray(codes, dtype=np.int64), table[0], table[-1])
+        index = np.clip(np.searchsorted(table, code, side="right") - 1, 0, table.shape[0] - 2)
+        span = table[index + 1] - table[index]
+        numerator = (values[index + 1] - values[index]) * (code - table[index])
+        # Round half away from zero, with C style (truncating) division
+        step = np.sign(numerator) * ((np.abs(numerator) + span // 2) // span)
+        return (values[index] + step) * self.__resolution
+
+    def toCHeader(self, name="mtx_lut"):
+        """
+        Formats the table as a C header, with the breakpoint arrays and a lookup function.
+
+        :param name: Prefix of the generated identifiers
+        :type name: string
+        :return: header source
+        :rtype: string
+        """
+        codeType = "uint16_t" if self.__bits <= 16 else "uint32_t"
+        guard = name.upper() + "_H"
+        lines = [
+            "/* ADC code to distance lookup table, generated by MTX. */",
+            "/* " + str(self.__bits) + " bit ADC, distances in steps of " + repr(self.__resolution) + " units. */",
+            "#ifndef " + guard,
+            "#define " + guard,
+            "",
+            "#include <stdint.h>",
+            "",
+            "#define " + name.upper() + "_POINTS " + str(len(self.__codes)),
+            "#define " + name.upper() + "_RESOLUTION " + repr(self.__resolution),
+            "",
+            "static const " + codeType + " " + name + "_codes[" + name.upper() + "_POINTS] = {",
+        ]
+        lines += _rows(self.__codes)
+        lines += ["};", "", "static const int32_t " + name + "_distances[" + name.upper() + "_POINTS] = {"]
+        lines += _rows(self.__distances)
+        lines += [
+            "};",
+            "",
+            "/* Distance for an ADC code, in steps of " + name.upper() + "_RESOLUTION. */",
+            "static inline int32_t " + name + "_lookup(" + codeType + " code)",
+            "{",
+            "    uint32_t low = 0;",
+            "    uint32_t high = " + name.upper() + "_POINTS - 1;",
+            "    if (code <= " + name + "_codes[0]) return " + name + "_distances[0];",
+            "    if (code >= " + name + "_codes[high]) return " + name + "_distances[high];",
+            "    while (high - low > 1) {",
+            "        uint32_t middle = (low + high) / 2;",
+            "        if (" + name + "_codes[middle] <= code) low = middle; else high = middle;",
+            "    }",
+            "    int64_t span = " + name + "_codes[high] - " + name + "_codes[low];",
+            "    int64_t numerator = (int64_t)(" + name + "_distances[high] - " + name + "_distances[low]) * (code - " + name + "_codes[low]);",
+            "    numerator += numerator >= 0 ? span / 2 : -(span / 2);",
+            "    return " + name + "_distances[low] + (int32_t)(numerator / span);",
+            "}",
+            "",
+            "#endif",
+            "",
+        ]
+        return "\n".join(lines)
+
+    def writeCHeader(self, path, name="mtx_lut"):
+        """
+        Writes the table as a C header file.
+
+        :param path: Path of the header
+        :type path: string
+        :param name: Prefix of the generated identifiers
+        :type name: string
+        :return: None
+        """
+        with open(path, "w") as header:
+            header.write(self.toCHeader(name))
+
+    def toBytes(self):
+        """
+        Packs the table in the compact binary format: a 18 byte header (magic "MTXL", version, bits, point count,
+        resolution as a double), the codes as little endian uint16 (uint32 above 16 bits), then the distances as
+        little endian int32.
+
+        :return: packed table
+        :rtype: bytes
+        """
+        codeFormat = "H" if self.__bits <= 16 else "I"
+        count = len(self.__codes)
+        return _HEADER.pack(_MAGIC, 1, self.__bits, count, self.__resolution) + \
+            struct.pack("<" + str(count) + codeFormat, *self.__codes) + \
+            struct.pack("<" + str(count) + "i", *self.__distances)
+
+    def writeBinary(self, path):
+        """
+        Writes the table in the compact binary format, see toBytes.
+
+        :param path: Path of the file
+        :type path: string
+        :return: None
+        """
+        with open(path, "wb") as table:
+            table.write(self.toBytes())
+
+
+def readLookupTable(data):
+    """
+    Unpacks a table from the compact binary format.
+
+    :param data: Packed table, or the path of a file holding one
+    :type data: bytes or string
+    :return: table
+    :rtype: LookupTable
+    :raises ValueError: If the data is not a packed table.
+    """
+    if isinstance(data, str):
+        with open(data, "rb") as table:
+            data = table.read()
+    if len(data) < _HEADER.size or data[:4] != _MAGIC:
+        raise ValueError("Data is not a packed lookup table.")
+    magic, version, bits, count, resolution = _HEADER.unpack_from(data)
+    codeFormat = "H" if bits <= 16 else "I"
+    codes = struct.unpack_from("<" + str(count) + codeFormat, data, _HEADER.size)
+    distances = struct.unpack_from("<" + str(count) + "i", data, _HEADER.size + struct.calcsize("<" + str(count) + codeFormat))
+    return LookupTable(codes, distances, bits, resolution)
+
+
+def _rows(values, perRow=12):
+    return ["    " + ", ".join(str(value) for value in values[start:start + perRow]) + ","
+            for start in range(0, len(values), perRow)]
+
+
+def _chain(magnet, sensor, amplifier, distances):
+    # Output voltage of the chain and its derivative with respect to distance, always in float64
+    import numpy as np
+
+    field = np.asarray(calculate1DFieldArray(magnet, distances, precision="float64"), dtype=float) * 1000
+    slope = np.asarray(calculate1DFieldSlope(magnet, distances, precision="float64"), dtype=float) * 1000
+    voltage = np.asarray(sensor.voltageArray(field, precision="float64"), dtype=float)
+    vQ, vMin, vMax = sensor.getOutputLimits()
+    minRange, maxRange = sensor.getRange()
+    linear = (voltage > vMin) & (voltage < vMax) & (field >= minRange) & (field <= maxRange)
+    derivative = np.where(linear, sensor.getSensitivity() * slope, 0.0)
+    if amplifier is not None:
+        derivative = derivative * amplifier.gainArray(voltage)
+        voltage = np.asarray(amplifier.vOutArray(voltage, precision="float64"), dtype=float)
+    return voltage, derivative
+
+
+def generateLookupTable(magnet, sensor, amplifier, startDistance, endDistance, bits, maxError, vRef=3.3, resolution=0.001):
+    """
+    Generates the smallest piecewise linear table from ADC code to distance that keeps the position error within
+    maxError. Requires numpy.
+
+    The ADC is ideal: code = floor(v / vRef * 2 ** bits). Each code is converted back to the distance whose output
+    is at the center of the code, which is exact to numerical precision. Breakpoints are then chosen greedily, each
+    segment reaching as far as the error bound allows, and the table is verified against every code with the
+    integer firmware interpolation. The error includes the rounding of distances to the resolution, and does not
+    include the quantization of the ADC itself (half a code of distance).
+
+    :param magnet: Magnet to simulate.
+    :type magnet: Magnet
+    :param sensor: Sensor to simulate.
+    :type sensor: HallSensor
+    :param amplifier: Amplifier after the sensor, None if the ADC reads the sensor directly.
+    :type amplifier: Amplifier
+    :param startDistance: Closest distance the table covers
+    :type startDistance: float
+    :param endDistance: Farthest distance the table covers
+    :type endDistance: float
+    :param bits: ADC resolution in bits
+    :type bits: int
+    :param maxError: Largest allowed position error, in the units of the magnet
+    :type maxError: float
+    :param vRef: ADC reference voltage
+    :type vRef: float
+    :param resolution: Distance of one stored step, in the units of the magnet. Must be below maxError.
+    :type resolution: float
+    :return: table
+    :rtype: LookupTable
+    :raises ValueError: If the output is not monotonic over the distances, or the error bound is below the resolution.
+    """
+    import numpy as np
+
+    if not isinstance(magnet, Magnet):
+        raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+    if not isinstance(sensor, HallSensor):
+        raise ValueError("Sensor provided is not a valid HallSensor.py instance.")
+    if amplifier is not None and not isinstance(amplifier, Amplifier):
+        raise ValueError("Amplifier provided is not a valid Amplifier.py instance.")
+    if not maxError > resolution:
+        raise ValueError("The error bound must be larger than the resolution.")
+
+    # Dense sweep of the output in codes, over the part of the range that is not clipped
+    levels = 2 ** bits
+    grid = np.linspace(startDistance, endDistance, 200001)
+    voltage, derivative = _chain(magnet, sensor, amplifier, grid)
+    code = voltage / vRef * levels
+    usable = (derivative != 0) & (code >= 0) & (code < levels)
+    if usable.sum() < 2:
+        raise ValueError("The output is clipped or outside of the ADC range over the whole distance range.")
+    first, last = np.flatnonzero(usable)[[0, -1]]
+    if not usable[first:last + 1].all() or not (np.all(derivative[first:last + 1] > 0) or np.all(derivative[first:last + 1] < 0)):
+        raise ValueError("The output must be monotonic and unclipped over one continuous part of the distance range.")
+    grid, code = grid[first:last + 1], code[first:last + 1]
+    if code[-1] < code[0]:
+        grid, code = grid[::-1], code[::-1]
+
+    # Every code whose center lies inside the usable part, converted back to distance with Newton steps
+    codes = np.arange(int(np.ceil(code[0] - 0.5)), int(np.floor(code[-1] - 0.5)) + 1)
+    if codes.shape[0] < 2:
+        raise ValueError("The distance range spans less than two ADC codes.")
+    target = (codes + 0.5) * vRef / levels
+    exact = np.interp(codes + 0.5, code, grid)
+    low, high = min(startDistance, endDistance), max(startDistance, endDistance)
+    for iteration in range(6):
+        voltage, derivative = _chain(magnet, sensor, amplifier, exact)
+        exact = np.clip(exact - (voltage - target) / np.where(derivative != 0, derivative, np.inf), low, high)
+
+    # Greedy segments in stored steps. Stored distances and the firmware interpolation each round by up to half a step.
+    steps = exact / resolution
+    budget = maxError / resolution - 1
+    breakpoints = [0]
+    start = 0
+    last = codes.shape[0] - 1
+    while start < last:
+        # Gallop to bracket the reach of this segment, then bisect
+        reach, size = start + 1, 1
+        while reach < last and _segmentError(steps, start, min(start + 2 * size, last)) <= budget:
+            size *= 2
+            reach = min(start + size, last)
+        lower, upper = reach, min(start + 2 * size, last)
+        while upper - lower > 1:
+            middle = (lower + upper) // 2
+            if _segmentError(steps, start, middle) <= budget:
+                lower = middle
+            else:
+                upper = middle
+        breakpoints.append(lower)
+        start = lower
+
+    breakpoints = np.asarray(breakpoints)
+    table = LookupTable(codes[breakpoints].tolist(), np.rint(steps[breakpoints]).astype(np.int64).tolist(), bits, resolution)
+    table.setMaxError(float(np.max(np.abs(table.distance(codes) - exact))))
+    return table
+
+
+def _segmentError(steps, start, end):
+    # Largest distance of the points between start and end from the straight line between them
+    import numpy as np
+
+    if end - start < 2:
+        return 0.0
+    segment = steps[start:end + 1]
+    line = np.linspace(segment[0], segment[-1], segment.shape[0])
+    return np.max(np.abs(segment - line))
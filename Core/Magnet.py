@@ -8,12 +8,16 @@ class Magnet:
     Magnet representation.
     """
     def __init__(self):
+        # Incremented by every setter
+        self.__revision = 0
         # Type of magnet
         self.__shape = None
         # Dimensions
         self.__length = self.__width = self.__thickness = self.__diameter = self.__iDiameter = None
         # Strength
         self.__grade = self.__remanence = None
+        # Direction of magnetization, axial (through the thickness) or diametric (across the diameter)
+        self.__magnetization = "axial"
 
     def setGrade(self, grade):
         """
@@ -43,6 +47,7 @@ class Magnet:
             self.__remanence = 14600
         else:
             raise ValueError("Unrecognized grade preset. Please set remenance manually.")
+        self.__revision += 1
         self.__grade = grade
 
     def setRemanence(self, br):
@@ -52,8 +57,24 @@ class Magnet:
         :type br: float
         :return: None
         """
+        self.__revision += 1
         self.__remanence = br
 
+    def setMagnetization(self, direction):
+        """
+        Sets the direction of magnetization. Axial magnets are magnetized through their thickness (the default),
+        diametric magnets across their diameter (or length, for cubics), as used for rotary encoders.
+
+        :param direction: "axial" or "diametric"
+        :type direction: string
+        :return: None
+        :raises ValueError: If the direction is not recognized.
+        """
+        if direction not in ("axial", "diametric"):
+            raise ValueError("Unrecognized magnetization. Use axial or diametric.")
+        self.__revision += 1
+        self.__magnetization = direction
+
     def setCylinderSize(self, diameter, thickness):
         """
         Configures the magnet to be a cylinder, sets size.
@@ -64,6 +85,7 @@ class Magnet:
         :type thickness: float
         :return: None
         """
+        self.__revision += 1
         self.__shape = "cylinder"
         self.__diameter = diameter
         self.__thickness = thickness
@@ -84,6 +106,7 @@ class Magnet:
         :type thickness: float
         :return: None
         """
+        self.__revision += 1
         self.__shape = "cubic"
         self.__length = length
         self.__width = width
@@ -104,6 +127,7 @@ class Magnet:
         :type thickness: float
         :return: None
         """
+        self.__revision += 1
         self.__shape = "ring"
         self.__diameter = diameter
         self.__iDiameter = iDiameter
@@ -120,6 +144,7 @@ class Magnet:
         :type diameter: float
         :return: None
         """
+        self.__revision += 1
         self.__shape = "sphere"
         self.__diameter = diameter
         # Set unused dimensions to None
@@ -128,6 +153,16 @@ class Magnet:
         self.__length = None
         self.__width = None
 
+    def getRevision(self):
+        """
+        Gets the revision of the configuration. It increases every time a setter is called, so cached results can
+        detect changes (see Simulation.py).
+
+        :return: revision
+        :rtype: int
+        """
+        return self.__revision
+
     def shape(self):
         """
         Gets the shape of the magnet.
@@ -140,6 +175,15 @@ class Magnet:
             raise AttributeError("Shape not configured. Please set the size before using.")
         return self.__shape
 
+    def getMagnetization(self):
+        """
+        Gets the direction of magnetization.
+
+        :return: "axial" or "diametric"
+        :rtype: string
+        """
+        return self.__magnetization
+
     def getCylinderSize(self):
         """
         Gets the size of the magnet when it is configured as a cylinder.
@@ -0,0 +1,329 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Reads bench measurement logs (distance and voltage) chunk by chunk, and compares them against the model.
+#
+# Logs are never loaded whole. Each chunk is read, simulated with the array (backend) calculations, folded into the
+# running residual statistics and dropped, so memory use depends on the chunk size only.
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.FieldCalculations import calculate1DFieldArray
+
+# Log formats, and the file extensions they are detected from
+FORMATS = {"csv": (".csv", ".txt"), "binary": (".bin", ".dat", ".raw")}
+
+
+def readLog(path, columns=(0, 1), format=None, chunkSize=65536, delimiter=",", dtype="<f8", recordLength=None):
+    """
+    Reads a measurement log in chunks. Requires numpy.
+
+    CSV logs hold one sample per line. A header line is detected automatically, its names can then be used as columns.
+    Lines starting with # are skipped. Binary logs hold fixed length records of raw values, such as a stream of
+    little endian doubles or floats from a data logger.
+
+    :param path: Path of the log
+    :type path: string
+    :param columns: Column of the distance and column of the voltage, as indices or CSV header names
+    :type columns: tuple
+    :param format: "csv" or "binary", detected from the file extension by default
+    :type format: string
+    :param chunkSize: Samples per chunk
+    :type chunkSize: int
+    :param delimiter: CSV delimiter
+    :type delimiter: string
+    :param dtype: Type of each binary value, as a numpy dtype string
+    :type dtype: string
+    :param recordLength: Values per binary record, defaults to just enough for the columns
+    :type recordLength: int
+    :return: generator of (distances, voltages) array chunks
+    :raises ValueError: If the format can not be detected, a column name is not in the header, or a binary log ends
+        with a partial record.
+    """
+    if format is None:
+        extension = path[path.rfind("."):].lower() if "." in path else ""
+        format = next((name for name, extensions in FORMATS.items() if extension in extensions), None)
+    if format == "csv":
+        return _readCSV(path, columns, chunkSize, delimiter)
+    if format == "binary":
+        return _readBinary(path, columns, chunkSize, dtype, recordLength)
+    raise ValueError("Unrecognized log format. Use csv or binary.")
+
+
+def _readCSV(path, columns, chunkSize, delimiter):
+    import itertools
+    import numpy as np
+
+    with open(path, "r") as log:
+        lines = (line for line in log if line.strip() and not line.lstrip().startswith("#"))
+        first = next(lines, None)
+        if first is None:
+            return
+
+        # The first line is a header if it is not numeric
+        fields = [field.strip() for field in first.split(delimiter)]
+        try:
+            [float(field) for field in fields]
+            header = None
+            pending = [first]
+        except ValueError:
+            header = fields
+            pending = []
+
+        indices = []
+        for column in columns:
+            if isinstance(column, str):
+                if header is None or column not in header:
+                    raise ValueError("Column " + column + " is not in the header of the log.")
+                column = header.index(column)
+            indices.append(column)
+
+        while True:
+            chunk = pending + list(itertools.islice(lines, chunkSize - len(pending)))
+            pending = []
+            if not chunk:
+                return
+            values = np.loadtxt(chunk, delimiter=delimiter, usecols=indices, ndmin=2)
+            yield values[:, 0], values[:, 1]
+
+
+def _readBinary(path, columns, chunkSize, dtype, recordLength):
+    import numpy as np
+
+    dtype = np.dtype(dtype)
+    if any(isinstance(column, str) for column in columns):
+        raise ValueError("Binary logs have no header, select columns by index.")
+    if recordLength is None:
+        recordLength = max(columns) + 1
+    recordBytes = dtype.itemsize * recordLength
+
+    with open(path, "rb") as log:
+        while True:
+            data = log.read(recordBytes * chunkSize)
+            if not data:
+                return
+            if len(data) % recordBytes:
+                raise ValueError("Binary log ends with a partial record. Check dtype and recordLength.")
+            values = np.frombuffer(data, dtype=dtype).reshape(-1, recordLength)
+            yield values[:, columns[0]].astype(float), values[:, columns[1]].astype(float)
+
+
+class ResidualStatistics:
+    """
+    Running statistics of residuals (measured minus simulated voltage), updated one chunk at a time.
+
+    Count, mean, RMS, standard deviation, the largest residual and a fixed bin histogram are kept, so the memory used
+    does not grow with the number of samples. Chunks are combined with the parallel (Chan) update, which keeps the
+    mean and variance accurate over billions of samples. Statistics from several logs can be merged.
+    """
+    def __init__(self, low=-0.1, high=0.1, bins=200):
+        """
+        Creates empty statistics.
+
+        :param low: Lower edge of the histogram in Volts
+        :type low: float
+        :param high: Upper edge of the histogram in Volts
+        :type high: float
+        :param bins: Number of histogram bins
+        :type bins: int
+        :raises ValueError: If the histogram range is empty.
+        """
+        import numpy as np
+
+        if not high > low or bins < 1:
+            raise ValueError("Histogram needs at least one bin and high above low.")
+        self.__edges = np.linspace(low, high, bins + 1)
+        self.__counts = np.zeros(bins, dtype=np.int64)
+        self.__underflow = self.__overflow = 0
+        self.__count = 0
+        self.__skipped = 0
+        self.__mean = 0.0
+        # Sum of squared differences from the mean
+        self.__m2 = 0.0
+        self.__worst = 0.0
+        self.__worstDistance = None
+
+    def update(self, residuals, distances=None):
+        """
+        Adds a chunk of residuals. NaN residuals are counted as skipped.
+
+        :param residuals: Residuals in Volts
+        :type residuals: array_like
+        :param distances: Distance of each residual, used to report where the largest residual happened
+        :type distances: array_like
+        :return: None
+        """
+        import numpy as np
+
+        residuals = np.asarray(residuals, dtype=float).ravel()
+        finite = np.isfinite(residuals)
+        self.__skipped += int(residuals.shape[0] - finite.sum())
+        if distances is not None:
+            distances = np.asarray(distances, dtype=float).ravel()[finite]
+        residuals = residuals[finite]
+        if not residuals.shape[0]:
+            return
+
+        count = residuals.shape[0]
+        mean = residuals.mean()
+        m2 = ((residuals - mean) ** 2).sum()
+        self.__combine(count, mean, m2)
+
+        worst = np.argmax(np.abs(residuals))
+        if abs(residuals[worst]) > abs(self.__worst):
+            self.__worst = float(residuals[worst])
+            self.__worstDistance = None if distances is None else float(distances[worst])
+
+        self.__counts += np.histogram(residuals, bins=self.__edges)[0]
+        self.__underflow += int((residuals < self.__edges[0]).sum())
+        self.__overflow += int((residuals > self.__edges[-1]).sum())
+
+    def merge(self, other):
+        """
+        Adds the residuals of another set of statistics with the same histogram bins.
+
+        :param other: Statistics to merge
+        :type other: ResidualStatistics
+        :return: None
+        :raises ValueError: If the histogram bins differ.
+        """
+        import numpy as np
+
+        counts, edges, underflow, overflow = other.getHistogram()
+        if not np.array_equal(edges, self.__edges):
+            raise ValueError("Statistics can only be merged if their histogram bins match.")
+        if other.getCount():
+            self.__combine(other.getCount(), other.getMean(), other.getStandardDeviation() ** 2 * other.getCount())
+        self.__counts += counts
+        self.__underflow += underflow
+        self.__overflow += overflow
+        self.__skipped += other.getSkipped()
+        worst, distance = other.getWorst()
+        if abs(worst) > abs(self.__worst):
+            self.__worst, self.__worstDistance = worst, distance
+
+    def __combine(self, count, mean, m2):
+        total = self.__count + count
+        delta = mean - self.__mean
+        self.__mean += delta * count / total
+        self.__m2 += m2 + delta ** 2 * self.__count * count / total
+        self.__count = total
+
+    def getCount(self):
+        """
+        Gets the number of residuals added.
+
+        :return: count
+        :rtype: int
+        """
+        return self.__count
+
+    def getSkipped(self):
+        """
+        Gets the number of NaN residuals that were skipped.
+
+        :return: count
+        :rtype: int
+        """
+        return self.__skipped
+
+    def getMean(self):
+        """
+        Gets the mean residual, the systematic error of the model.
+
+        :return: mean in Volts
+        :rtype: float
+        """
+        return self.__mean
+
+    def getStandardDeviation(self):
+        """
+        Gets the standard deviation of the residuals.
+
+        :return: standard deviation in Volts
+        :rtype: float
+        """
+        return (self.__m2 / self.__count) ** 0.5 if self.__count else 0.0
+
+    def getRMS(self):
+        """
+        Gets the root mean square residual.
+
+        :return: RMS in Volts
+        :rtype: float
+        """
+        return (self.__mean ** 2 + self.getStandardDeviation() ** 2) ** 0.5
+
+    def getWorst(self):
+        """
+        Gets the residual with the largest magnitude, and the distance it happened at.
+
+        :return: residual in Volts, distance (None if no distances were given)
+        :rtype: tuple[float, float]
+        """
+        return self.__worst, self.__worstDistance
+
+    def getHistogram(self):
+        """
+        Gets the histogram of the residuals.
+
+        :return: counts per bin, bin edges in Volts, count below the first edge, count above the last edge
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, int, int]
+        """
+        return self.__counts.copy(), self.__edges.copy(), self.__underflow, self.__overflow
+
+
+def compareStream(chunks, magnet, sensor, amplifier=None, statistics=None):
+    """
+    Compares a stream of measured chunks against the simulated output of a magnet, sensor and optional amplifier.
+
+    :param chunks: Iterable of (distances, voltages) chunks, such as readLog()
+    :type chunks: iterable
+    :param magnet: Magnet to simulate.
+    :type magnet: Magnet
+    :param sensor: Sensor to simulate.
+    :type sensor: HallSensor
+    :param amplifier: Amplifier (or Cascade) after the sensor, None if the sensor output was measured directly.
+    :type amplifier: Amplifier
+    :param statistics: Statistics to add to, new statistics with the default histogram by default
+    :type statistics: ResidualStatistics
+    :return: residual statistics, measured minus simulated
+    :rtype: ResidualStatistics
+    :raises ValueError: If the magnet or sensor is not a valid instance.
+    """
+    import numpy as np
+
+    if not isinstance(magnet, Magnet):
+        raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+    if not isinstance(sensor, HallSensor):
+        raise ValueError("Sensor provided is not a valid HallSensor.py instance.")
+    if statistics is None:
+        statistics = ResidualStatistics()
+
+    for distances, voltages in chunks:
+        # Convert from Teslas to mT, same as the sweep functions
+        field = np.asarray(calculate1DFieldArray(magnet, distances), dtype=float) * 1000
+        simulated = sensor.voltageArray(field)
+        if amplifier is not None:
+            simulated = amplifier.vOutArray(simulated)
+        statistics.update(np.asarray(voltages, dtype=float) - np.asarray(simulated, dtype=float), distances)
+    return statistics
+
+
+def compareLog(path, magnet, sensor, amplifier=None, statistics=None, **options):
+    """
+    Compares a measurement log against the simulated output, chunk by chunk. Memory use does not grow with the log size.
+
+    :param path: Path of the log
+    :type path: string
+    :param magnet: Magnet to simulate.
+    :type magnet: Magnet
+    :param sensor: Sensor to simulate.
+    :type sensor: HallSensor
+    :param amplifier: Amplifier (or Cascade) after the sensor, None if the sensor output was measured directly.
+    :type amplifier: Amplifier
+    :param statistics: Statistics to add to, new statistics with the default histogram by default
+    :type statistics: ResidualStatistics
+    :param options: Options of readLog, such as columns, format and chunkSize
+    :return: residual statistics, measured minus simulated
+    :rtype: ResidualStatistics
+    """
+    return compareStream(readLog(path, **options), magnet, sensor, amplifier, statistics)
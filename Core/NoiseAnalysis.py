@@ -0,0 +1,193 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Noise limited position resolution of magnet, sensor, amplifier and ADC chains.
+#
+# Noise sources, each given as a density and integrated over the noise bandwidth of the measurement:
+#   sensor    - input referred magnetic noise (HallSensor.setNoiseDensity), amplified by sensitivity and amplifier gain
+#   amplifier - input referred voltage noise (Amplifier.setNoiseDensity), amplified by the small signal gain
+#   ADC       - quantization, one LSB / sqrt(12) at the output
+# The sources are independent, so their RMS values add in quadrature at the output. Dividing by the slope of the
+# output with respect to distance (the analytic field slope through the small signal gains) refers the noise back to
+# distance, which gives the smallest position change that stands out of the noise (1 sigma).
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+from Core.Calibration import _amplify
+from Core.FieldCalculations import calculate1DFieldArray, calculate1DFieldSlope
+
+
+class NoiseAnalysis:
+    """
+    Analytic noise propagation through sensor and amplifier pairs.
+
+    Every pair of a catalog is evaluated at every distance in one pass: the field and its slope are calculated once,
+    the sensor stage is broadcast over a (pairs, distances) grid, and each distinct amplifier evaluates all of its rows
+    in one call. Outputs that are clipped (by the sensor, the amplifier or the ADC range) carry no position
+    information, their resolution is infinite.
+    """
+    def __init__(self, bandwidth):
+        """
+        Creates a new analysis.
+
+        :param bandwidth: Noise bandwidth of the measurement in Hz. For a first order low pass filter this is
+            pi / 2 times its cutoff frequency.
+        :type bandwidth: float
+        """
+        self.__bandwidth = None
+        self.__adc = None
+        self.setBandwidth(bandwidth)
+
+    def setBandwidth(self, bandwidth):
+        """
+        Sets the noise bandwidth of the measurement.
+
+        :param bandwidth: Noise bandwidth in Hz
+        :type bandwidth: float
+        :return: None
+        :raises ValueError: If the bandwidth is not positive.
+        """
+        if not bandwidth > 0:
+            raise ValueError("Noise bandwidth must be positive.")
+        self.__bandwidth = bandwidth
+
+    def getBandwidth(self):
+        """
+        Gets the noise bandwidth of the measurement.
+
+        :return: Noise bandwidth in Hz
+        :rtype: float
+        """
+        return self.__bandwidth
+
+    def setADC(self, bits, vRef=3.3):
+        """
+        Sets the ADC that digitizes the output, which adds quantization noise and clips outside 0 to vRef.
+        None for bits removes the ADC.
+
+        :param bits: Resolution of the ADC in bits
+        :type bits: int
+        :param vRef: Reference (full scale) voltage of the ADC
+        :type vRef: float
+        :return: None
+        :raises ValueError: If bits is less than one.
+        """
+        if bits is not None and bits < 1:
+            raise ValueError("ADC resolution must be at least one bit.")
+        self.__adc = None if bits is None else (bits, vRef)
+
+    def getADC(self):
+        """
+        Gets the ADC that digitizes the output.
+
+        :return: bits, reference voltage. None if there is no ADC.
+        :rtype: tuple[int, float]
+        """
+        return self.__adc
+
+    def analyze(self, magnet, distances, sensors, amplifiers=None):
+        """
+        Propagates every noise source of each sensor and amplifier pair to the output, and refers it to distance.
+        Requires numpy.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param distances: Distances between magnet and sensor.
+        :type distances: array_like
+        :param sensors: Sensors to analyze
+        :type sensors: list[HallSensor]
+        :param amplifiers: Amplifier after each sensor, None (or a None entry) for sensors read directly.
+        :type amplifiers: list[Amplifier]
+        :return: arrays with one row per pair and one column per distance:
+            output - output voltage
+            signal - slope of the output in Volts per unit distance
+            sensorNoise, amplifierNoise, adcNoise - RMS noise of each source at the output in Volts
+            noise - total RMS noise at the output in Volts
+            resolution - noise limited position resolution (1 sigma), in the units of the distances
+        :rtype: dict[string, numpy.ndarray]
+        :raises ValueError: If a component is not a valid instance, or the amplifiers do not match the sensors.
+        """
+        import numpy as np
+
+        if not isinstance(magnet, Magnet):
+            raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+        if amplifiers is None:
+            amplifiers = [None] * len(sensors)
+        if len(amplifiers) != len(sensors):
+            raise ValueError("Provide one amplifier (or None) per sensor.")
+        for sensor, amplifier in zip(sensors, amplifiers):
+            if not isinstance(sensor, HallSensor):
+                raise ValueError("Sensor provided is not a valid HallSensor.py instance.")
+            if amplifier is not None and not isinstance(amplifier, Amplifier):
+                raise ValueError("Amplifier provided is not a valid Amplifier.py instance.")
+
+        distance = np.asarray(distances, dtype=float).ravel()
+        # Convert from Teslas to mT, same as the sweep functions. Always float64, the clipping tests compare with the rails.
+        field = np.asarray(calculate1DFieldArray(magnet, distance, precision="float64"), dtype=float) * 1000
+        slope = np.asarray(calculate1DFieldSlope(magnet, distance, precision="float64"), dtype=float) * 1000
+
+        # Sensor settings as columns, one row per pair
+        vQ, vMin, vMax = np.array([sensor.getOutputLimits() for sensor in sensors], dtype=float).reshape(-1, 3).T[:, :, np.newaxis]
+        minRange, maxRange = np.array([sensor.getRange() for sensor in sensors], dtype=float).reshape(-1, 2).T[:, :, np.newaxis]
+        sensitivity = np.array([[sensor.getSensitivity()] for sensor in sensors], dtype=float).reshape(-1, 1)
+        # nT to mT
+        density = np.array([[sensor.getNoiseDensity()] for sensor in sensors], dtype=float).reshape(-1, 1) * 1e-6
+        root = self.__bandwidth ** 0.5
+
+        # Same clipping as the sensor, the upper limit takes precedence
+        voltage = vQ + sensitivity * field
+        linear = (voltage > vMin) & (voltage < vMax) & (field >= minRange) & (field <= maxRange)
+        output = np.where((voltage < vMin) | (field < minRange), vMin, voltage)
+        output = np.where((voltage > vMax) | (field > maxRange), vMax, output)
+        gain = np.where(linear, sensitivity, 0.0)
+        signal = gain * slope
+        sensorNoise = np.abs(gain) * density * root
+        amplifierNoise = np.zeros(output.shape)
+
+        # Each amplifier evaluates every row it is used in at once
+        rowsOf = {}
+        for row, amplifier in enumerate(amplifiers):
+            if amplifier is not None:
+                rowsOf.setdefault(id(amplifier), (amplifier, []))[1].append(row)
+        for amplifier, rows in rowsOf.values():
+            output[rows], amplifierGain = _amplify(amplifier, output[rows])
+            signal[rows] *= amplifierGain
+            sensorNoise[rows] *= np.abs(amplifierGain)
+            # nV to V
+            amplifierNoise[rows] = np.abs(amplifierGain) * amplifier.getNoiseDensity() * 1e-9 * root
+
+        adcNoise = np.zeros(output.shape)
+        if self.__adc is not None:
+            bits, vRef = self.__adc
+            adcNoise += vRef / 2 ** bits / 12 ** 0.5
+            signal = np.where((output > 0) & (output < vRef), signal, 0.0)
+
+        noise = np.sqrt(sensorNoise ** 2 + amplifierNoise ** 2 + adcNoise ** 2)
+        # Clipped outputs have no signal, and no noise either where every source is zero
+        with np.errstate(divide="ignore", invalid="ignore"):
+            resolution = np.where(signal != 0, noise / np.abs(signal), np.inf)
+        return {"output": output, "signal": signal, "sensorNoise": sensorNoise, "amplifierNoise": amplifierNoise,
+                "adcNoise": adcNoise, "noise": noise, "resolution": resolution}
+
+    def sweepResolution(self, magnet, startDistance, endDistance, sensors, amplifiers=None):
+        """
+        Runs a sweep of the noise limited position resolution of a set of sensors, each with an optional amplifier.
+        Requires numpy.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param startDistance: Starting distance
+        :type startDistance: int
+        :param endDistance:  Ending distance
+        :type endDistance: int
+        :param sensors: List of sensors to simulate
+        :type sensors: list[HallSensor]
+        :param amplifiers: Amplifier after each sensor, None (or a None entry) for sensors read directly.
+        :type amplifiers: list[Amplifier]
+        :return: distance values, resolution with one row per sensor (infinite where the output is clipped)
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        import numpy as np
+
+        # Same 0.1 steps as the sweep functions
+        distance = np.arange(startDistance * 10, endDistance * 10) / 10
+        return distance, self.analyze(magnet, distance, sensors, amplifiers)["resolution"]
@@ -0,0 +1,377 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Persistent, content addressed store of sweep results, shared by every process on the machine.
+#
+# Results are keyed by a SHA-256 hash of everything that determines them: the sweep, every component setting and the
+# library version. Each result is a .npy file that is memory mapped when it is read, so a hit costs a file open.
+#
+# Sharing between processes relies on the file system only:
+#   - results are written to a temporary file and renamed into place, so a result is either complete or absent
+#   - a result removed by another process (eviction) is treated as a miss, and open memory maps stay valid on POSIX
+#   - stores and eviction hold an advisory lock (where fcntl exists) so processes do not evict the same files at once
+#   - the total size of the store is kept in a .size file, updated under the lock by every store. The store is only
+#     walked when that total is over maxBytes (or not known yet), and the walk writes back the exact total.
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+from Core.Cascade import Cascade, LowPassFilter
+from Core.FieldCalculations import sweepSensors, sweepAmplifiedSensors
+from Core import Backends, __version__
+import os
+import time
+
+# Version of the library, part of every key so results are recalculated after an upgrade
+LIBRARY_VERSION = __version__
+# Version of the key and file layout
+FORMAT_VERSION = 1
+# Age after which a temporary file is assumed to be left over from a stopped process
+_STALE_SECONDS = 3600
+
+
+def describe(component):
+    """
+    Describes a component by every setting that affects its results, as plain data that can be hashed.
+
+    :param component: Magnet, HallSensor, Amplifier, LowPassFilter or Cascade
+    :return: description
+    :rtype: dict
+    :raises ValueError: If the component type is not supported.
+    """
+    if isinstance(component, Magnet):
+        return {"magnet": component.shape(), "dimensions": _numbers(Backends.magnetDimensions(component)),
+                "remanence": float(component.getStrengthGauss()), "magnetization": component.getMagnetization()}
+    if isinstance(component, HallSensor):
+        return {"sensor": component.getType(), "sensitivity": float(component.getSensitivity()),
+                "range": _numbers(component.getRange())}
+    if isinstance(component, Amplifier):
+        return {"amplifier": component.getType(), "gain": _number(component.getGain()),
+                "diffVoltage": _number(component.getDiffVoltage()), "range": _numbers(component.getRange()),
+                "diode": _numbers(component.getDiodeCharacteristics())}
+    if isinstance(component, LowPassFilter):
+        b, a = component.getCoefficients()
+        return {"filter": component.getOrder(), "sampleRate": float(component.getSampleRate()), "b": _numbers(b), "a": _numbers(a)}
+    if isinstance(component, Cascade):
+        return {"cascade": [describe(stage) for stage in component.getStages()]}
+    raise ValueError("Only Magnet, HallSensor, Amplifier, LowPassFilter and Cascade results can be cached.")
+
+
+def _number(value):
+    return None if value is None else float(value)
+
+
+def _numbers(values):
+    return None if values is None else [_number(value) for value in values]
+
+
+def _wholeNumber(value):
+    # Sweep distances step through range(start * 10, end * 10), so 1 and 1.0 are the same sweep and share a key
+    if value != int(value):
+        raise ValueError("Sweep distances must be whole numbers.")
+    return int(value)
+
+
+class ResultCache:
+    """
+    On disk result store for repeated sweeps, such as nightly parameter studies.
+
+    sweepSensors and sweepAmplifiedSensors run the sweep functions of FieldCalculations on a miss and store the
+    result. On a hit the stored result is memory mapped and returned as numpy arrays holding the same values.
+    Results are stored in the precision selected with Backends.setPrecision, which is part of their key.
+
+    The store is bounded by maxBytes. When a result pushes it over, the least recently used results are removed
+    (each hit refreshes the modification time of its file).
+    """
+    def __init__(self, directory=None, maxBytes=1 << 30):
+        """
+        Opens (and creates if needed) a result store.
+
+        :param directory: Directory of the store, defaults to MTX_CACHE_DIR or ~/.cache/mtx
+        :type directory: string
+        :param maxBytes: Largest total size of the stored results
+        :type maxBytes: int
+        """
+        if directory is None:
+            directory = os.environ.get("MTX_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "mtx")
+        self.__directory = directory
+        self.__maxBytes = maxBytes
+        self.__statistics = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def getDirectory(self):
+        """
+        Gets the directory of the store.
+
+        :return: directory
+        :rtype: string
+        """
+        return self.__directory
+
+    def setMaxBytes(self, maxBytes):
+        """
+        Sets the largest total size of the stored results. Takes effect at the next store or evict call.
+
+        :param maxBytes: size in bytes
+        :type maxBytes: int
+        :return: None
+        """
+        self.__maxBytes = maxBytes
+
+    def getMaxBytes(self):
+        """
+        Gets the largest total size of the stored results.
+
+        :return: size in bytes
+        :rtype: int
+        """
+        return self.__maxBytes
+
+    def getStatistics(self):
+        """
+        Gets the hits, misses, stores and evictions of this instance.
+
+        :return: counts
+        :rtype: dict[string, int]
+        """
+        return dict(self.__statistics)
+
+    def key(self, configuration):
+        """
+        Calculates the key of a configuration: the SHA-256 of its canonical JSON form, with the library and format
+        versions included.
+
+        :param configuration: Plain data (dicts, lists, strings and numbers) that determines the result
+        :return: key, 64 hexadecimal characters
+        :rtype: string
+        """
+        import hashlib
+        import json
+
+        canonical = json.dumps({"library": LIBRARY_VERSION, "format": FORMAT_VERSION, "configuration": configuration},
+                               sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """
+        Memory maps a stored result. Requires numpy.
+
+        :param key: Result key
+        :type key: string
+        :return: read only array, None if the result is not stored
+        :rtype: numpy.memmap
+        """
+        import numpy as np
+
+        path = self.__path(key)
+        try:
+            result = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Missing, removed by another process in the meantime, or not a complete result
+            self.__statistics["misses"] += 1
+            return None
+        self.__statistics["hits"] += 1
+        return result
+
+    def store(self, key, values):
+        """
+        Stores a result, then evicts old results if the store is over its size. Requires numpy.
+
+        :param key: Result key
+        :type key: string
+        :param values: Result
+        :type values: array_like
+        :return: the stored result, memory mapped
+        :rtype: numpy.memmap
+        """
+        import tempfile
+        import numpy as np
+
+        path = self.__path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        total = None
+        try:
+            with os.fdopen(handle, "wb") as output:
+                np.save(output, np.asarray(values))
+            with _Lock(self.__lockPath()):
+                try:
+                    previous = os.stat(path).st_size
+                except FileNotFoundError:
+                    previous = 0
+                # Atomic on the same file system. The content is defined by the key, so a result stored by another
+                # process at the same time is identical, whichever rename wins.
+                os.replace(temporary, path)
+                total = self.__readSize()
+                if total is not None:
+                    total += os.stat(path).st_size - previous
+                    self.__writeSize(total)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            if not os.path.exists(path):
+                raise
+        self.__statistics["stores"] += 1
+        if total is None or total > self.__maxBytes:
+            self.evict()
+        try:
+            return np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            # Evicted straight away, the result alone is larger than the store
+            return np.asarray(values)
+
+    def evict(self):
+        """
+        Removes the least recently used results until the store fits in maxBytes. Walks the whole store, store() only
+        calls it when the store is over maxBytes.
+
+        :return: number of bytes removed
+        :rtype: int
+        """
+        with _Lock(self.__lockPath()):
+            entries = []
+            for root, directories, files in os.walk(self.__directory):
+                for name in files:
+                    # Temporary files left by a process that stopped while storing
+                    if name.endswith(".tmp"):
+                        path = os.path.join(root, name)
+                        try:
+                            if os.stat(path).st_mtime < time.time() - _STALE_SECONDS:
+                                os.remove(path)
+                        except OSError:
+                            pass
+                    elif name.endswith(".npy"):
+                        try:
+                            status = os.stat(os.path.join(root, name))
+                        except FileNotFoundError:
+                            continue
+                        entries.append((status.st_mtime, status.st_size, os.path.join(root, name)))
+
+            total = sum(entry[1] for entry in entries)
+            removed = 0
+            for modified, size, path in sorted(entries):
+                if total - removed <= self.__maxBytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Already removed, or still mapped on a system that does not allow removing open files
+                    continue
+                removed += size
+                self.__statistics["evictions"] += 1
+            self.__writeSize(total - removed)
+        return removed
+
+    def clear(self):
+        """
+        Removes every stored result.
+
+        :return: None
+        """
+        maxBytes = self.__maxBytes
+        self.__maxBytes = 0
+        try:
+            self.evict()
+        finally:
+            self.__maxBytes = maxBytes
+
+    def sweepSensors(self, magnet, startDistance, endDistance, sensors):
+        """
+        Cached sweepSensors. Requires numpy.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param startDistance: Starting distance
+        :type startDistance: int
+        :param endDistance:  Ending distance
+        :type endDistance: int
+        :param sensors: List of sensors to simulate
+        :type sensors: list[HallSensor]
+        :return: distance values, field strength in mT, sensor voltages with one row per sensor
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        :raises ValueError: If a distance is not a whole number.
+        """
+        startDistance, endDistance = _wholeNumber(startDistance), _wholeNumber(endDistance)
+        configuration = {"sweep": "sweepSensors", "start": startDistance, "end": endDistance, "step": 0.1,
+                         "magnet": describe(magnet), "sensors": [describe(sensor) for sensor in sensors]}
+        return self.__sweep(configuration, lambda: sweepSensors(magnet, startDistance, endDistance, sensors))
+
+    def sweepAmplifiedSensors(self, magnet, startDistance, endDistance, sensors, amplifiers):
+        """
+        Cached sweepAmplifiedSensors. Requires numpy.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param startDistance: Starting distance
+        :type startDistance: int
+        :param endDistance:  Ending distance
+        :type endDistance: int
+        :param sensors: List of sensors to simulate
+        :type sensors: list[HallSensor]
+        :param amplifiers: List of amplifiers (or Cascades), one per sensor
+        :type amplifiers: list[Amplifier]
+        :return: distance values, field strength in mT, amplifier voltages with one row per sensor
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        :raises ValueError: If a distance is not a whole number.
+        """
+        startDistance, endDistance = _wholeNumber(startDistance), _wholeNumber(endDistance)
+        configuration = {"sweep": "sweepAmplifiedSensors", "start": startDistance, "end": endDistance, "step": 0.1,
+                         "magnet": describe(magnet), "sensors": [describe(sensor) for sensor in sensors],
+                         "amplifiers": [describe(amplifier) for amplifier in amplifiers]}
+        return self.__sweep(configuration, lambda: sweepAmplifiedSensors(magnet, startDistance, endDistance, sensors, amplifiers))
+
+    def __sweep(self, configuration, calculate):
+        import numpy as np
+
+        key = self.key(dict(configuration, precision=Backends.getPrecision()))
+        result = self.load(key)
+        if result is None:
+            distance, strength, voltages = calculate()
+            # One row each for distance and strength, then one row per sensor, stored in the selected precision
+            rows = np.empty((2 + len(voltages), len(distance)), dtype=Backends.getPrecision())
+            rows[0], rows[1] = distance, strength
+            for index, voltage in enumerate(voltages):
+                rows[2 + index] = voltage
+            result = self.store(key, rows)
+        return result[0], result[1], result[2:]
+
+    def __lockPath(self):
+        return os.path.join(self.__directory, ".lock")
+
+    def __readSize(self):
+        # Total size of the stored results, None if it is not known yet. Only called under the lock.
+        try:
+            with open(os.path.join(self.__directory, ".size")) as file:
+                return int(file.read())
+        except (OSError, ValueError):
+            return None
+
+    def __writeSize(self, total):
+        with open(os.path.join(self.__directory, ".size"), "w") as file:
+            file.write(str(total))
+
+    def __path(self, key):
+        # Results are spread over 256 subdirectories by the first two characters of the key
+        return os.path.join(self.__directory, key[:2], key + ".npy")
+
+
+class _Lock:
+    # Advisory exclusive lock on a file, a no-op where fcntl is not available
+    def __init__(self, path):
+        self.__path = path
+        self.__file = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            return self
+        self.__file = open(self.__path, "a")
+        fcntl.flock(self.__file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exception):
+        if self.__file is not None:
+            import fcntl
+            fcntl.flock(self.__file.fileno(), fcntl.LOCK_UN)
+            self.__file.close()
+            self.__file = None
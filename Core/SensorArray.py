@@ -0,0 +1,364 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# This class represents a row of hall effect sensors along a travel axis, and estimates magnet position from their readings.
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.FieldCalculations import calculate1DField, calculate1DFieldArray, calculate1DFieldSlope
+import math
+
+
+def _fieldArray(function, magnet, distance):
+    # Backends work on flat sequences and may return lists, the estimator needs arrays shaped like the distances. The
+    # estimator always runs in float64, whatever the selected precision.
+    import numpy as np
+    return np.asarray(function(magnet, distance.ravel(), precision="float64"), dtype=float).reshape(distance.shape)
+
+
+class SensorArray:
+    """
+    Sensor array representation. Each sensor sits at a position along the travel axis, and the magnet
+    travels parallel to the axis at a fixed air gap.
+
+    The field at each sensor is approximated with the 1D (on-axis) field at the same straight line distance,
+    sqrt((sensorPosition - magnetPosition) ** 2 + gap ** 2). This keeps the model consistent with calculate1DField.
+    """
+    def __init__(self):
+        """
+        Creates a new, empty sensor array.
+        """
+        self.__sensors = []
+        self.__positions = []
+
+    def addSensor(self, sensor, position):
+        """
+        Adds a sensor to the array.
+
+        :param sensor: Configured sensor
+        :type sensor: HallSensor
+        :param position: Position of the sensor along the travel axis, in the same units as the magnet.
+        :type position: float
+        :return: None
+        :raises ValueError: If the sensor is not a HallSensor instance.
+        """
+        if not isinstance(sensor, HallSensor):
+            raise ValueError("Sensor provided is not a valid HallSensor.py instance.")
+        self.__sensors.append(sensor)
+        self.__positions.append(position)
+
+    def getSensors(self):
+        """
+        Gets the sensors in the array, in the order they were added.
+
+        :return: sensors
+        :rtype: list[HallSensor]
+        """
+        return list(self.__sensors)
+
+    def getPositions(self):
+        """
+        Gets the position of each sensor along the travel axis.
+
+        :return: sensor positions
+        :rtype: list[float]
+        """
+        return list(self.__positions)
+
+    def __len__(self):
+        return len(self.__sensors)
+
+    def voltages(self, magnet, magnetPosition, gap):
+        """
+        Calculates the voltage of every sensor for a single magnet position.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param magnetPosition: Position of the magnet along the travel axis.
+        :type magnetPosition: float
+        :param gap: Air gap between the magnet and the sensor axis.
+        :type gap: float
+        :return: voltage of each sensor
+        :rtype: list[float]
+        """
+        voltages = []
+        for sensor, position in zip(self.__sensors, self.__positions):
+            distance = math.sqrt((position - magnetPosition) ** 2 + gap ** 2)
+            voltages.append(sensor.voltage(calculate1DField(magnet, distance) * 1000))
+        return voltages
+
+    def voltagesArray(self, magnet, magnetPositions, gap):
+        """
+        Calculates the voltage of every sensor for an array of magnet positions. Requires numpy.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param magnetPositions: Positions of the magnet along the travel axis.
+        :type magnetPositions: array_like
+        :param gap: Air gap between the magnet and the sensor axis.
+        :type gap: float
+        :return: voltages with one row per magnet position and one column per sensor
+        :rtype: numpy.ndarray
+        """
+        import numpy as np
+
+        positions = np.asarray(magnetPositions, dtype=float)
+        distance = np.sqrt((np.asarray(self.__positions)[np.newaxis, :] - positions[:, np.newaxis]) ** 2 + gap ** 2)
+        field = _fieldArray(calculate1DFieldArray, magnet, distance) * 1000
+        voltages = np.empty(distance.shape)
+        for index, sensor in enumerate(self.__sensors):
+            voltages[:, index] = sensor.voltageArray(field[:, index])
+        return voltages
+
+
+class ArrayPositionEstimator:
+    """
+    Estimates magnet position (and optionally strength and air gap) from a stream of sensor array readings.
+
+    Every sample is solved with Gauss-Newton. Samples are processed in blocks, and all samples of a block are
+    iterated at once with numpy. Each block is warm started from the last estimate of the previous block, and
+    any sample that fails to converge is restarted from the estimate of the sample before it.
+    Requires numpy.
+    """
+    def __init__(self, sensorArray, magnet, gap, fitStrength=False, fitGap=False):
+        """
+        Creates a new estimator.
+
+        :param sensorArray: Array that produced the readings.
+        :type sensorArray: SensorArray
+        :param magnet: Nominal magnet, used for the shape and starting strength.
+        :type magnet: Magnet
+        :param gap: Nominal air gap, used as the fixed gap or as the starting gap when fitting it.
+        :type gap: float
+        :param fitStrength: Also solve for the strength of the magnet.
+        :type fitStrength: bool
+        :param fitGap: Also solve for the air gap.
+        :type fitGap: bool
+        :raises ValueError: If the array is empty or the magnet is not a Magnet instance.
+        """
+        if not isinstance(sensorArray, SensorArray) or len(sensorArray) == 0:
+            raise ValueError("Sensor array provided is empty or is not a valid SensorArray instance.")
+        if not isinstance(magnet, Magnet):
+            raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+
+        self.__array = sensorArray
+        self.__magnet = magnet
+        self.__gap = gap
+        self.__fitStrength = fitStrength
+        self.__fitGap = fitGap
+        self.__maxIterations = 30
+        self.__tolerance = 1e-6
+        self.__blockSize = 4096
+        # Last estimate of position, strength scale and gap, used to warm start the next block
+        self.__lastEstimate = None
+
+    def setIterations(self, maxIterations, tolerance):
+        """
+        Sets the iteration limit and the step below which a sample counts as converged.
+
+        :param maxIterations: Maximum Gauss-Newton iterations per sample.
+        :type maxIterations: int
+        :param tolerance: Convergence tolerance on the step of every solved parameter (position, strength scale, gap).
+        :type tolerance: float
+        :return: None
+        """
+        self.__maxIterations = maxIterations
+        self.__tolerance = tolerance
+
+    def setBlockSize(self, blockSize):
+        """
+        Sets the number of samples solved together.
+
+        :param blockSize: Samples per block
+        :type blockSize: int
+        :return: None
+        """
+        self.__blockSize = blockSize
+
+    def setInitialPosition(self, position):
+        """
+        Sets the position used to warm start the next sample, instead of the previous estimate.
+
+        :param position: Starting position of the magnet.
+        :type position: float
+        :return: None
+        """
+        self.__lastEstimate = (position, 1.0, self.__gap)
+
+    def reset(self):
+        """
+        Forgets the previous estimate, so the next sample is started from the strongest sensor.
+
+        :return: None
+        """
+        self.__lastEstimate = None
+
+    def estimate(self, readings):
+        """
+        Estimates the magnet state for every sample of a block of readings.
+        Consecutive calls continue the stream, warm starting from the last sample of the previous call.
+
+        :param readings: Sensor voltages with one row per sample and one column per sensor.
+        :type readings: array_like
+        :return: positions, strengths in gauss, gaps, RMS residual in volts, converged flag
+        :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        :raises ValueError: If the number of columns does not match the number of sensors.
+        """
+        import numpy as np
+
+        readings = np.atleast_2d(np.asarray(readings, dtype=float))
+        if readings.shape[1] != len(self.__array):
+            raise ValueError("Readings must have one column per sensor in the array.")
+
+        results = [self.__estimateBlock(readings[start:start + self.__blockSize])
+                   for start in range(0, readings.shape[0], self.__blockSize)]
+        if not results:
+            empty = np.empty(0)
+            return empty, empty, empty, empty, np.empty(0, dtype=bool)
+        return tuple(np.concatenate(column) for column in zip(*results))
+
+    def estimateStream(self, blocks):
+        """
+        Estimates the magnet state for a stream of reading blocks, such as chunks of a long capture.
+
+        :param blocks: Iterable of reading blocks, each accepted by estimate().
+        :type blocks: iterable
+        :return: generator of estimate() results, one per block
+        """
+        for block in blocks:
+            yield self.estimate(block)
+
+    def __estimateBlock(self, readings):
+        import numpy as np
+
+        count = readings.shape[0]
+        sensors = self.__array.getSensors()
+        limits = np.array([sensor.getOutputLimits() for sensor in sensors])
+        quiescent = limits[:, 0]
+
+        # Starting point, either the last estimate or the sensor with the largest signal.
+        # Samples that moved more than a sensor pitch away from the last estimate start at their strongest sensor.
+        strongest = np.asarray(self.__array.getPositions(), dtype=float)[np.argmax(np.abs(readings - quiescent), axis=1)]
+        state = np.empty((count, 3))
+        if self.__lastEstimate is None:
+            state[:, 0] = strongest
+            state[:, 1] = 1.0
+            state[:, 2] = self.__gap
+        else:
+            state[:] = self.__lastEstimate
+            moved = np.abs(strongest - state[:, 0]) > self.__pitch()
+            state[moved, 0] = strongest[moved]
+
+        initial = state.copy()
+        state, residual, converged = self.__solve(readings, state)
+
+        # The field of a sensor is symmetric about it, so a warm start on the wrong side of a sensor can converge to
+        # the mirror image. Samples that did not start at their strongest sensor are solved from there as well, and
+        # keep the better fit.
+        other = np.flatnonzero(initial[:, 0] != strongest)
+        if other.shape[0]:
+            start = initial[other]
+            start[:, 0] = strongest[other]
+            retry, retryResidual, retryConverged = self.__solve(readings[other], start)
+            better = (retryConverged & ~converged[other]) | ((retryConverged == converged[other]) & (retryResidual < residual[other]))
+            state[other[better]], residual[other[better]], converged[other[better]] = retry[better], retryResidual[better], retryConverged[better]
+
+        # Restart unconverged samples from the sample before them, which is usually close by
+        for index in np.flatnonzero(~converged):
+            if index == 0:
+                continue
+            retry, retryResidual, retryConverged = self.__solve(readings[index:index + 1], state[index - 1:index].copy())
+            if retryConverged[0] or retryResidual[0] < residual[index]:
+                state[index], residual[index], converged[index] = retry[0], retryResidual[0], retryConverged[0]
+
+        self.__lastEstimate = tuple(state[-1])
+        strength = state[:, 1] * self.__magnet.getStrengthGauss()
+        return state[:, 0], strength, state[:, 2], residual, converged
+
+    def __pitch(self):
+        # Average spacing between sensors, or the gap for a single sensor
+        positions = self.__array.getPositions()
+        if len(positions) < 2:
+            return abs(self.__gap)
+        return (max(positions) - min(positions)) / (len(positions) - 1)
+
+    def __solve(self, readings, state):
+        import numpy as np
+
+        sensors = self.__array.getSensors()
+        sensorPositions = np.asarray(self.__array.getPositions(), dtype=float)
+        sensitivity = np.array([sensor.getSensitivity() for sensor in sensors])
+        limits = np.array([sensor.getOutputLimits() for sensor in sensors])
+        ranges = np.array([sensor.getRange() for sensor in sensors])
+
+        # Readings on the rails carry no position information
+        rail = 1e-9
+        valid = (readings > limits[:, 1] + rail) & (readings < limits[:, 2] - rail)
+
+        # Columns of the state that are solved for (position is always solved)
+        free = [0] + ([1] if self.__fitStrength else []) + ([2] if self.__fitGap else [])
+
+        def evaluate(state):
+            offset = sensorPositions[np.newaxis, :] - state[:, 0:1]
+            gap = state[:, 2:3]
+            distance = np.sqrt(offset ** 2 + gap ** 2)
+            nominalField = _fieldArray(calculate1DFieldArray, self.__magnet, distance) * 1000
+            field = nominalField * state[:, 1:2]
+            slope = _fieldArray(calculate1DFieldSlope, self.__magnet, distance) * 1000 * state[:, 1:2]
+
+            model = limits[:, 0] + field * sensitivity
+            linear = (model > limits[:, 1]) & (model < limits[:, 2]) & (field >= ranges[:, 0]) & (field <= ranges[:, 1])
+            residual = (readings - np.clip(model, limits[:, 1], limits[:, 2])) * valid
+            cost = (residual ** 2).sum(axis=1)
+
+            # Analytic jacobian of each sensor voltage with respect to position, strength scale and gap. With the magnet
+            # straight over a sensor at zero gap the direction of the distance is undefined, both derivatives are 0 there.
+            safeDistance = np.maximum(distance, 1e-12)
+            jacobian = np.empty(readings.shape + (3,))
+            jacobian[:, :, 0] = -sensitivity * slope * offset / safeDistance
+            jacobian[:, :, 1] = sensitivity * nominalField
+            jacobian[:, :, 2] = sensitivity * slope * gap / safeDistance
+            jacobian = jacobian[:, :, free] * (valid & linear)[:, :, np.newaxis]
+            return residual, jacobian, cost
+
+        # Levenberg-Marquardt damping per sample, steps that increase the error are rejected
+        damping = np.full(readings.shape[0], 1e-6)
+        converged = np.zeros(readings.shape[0], dtype=bool)
+        maxStep = self.__pitch()
+        identity = np.eye(len(free))
+        residual, jacobian, cost = evaluate(state)
+
+        for iteration in range(self.__maxIterations):
+            normal = np.einsum("nsi,nsj->nij", jacobian, jacobian)
+            scale = np.einsum("nii->ni", normal)[:, np.newaxis, :] * identity + 1e-30 * identity
+            gradient = np.einsum("nsi,ns->ni", jacobian, residual)
+            step = np.linalg.solve(normal + damping[:, np.newaxis, np.newaxis] * scale, gradient[:, :, np.newaxis])[:, :, 0]
+            # Limit the position step to a sensor pitch so samples far from the start can not run away
+            step[:, 0] = np.clip(step[:, 0], -maxStep, maxStep)
+            step[converged] = 0
+
+            trial = state.copy()
+            trial[:, free] += step
+            # Gap and strength are physical magnitudes. A magnet without strength gives no signal to solve with, so
+            # the strength scale is kept positive.
+            trial[:, 1:] = np.abs(trial[:, 1:])
+            trial[:, 1] = np.maximum(trial[:, 1], 1e-6)
+            trialResidual, trialJacobian, trialCost = evaluate(trial)
+
+            accept = (trialCost <= cost) & ~converged
+            state[accept] = trial[accept]
+            residual[accept], jacobian[accept], cost[accept] = trialResidual[accept], trialJacobian[accept], trialCost[accept]
+            damping = np.where(accept, damping / 10, damping * 10)
+
+            # Every solved parameter must have settled, the position step alone is 0 for a sample that starts right
+            # over a sensor while strength and gap are still moving
+            small = np.max(np.abs(step), axis=1) < self.__tolerance
+            converged |= accept & small
+            # A rejected step that is already below tolerance means the minimum has been reached
+            converged |= ~accept & small & (damping > 1)
+            if converged.all():
+                break
+
+        used = valid.sum(axis=1)
+        rms = np.sqrt(cost / np.maximum(used, 1))
+        # A sample needs at least as many unclipped readings as unknowns
+        converged &= used >= len(free)
+        return state, rms, converged
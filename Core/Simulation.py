@@ -0,0 +1,149 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# This class runs a sweep of a magnet, sensors and amplifiers, and only recalculates the stages that changed.
+from Core.Magnet import Magnet
+from Core.FieldCalculations import calculate1DFieldArray
+
+
+class Simulation:
+    """
+    Sweep simulation with cached stages, for interactive tuning.
+
+    The same sweep as sweepAmplifiedSensors is split into three stages: field, sensor voltage, amplifier output.
+    Each stage keeps its last result along with the revision of the component it was calculated from
+    (see getRevision on Magnet, HallSensor and Amplifier). When run() is called again, a stage is only recalculated
+    if its component was changed through a setter or the stage before it was recalculated. Changing an amplifier gain
+    reruns that amplifier only, changing a sensor reruns that sensor and its amplifier.
+
+    Array calculations use the selected compute backend (see Backends.py).
+    """
+    def __init__(self, magnet, startDistance, endDistance, sensors, amplifiers=None):
+        """
+        Creates a new simulation.
+
+        :param magnet: Magnet to simulate.
+        :type magnet: Magnet
+        :param startDistance: Starting distance
+        :type startDistance: float
+        :param endDistance:  Ending distance
+        :type endDistance: float
+        :param sensors: List of sensors to simulate
+        :type sensors: list[HallSensor]
+        :param amplifiers: List of amplifiers (or Cascades), one per sensor. None to simulate the sensors only.
+        :type amplifiers: list[Amplifier]
+        :raises ValueError: If the magnet is not a Magnet instance, or there is not one amplifier per sensor.
+        """
+        if not isinstance(magnet, Magnet):
+            raise ValueError("Magnet provided is not a valid Magnet.py instance.")
+        if amplifiers is not None and len(amplifiers) != len(sensors):
+            raise ValueError("Each sensor must be connected to exactly one amplifier.")
+
+        self.__magnet = magnet
+        self.__sensors = list(sensors)
+        self.__amplifiers = None if amplifiers is None else list(amplifiers)
+        self.__distance = None
+        self.setRange(startDistance, endDistance)
+
+        # Cached stage results: (component revision, input generation, result, generation)
+        self.__field = None
+        self.__voltages = [None] * len(self.__sensors)
+        self.__outputs = [None] * len(self.__sensors)
+        # Each recalculated result gets a new generation, so the next stage knows its input changed
+        self.__generation = 0
+        self.__evaluations = {"field": 0, "sensor": 0, "amplifier": 0}
+
+    def setRange(self, startDistance, endDistance):
+        """
+        Sets the sweep range. Like the sweep functions, the sweep runs at 10 points per 1 distance.
+
+        :param startDistance: Starting distance
+        :type startDistance: int
+        :param endDistance: Ending distance
+        :type endDistance: int
+        :return: None
+        """
+        self.__distance = [index / 10 for index in range(startDistance * 10, endDistance * 10)]
+        self.__field = None
+
+    def getSensors(self):
+        """
+        Gets the simulated sensors. Configure them through their setters, the simulation detects the change.
+
+        :return: sensors
+        :rtype: list[HallSensor]
+        """
+        return list(self.__sensors)
+
+    def getAmplifiers(self):
+        """
+        Gets the simulated amplifiers. Configure them through their setters, the simulation detects the change.
+
+        :return: amplifiers, None if the sensors are simulated alone
+        :rtype: list[Amplifier]
+        """
+        return None if self.__amplifiers is None else list(self.__amplifiers)
+
+    def invalidate(self):
+        """
+        Drops every cached stage, so the next run recalculates everything.
+
+        :return: None
+        """
+        self.__field = None
+        self.__voltages = [None] * len(self.__sensors)
+        self.__outputs = [None] * len(self.__sensors)
+
+    def getEvaluations(self):
+        """
+        Gets how many times each stage has been calculated, counted per component.
+
+        :return: field, sensor and amplifier evaluation counts
+        :rtype: dict[string, int]
+        """
+        return dict(self.__evaluations)
+
+    def run(self):
+        """
+        Runs the sweep, recalculating only the stages whose inputs changed.
+
+        :return: List of distance values (x-axis), list of field strength in mT, list of list of sensor (or amplifier) voltages.
+        :rtype: tuple[list[float], list[float], list[list[float]]]
+        """
+        field = self.__stage("field", self.__field, self.__magnet, None, self.__calculateField)
+        self.__field = field
+
+        results = []
+        for index, sensor in enumerate(self.__sensors):
+            voltage = self.__stage("sensor", self.__voltages[index], sensor, field[3], lambda: sensor.voltageArray(field[2]))
+            self.__voltages[index] = voltage
+            if self.__amplifiers is None:
+                results.append(_toList(voltage[2]))
+                continue
+
+            amplifier = self.__amplifiers[index]
+            output = self.__stage("amplifier", self.__outputs[index], amplifier, voltage[3], lambda: amplifier.vOutArray(voltage[2]))
+            self.__outputs[index] = output
+            results.append(_toList(output[2]))
+
+        return list(self.__distance), _toList(field[2]), results
+
+    def __calculateField(self):
+        field = calculate1DFieldArray(self.__magnet, self.__distance)
+        # Convert from Teslas to mT, same as the sweep functions
+        if hasattr(field, "shape"):
+            return field * 1000
+        return [value * 1000 for value in field]
+
+    def __stage(self, name, cached, component, inputGeneration, calculate):
+        # Reuse the cached result if neither the component nor the input changed
+        revision = component.getRevision()
+        if cached is not None and cached[0] == revision and cached[1] == inputGeneration:
+            return cached
+
+        self.__evaluations[name] += 1
+        self.__generation += 1
+        return revision, inputGeneration, calculate(), self.__generation
+
+
+def _toList(values):
+    return values.tolist() if hasattr(values, "tolist") else list(values)
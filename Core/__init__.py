@@ -0,0 +1,28 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# MTX, magnet and hall effect sensor simulations.
+#
+# Importing the package is nearly free: submodules are only imported when they are first used (PEP 562), either
+# directly (from Core.FieldCalculations import sweepSensors) or as attributes (Core.FieldCalculations.sweepSensors).
+# The core modules (Magnet, HallSensor, Amplifier, FieldCalculations) need only the standard library. numpy, numba
+# and matplotlib are imported inside the functions that use them, so they cost nothing until an array function runs.
+# python -m Core.ImportTime checks the import times against a budget.
+import importlib
+
+__version__ = "0.2.0"
+
+# Submodules, imported on first access
+__all__ = ["Amplifier", "Backends", "BatchEvaluator", "BatchRunner", "Calibration", "Cascade", "FieldCalculations",
+           "FieldCalculations3D", "FieldMap", "Hall3DSensor", "HallSensor", "HallSwitch", "ImportTime", "LookupTable",
+           "Magnet", "MeasurementLog", "NoiseAnalysis", "ResultCache", "SensorArray", "Simulation"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        # The import binds the submodule as an attribute of the package, so this only runs once per submodule
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,7 +4,6 @@ from Core.Magnet import Magnet
 from Core.HallSensor import HallSensor
 from Core.Amplifier import Amplifier
 from Core.FieldCalculations import calculate1DField, calculateVoltage1D
-import matplotlib.pyplot as plt  # you do not need this import if you comment out the plotting code below and want a pure python example.
 
 # Create an example cylinder, 6mm diameter, 1mm thick, N52 grade
 testCylinder = Magnet()
@@ -49,6 +48,7 @@ for index in range(1, 1000):
 
 
 # Plot the results as a function of distance (comment this to avoid using matplotlib)
+import matplotlib.pyplot as plt  # only needed for plotting, so the simulation above runs without matplotlib
 fig, (ax1, ax2, ax3) = plt.subplots(3)
 
 # Field Strength
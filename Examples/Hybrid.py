@@ -3,8 +3,7 @@
 from Core.Magnet import Magnet
 from Core.HallSensor import HallSensor
 from Core.Amplifier import Amplifier
-from Core.FieldCalculations import *
-import matplotlib.pyplot as plt
+from Core.FieldCalculations import sweepAmplifiedSensors
 
 # Create an example cylinder, 6mm diameter, 1mm thick, N52 grade
 testCylinder = Magnet()
@@ -24,6 +23,8 @@ amplifiers = [LRAmplifier, SRAmplifier]
 
 distance, strength, voltages = sweepAmplifiedSensors(testCylinder, 1, 100, sensors, amplifiers)
 
+# Plot the results as a function of distance (comment this to avoid using matplotlib)
+import matplotlib.pyplot as plt  # only needed for plotting, so the simulation above runs without matplotlib
 fig, (ax1, ax2) = plt.subplots(2)
 # Field Strength
 ax1.plot(distance, strength, color='blue', linewidth=3)
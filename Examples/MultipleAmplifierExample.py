@@ -4,7 +4,6 @@ from Core.Magnet import Magnet
 from Core.HallSensor import HallSensor
 from Core.Amplifier import Amplifier
 from Core.FieldCalculations import calculate1DField, calculateVoltage1D
-import matplotlib.pyplot as plt  # you do not need this import if you comment out the plotting code below and want a pure python example.
 
 # Create an example cylinder, 6mm diameter, 1mm thick, N52 grade
 testCylinder = Magnet()
@@ -41,6 +40,8 @@ for index in range(1, 2000):
     for sensorIndex in range(0, len(sensors)):
         voltages[sensorIndex].append(diffAmplifier.vOut(logAmplifier.vOut(calculateVoltage1D(testCylinder, sensors[sensorIndex], distanceMM))))
 
+# Plot the results as a function of distance (comment this to avoid using matplotlib)
+import matplotlib.pyplot as plt  # only needed for plotting, so the simulation above runs without matplotlib
 fig, (ax1, ax2) = plt.subplots(2)
 # Field Strength
 ax1.plot(distance, strength, color='blue', linewidth=3)
@@ -1,7 +1,8 @@
 # Author: Colin Pollard
 # Date: 6/24/2020
-from Core.FieldCalculations import *
-import matplotlib.pyplot as plt  # you do not need this import if you comment out the plotting code below and want a pure python example.
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.FieldCalculations import calculate1DField, calculateVoltage1D, sweepSensors
 
 # Create an example cylinder, 6mm diameter, 1mm thick, N52 grade
 testCylinder = Magnet()
@@ -54,6 +55,7 @@ sensors = [HallSensor(preset="DRV5055-A1"), HallSensor(preset="DRV5055-A2"), Hal
 distance, strength, voltages = sweepSensors(testCylinder, 1, 100, sensors)
 
 # Plot the results as a function of distance (comment this to avoid using matplotlib)
+import matplotlib.pyplot as plt  # only needed for plotting, so the simulation above runs without matplotlib
 fig, (ax1, ax2) = plt.subplots(2)
 
 # Field Strength
@@ -0,0 +1,117 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Conformance of every available compute backend against the pure python reference functions, over every magnet
+# shape, sensor type and amplifier type, including the clipped regions.
+from Core import Backends
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+import pytest
+
+# Sensor and amplifier outputs, and the field of every shape but the sphere, take the same operations in the same
+# order in every backend, so they are asserted bit for bit. The sphere field (** 3) and the slopes (** 1.5, ** 4 and
+# root ** 3) take powers other than squares, which numpy and numba evaluate with their own pow (vectorized loops, LLVM
+# intrinsics) instead of the C library pow the reference calls. Those round differently by about an ulp, and the
+# difference of two nearly equal terms in the slopes amplifies that to a few 1e-15. Only these results are allowed
+# TOLERANCE, the largest difference relative to the magnitude of the reference result.
+TOLERANCE = 1e-12
+
+DISTANCES = [index / 10 for index in range(1, 1000)]
+FIELDS = [index / 10 - 80 for index in range(1600)]
+VOLTAGES = [index / 1000 for index in range(1, 5000)]
+
+MAGNETS = {"cylinder": ("setCylinderSize", (6, 1)), "cubic": ("setCubicSize", (6, 4, 3)),
+           "ring": ("setRingSize", (6, 3, 6)), "sphere": ("setSphereSize", (6,))}
+SENSORS = ["DRV5055-A1", "DRV5055-A5", "bipolar5", "unipolar3.3", "unipolar5"]
+AMPLIFIERS = ["Diff-3.3-1.65-10", "DiffLog-3.3-1.65", "noninv", "inv", "log"]
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    # The reference functions are float64
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+@pytest.fixture(params=Backends.availableBackends())
+def backend(request):
+    return Backends._instance(request.param)
+
+
+def makeMagnet(shape):
+    setter, size = MAGNETS[shape]
+    magnet = Magnet()
+    getattr(magnet, setter)(*size)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def makeSensor(name):
+    if name.startswith("DRV5055"):
+        return HallSensor(preset=name)
+    sensor = HallSensor()
+    sensor.setType(name)
+    sensor.setSensitivity(60)
+    sensor.setRange(-10, 60)
+    return sensor
+
+
+def makeAmplifier(name):
+    if "-" in name:
+        return Amplifier(preset=name)
+    amplifier = Amplifier()
+    amplifier.setType(name, vt=.026, isat=.000000007, logR=100)
+    amplifier.setGain({"noninv": 3, "inv": -2, "log": 1}[name])
+    amplifier.setRange(-3.3, 3.3)
+    return amplifier
+
+
+def assertConforms(expected, actual, tolerance=0.0):
+    actual = list(actual)
+    assert len(actual) == len(expected)
+    if not tolerance:
+        assert [float(value) for value in actual] == expected
+        return
+    worst = max(abs(float(value) - reference) / max(abs(reference), 1e-300) for reference, value in zip(expected, actual))
+    assert worst <= tolerance
+
+
+@pytest.mark.parametrize("shape", sorted(MAGNETS))
+def test_field1D(backend, shape):
+    magnet = makeMagnet(shape)
+    dimensions = Backends.magnetDimensions(magnet)
+    strength = magnet.getStrengthMT()
+    assertConforms([Backends.field1D(shape, dimensions, strength, d) for d in DISTANCES],
+                   backend.field1D(shape, dimensions, strength, DISTANCES), TOLERANCE if shape == "sphere" else 0.0)
+
+
+@pytest.mark.parametrize("shape", sorted(MAGNETS))
+def test_field1DSlope(backend, shape):
+    magnet = makeMagnet(shape)
+    dimensions = Backends.magnetDimensions(magnet)
+    strength = magnet.getStrengthMT()
+    assertConforms([Backends.field1DSlope(shape, dimensions, strength, d) for d in DISTANCES],
+                   backend.field1DSlope(shape, dimensions, strength, DISTANCES), TOLERANCE)
+
+
+@pytest.mark.parametrize("name", SENSORS)
+def test_sensorVoltage(backend, name):
+    sensor = makeSensor(name)
+    assertConforms([sensor.voltage(field) for field in FIELDS], sensor.voltageArray(FIELDS, backend))
+
+
+@pytest.mark.parametrize("name", AMPLIFIERS)
+def test_amplifierOut(backend, name):
+    amplifier = makeAmplifier(name)
+    inputs = VOLTAGES
+    if amplifier.getType() == "diffLog":
+        inputs = [v for v in VOLTAGES if v > amplifier.getDiffVoltage()]
+    assertConforms([amplifier.vOut(v) for v in inputs], amplifier.vOutArray(inputs, backend))
+
+
+def test_logDomainError(backend):
+    # Inputs at or below the diff voltage must raise in every backend, like the reference
+    amplifier = makeAmplifier("DiffLog-3.3-1.65")
+    with pytest.raises(ValueError):
+        amplifier.vOut(amplifier.getDiffVoltage())
+    with pytest.raises(ValueError):
+        amplifier.vOutArray([amplifier.getDiffVoltage()], backend)
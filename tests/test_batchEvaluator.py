@@ -0,0 +1,114 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of the request coalescing evaluator: results match calculateVoltage1D, concurrent calls are coalesced into
+# one batch and grouped by configuration, and errors resolve futures instead of stopping the worker.
+import threading
+
+from Core import Backends
+from Core.BatchEvaluator import BatchEvaluator
+from Core.FieldCalculations import calculateVoltage1D
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# Long enough that every call of a test joins the first batch
+LATENCY = 0.5
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet(diameter=6):
+    magnet = Magnet()
+    magnet.setCylinderSize(diameter, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def test_matchesCalculateVoltage1D():
+    magnet, sensor = makeMagnet(), HallSensor(preset="DRV5055-A3")
+    distances = [index / 10 for index in range(10, 400)]
+    with BatchEvaluator() as evaluator:
+        scalar = evaluator.calculateVoltage1D(magnet, sensor, 20.0)
+        array = evaluator.calculateVoltage1D(magnet, sensor, distances)
+    assert isinstance(scalar, float)
+    assert scalar == pytest.approx(calculateVoltage1D(magnet, sensor, 20.0), rel=1e-12)
+    assert np.allclose(array, [calculateVoltage1D(magnet, sensor, d) for d in distances], rtol=1e-12, atol=0)
+
+
+def test_coalescesConcurrentCalls():
+    magnet, sensor = makeMagnet(), HallSensor(preset="DRV5055-A3")
+    results = [None] * 32
+    evaluator = BatchEvaluator(maxLatency=LATENCY)
+
+    def call(index):
+        results[index] = evaluator.calculateVoltage1D(magnet, sensor, 5 + index)
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    evaluator.close()
+
+    stats = evaluator.getStatistics()
+    assert stats["calls"] == len(results)
+    assert stats["batches"] == 1
+    assert stats["groups"] == 1
+    assert results == pytest.approx([calculateVoltage1D(magnet, sensor, 5 + index) for index in range(len(results))], rel=1e-12)
+
+
+def test_groupsByConfiguration():
+    # Equal configurations built separately share an evaluation, different ones do not
+    evaluator = BatchEvaluator(maxLatency=LATENCY)
+    futures = [evaluator.submit(makeMagnet(), HallSensor(preset="DRV5055-A3"), 10.0),
+               evaluator.submit(makeMagnet(), HallSensor(preset="DRV5055-A3"), 12.0),
+               evaluator.submit(makeMagnet(8), HallSensor(preset="DRV5055-A3"), 10.0),
+               evaluator.submit(makeMagnet(), HallSensor(preset="DRV5055-A1"), 10.0)]
+    evaluator.close()
+    assert all(future.done() for future in futures)
+    assert evaluator.getStatistics()["batches"] == 1
+    assert evaluator.getStatistics()["groups"] == 3
+
+
+def test_snapshotAtSubmit():
+    # Changing the magnet after submitting does not change a queued call
+    magnet, sensor = makeMagnet(), HallSensor(preset="DRV5055-A3")
+    expected = calculateVoltage1D(magnet, sensor, 20.0)
+    evaluator = BatchEvaluator(maxLatency=LATENCY)
+    future = evaluator.submit(magnet, sensor, 20.0)
+    magnet.setCylinderSize(12, 6)
+    evaluator.close()
+    assert future.result() == pytest.approx(expected, rel=1e-12)
+    assert future.result() != pytest.approx(calculateVoltage1D(magnet, sensor, 20.0), rel=1e-6)
+
+
+def test_configurationError():
+    magnet = makeMagnet()
+    magnet.setMagnetization("diametric")
+    with BatchEvaluator() as evaluator:
+        with pytest.raises(NotImplementedError):
+            evaluator.calculateVoltage1D(magnet, HallSensor(preset="DRV5055-A3"), 10.0)
+
+
+def test_backendError(monkeypatch):
+    # A backend that fails to load resolves the futures of the batch, and the worker keeps serving later calls
+    magnet, sensor = makeMagnet(), HallSensor(preset="DRV5055-A3")
+    monkeypatch.setattr(Backends, "_active", None)
+    monkeypatch.setenv("MTX_BACKEND", "missing")
+    with BatchEvaluator() as evaluator:
+        with pytest.raises(ValueError):
+            evaluator.submit(magnet, sensor, 10.0).result(timeout=10)
+        monkeypatch.delenv("MTX_BACKEND")
+        assert evaluator.submit(magnet, sensor, 10.0).result(timeout=10) == pytest.approx(calculateVoltage1D(magnet, sensor, 10.0), rel=1e-12)
+
+
+def test_closed():
+    evaluator = BatchEvaluator()
+    evaluator.close()
+    with pytest.raises(RuntimeError):
+        evaluator.submit(makeMagnet(), HallSensor(preset="DRV5055-A3"), 10.0)
@@ -0,0 +1,121 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of the checkpointed batch runner: a stopped run resumes without redoing checkpointed units, and the results
+# do not depend on interruptions, the order units run in or the number of processes.
+import json
+import os
+
+from Core import Backends
+from Core.BatchRunner import BatchRunner, expandJob, runUnit, main
+import pytest
+
+np = pytest.importorskip("numpy")
+
+JOB = {
+    "magnets": [{"shape": "cylinder", "sizes": [[6, 3], [8, 3]], "grades": ["N42", "N52"]}],
+    "sensors": ["DRV5055-A1", {"type": "bipolar5", "sensitivity": 30, "range": [-70, 70]}],
+    "amplifiers": [None, "Diff-3.3-1.65-10"],
+    "sweeps": [{"start": 1, "end": 20}],
+    "tolerances": {"samples": 20, "seed": 1, "remanence": 200, "sensitivity": 2, "offset": 0.01, "gap": 0.1},
+}
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def assertSameResults(first, second):
+    firstResults, secondResults = list(first.results()), list(second.results())
+    assert len(firstResults) == len(secondResults) == len(expandJob(JOB))
+    for (firstUnit, firstResult), (secondUnit, secondResult) in zip(firstResults, secondResults):
+        assert firstUnit == secondUnit
+        assert sorted(firstResult) == sorted(secondResult)
+        for name in firstResult:
+            assert np.array_equal(firstResult[name], secondResult[name])
+
+
+def test_expandJob():
+    units = expandJob(JOB)
+    # 2 sizes x 2 grades x 2 sensors x 2 amplifiers x 1 sweep, magnets varying slowest
+    assert len(units) == 16
+    assert units[0]["magnet"] == {"shape": "cylinder", "size": [6, 3], "grade": "N42"}
+    assert [unit["amplifier"] for unit in units[:4]] == [None, "Diff-3.3-1.65-10"] * 2
+    with pytest.raises(ValueError):
+        expandJob({"magnets": JOB["magnets"], "sensors": []})
+
+
+def test_runUnitIsSeededByIndex():
+    unit = expandJob(JOB)[5]
+    first, again = runUnit(unit, JOB["tolerances"], 5), runUnit(unit, JOB["tolerances"], 5)
+    assert all(np.array_equal(first[name], again[name]) for name in first)
+    assert not np.array_equal(first["parameters"], runUnit(unit, JOB["tolerances"], 6)["parameters"])
+    assert first["samples"].shape == (20, first["distance"].shape[0])
+
+
+def test_resumeSkipsCheckpointedUnits(tmp_path):
+    reference = BatchRunner(JOB, str(tmp_path / "reference"))
+    reference.run(processes=1)
+
+    runner = BatchRunner(JOB, str(tmp_path / "resumed"))
+    calls = []
+
+    def interrupt(state):
+        calls.append(state)
+        if state["completed"] == 5:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        runner.run(processes=1, progress=interrupt, interval=0)
+    assert runner.getCompleted() == set(range(5))
+
+    # A unit that was being written when the run stopped
+    stale = os.path.join(runner.getDirectory(), "units", "tmpunit.tmp")
+    with open(stale, "wb") as output:
+        output.write(b"partial")
+    before = {index: os.stat(os.path.join(runner.getDirectory(), "units", str(index) + ".npz")).st_mtime_ns for index in range(5)}
+
+    state = BatchRunner(JOB, runner.getDirectory()).run(processes=1)
+    assert state["skipped"] == 5 and state["completed"] == state["total"] == 16
+    assert not os.path.exists(stale)
+    # Checkpointed units were not rewritten
+    assert all(os.stat(os.path.join(runner.getDirectory(), "units", str(index) + ".npz")).st_mtime_ns == mtime
+               for index, mtime in before.items())
+    assertSameResults(reference, runner)
+
+    # Nothing is left to run
+    assert BatchRunner(JOB, runner.getDirectory()).run(processes=1)["skipped"] == 16
+
+
+def test_parallelMatchesSerial(tmp_path):
+    serial = BatchRunner(JOB, str(tmp_path / "serial"))
+    serial.run(processes=1)
+    parallel = BatchRunner(JOB, str(tmp_path / "parallel"))
+    state = parallel.run(processes=3)
+    assert state["completed"] == 16 and state["remaining"] == 0.0
+    assertSameResults(serial, parallel)
+
+
+def test_resultsInIndexOrder(tmp_path):
+    runner = BatchRunner(JOB, str(tmp_path))
+    assert list(runner.results()) == [] and runner.load(0) is None
+    runner.run(processes=1)
+    os.remove(os.path.join(str(tmp_path), "units", "3.npz"))
+    assert [unit for unit, result in runner.results()] == [unit for index, unit in enumerate(runner.getUnits()) if index != 3]
+    assert runner.load(3) is None
+
+
+def test_differentJobInDirectory(tmp_path):
+    BatchRunner(JOB, str(tmp_path))
+    changed = dict(JOB, sweeps=[{"start": 1, "end": 30}])
+    with pytest.raises(ValueError):
+        BatchRunner(changed, str(tmp_path))
+
+
+def test_main(tmp_path, capsys):
+    spec = tmp_path / "job.json"
+    spec.write_text(json.dumps(JOB))
+    directory = str(tmp_path / "job")
+    assert main([str(spec), directory, "--processes", "1"]) == 0
+    assert main([str(spec), directory, "--status"]) == 0
+    assert "16/16 units completed" in capsys.readouterr().out
@@ -0,0 +1,150 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of the calibration fit: it recovers the parameters that generated the data, ignores clipped and missing
+# readings, and refuses problems it can not solve.
+from Core import Backends
+from Core.Calibration import Calibration
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+import pytest
+
+np = pytest.importorskip("numpy")
+
+DISTANCES = np.arange(5, 40, 1.0)
+UNITS = 50
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def makeCalibration(amplified=False):
+    amplifier = Amplifier(preset="Diff-3.3-1.65-10") if amplified else None
+    return Calibration(makeMagnet(), HallSensor(preset="DRV5055-A4"), amplifier)
+
+
+def makeUnits(calibration, seed=0, **spread):
+    # Parameters of each unit, spread around nominal
+    generator = np.random.default_rng(seed)
+    nominal = makeMagnet().getStrengthGauss()
+    parameters = {"remanence": nominal * (1 + 0.02 * generator.standard_normal(UNITS)),
+                  "offset": 0.01 * generator.standard_normal(UNITS),
+                  "gap": 0.2 * generator.standard_normal(UNITS)}
+    parameters.update(spread)
+    return parameters, calibration.model(DISTANCES, **parameters)
+
+
+@pytest.mark.parametrize("amplified", [False, True])
+def test_recoversParameters(amplified):
+    calibration = makeCalibration(amplified)
+    parameters, voltages = makeUnits(calibration)
+    if amplified:
+        # Part of every curve is on the rails
+        assert np.any(voltages >= 3.3)
+    remanence, sensitivity, offset, gap, rms, converged = calibration.fit(DISTANCES, voltages)
+    assert np.all(converged)
+    assert np.allclose(remanence, parameters["remanence"], rtol=1e-6, atol=0)
+    assert np.allclose(offset, parameters["offset"], rtol=0, atol=1e-7)
+    assert np.allclose(gap, parameters["gap"], rtol=0, atol=1e-6)
+    assert np.all(rms < 1e-7)
+    # Held parameters stay at nominal
+    assert np.all(sensitivity == HallSensor(preset="DRV5055-A4").getSensitivity() * 1000)
+
+
+def test_recoversSensitivity():
+    calibration = makeCalibration()
+    calibration.setFreeParameters("sensitivity", "offset")
+    nominal = HallSensor(preset="DRV5055-A4").getSensitivity() * 1000
+    sensitivity = nominal * (1 + 0.03 * np.random.default_rng(1).standard_normal(UNITS))
+    voltages = calibration.model(DISTANCES, sensitivity=sensitivity, offset=0.005)
+    fitted = calibration.fit(DISTANCES, voltages)
+    assert np.all(fitted[5])
+    assert np.allclose(fitted[1], sensitivity, rtol=1e-6, atol=0)
+    assert np.allclose(fitted[2], 0.005, rtol=0, atol=1e-7)
+    assert np.all(fitted[0] == makeMagnet().getStrengthGauss())
+
+
+def test_toleranceSplitsProduct():
+    # Only the product is observable, the tolerances decide how it is split
+    calibration = makeCalibration()
+    calibration.setFreeParameters("remanence", "sensitivity")
+    calibration.setTolerances(remanence=1.0, sensitivity=1.0)
+    magnetNominal = makeMagnet().getStrengthGauss()
+    sensorNominal = HallSensor(preset="DRV5055-A4").getSensitivity() * 1000
+    voltages = calibration.model(DISTANCES, remanence=magnetNominal * 1.04)
+    remanence, sensitivity, offset, gap, rms, converged = calibration.fit(DISTANCES, voltages)
+    assert np.all(converged)
+    assert remanence[0] * sensitivity[0] == pytest.approx(magnetNominal * 1.04 * sensorNominal, rel=1e-4)
+    # 1 Gauss is a far tighter tolerance relative to nominal than 1 mV/mT, so the sensitivity takes up the change
+    assert abs(remanence[0] - magnetNominal) < abs(sensitivity[0] / sensorNominal - 1) * magnetNominal
+
+    calibration.setTolerances()
+    with pytest.raises(ValueError):
+        calibration.fit(DISTANCES, voltages)
+
+
+def test_ignoresClippedAndMissing():
+    calibration = makeCalibration(amplified=True)
+    parameters, voltages = makeUnits(calibration)
+    reference = calibration.fit(DISTANCES, voltages)
+    # Readings that are missing, and readings pushed onto the rails, change nothing
+    damaged = voltages.copy()
+    damaged[::2, -3:] = np.nan
+    damaged[1::2, -3:] = 3.3
+    damaged[:, 0] = 0.0
+    fitted = calibration.fit(DISTANCES, damaged)
+    assert np.all(fitted[5])
+    for expected, actual in zip(reference[:4], fitted[:4]):
+        assert np.allclose(actual, expected, rtol=1e-6, atol=1e-6)
+
+
+def test_tooFewReadings():
+    # A unit needs at least one unclipped reading per free parameter
+    calibration = makeCalibration()
+    parameters, voltages = makeUnits(calibration)
+    voltages[0, 2:] = np.nan
+    converged = calibration.fit(DISTANCES, voltages)[5]
+    assert not converged[0] and np.all(converged[1:])
+
+
+def test_blockSizeDoesNotChangeFit():
+    calibration = makeCalibration()
+    parameters, voltages = makeUnits(calibration)
+    reference = calibration.fit(DISTANCES, voltages)
+    calibration.setBlockSize(7)
+    for expected, actual in zip(reference, calibration.fit(DISTANCES, voltages)):
+        assert np.allclose(actual, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_modelShapes():
+    calibration = makeCalibration()
+    assert calibration.model(DISTANCES).shape == DISTANCES.shape
+    assert calibration.model(DISTANCES, gap=[0.0, 0.1, 0.2]).shape == (3,) + DISTANCES.shape
+    assert np.array_equal(calibration.model(DISTANCES, gap=[0.0, 0.1])[0], calibration.model(DISTANCES))
+
+
+def test_invalidArguments():
+    with pytest.raises(ValueError):
+        Calibration(None, HallSensor(preset="DRV5055-A4"))
+    with pytest.raises(ValueError):
+        Calibration(makeMagnet(), None)
+    with pytest.raises(ValueError):
+        Calibration(makeMagnet(), HallSensor(preset="DRV5055-A4"), makeMagnet())
+    calibration = makeCalibration()
+    with pytest.raises(ValueError):
+        calibration.setFreeParameters("temperature")
+    with pytest.raises(ValueError):
+        calibration.fit(DISTANCES[:-1], np.zeros((3, DISTANCES.shape[0])))
+    calibration.setFreeParameters("remanence", "sensitivity")
+    with pytest.raises(ValueError):
+        calibration.fit(DISTANCES, np.zeros((3, DISTANCES.shape[0])))
+    assert all(column.shape == (0,) for column in makeCalibration().fit(DISTANCES, np.empty((0, DISTANCES.shape[0]))))
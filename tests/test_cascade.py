@@ -0,0 +1,128 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of filters and cascades: block processing matches the difference equation, streaming in chunks matches
+# processing at once, and settled outputs match the static (vOut) path.
+from Core import Backends
+from Core.Cascade import Cascade, LowPassFilter, streamAmplifiedSensor
+from Core.Amplifier import Amplifier
+from Core.HallSensor import HallSensor
+from Core.Magnet import Magnet
+from Core.FieldCalculations import calculateVoltage1D
+import pytest
+
+np = pytest.importorskip("numpy")
+
+SAMPLE_RATE = 10000.0
+# Chunk sizes shorter than, equal to and longer than the block size, and not a multiple of it
+CHUNKS = [1, 37, 256, 1000]
+FILTERS = [(1, None), (2, None), (2, 0.5), (2, 2.0)]
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeFilter(order, q, cutoff=300.0):
+    lowPass = LowPassFilter(SAMPLE_RATE)
+    lowPass.setCutoff(cutoff, order=order, q=q)
+    return lowPass
+
+
+def differenceEquation(lowPass, u):
+    # y[n] = sum(b[k] u[n - k]) - sum(a[k] y[n - k]), from rest
+    b, a = lowPass.getCoefficients()
+    y = np.zeros(u.shape[0])
+    for n in range(u.shape[0]):
+        y[n] = sum(b[k] * u[n - k] for k in range(len(b)) if n - k >= 0) - \
+            sum(a[k] * y[n - k] for k in range(1, len(a)) if n - k >= 0)
+    return y
+
+
+def signal(length=3000):
+    generator = np.random.default_rng(1)
+    return np.sin(np.arange(length) * 0.01) + 0.1 * generator.standard_normal(length)
+
+
+@pytest.mark.parametrize("order, q", FILTERS)
+def test_processMatchesDifferenceEquation(order, q):
+    lowPass = makeFilter(order, q)
+    u = signal()
+    assert np.allclose(lowPass.process(u), differenceEquation(lowPass, u), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("order, q", FILTERS)
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_chunksMatchOneShot(order, q, chunk):
+    u = signal()
+    expected = makeFilter(order, q).process(u)
+    lowPass = makeFilter(order, q)
+    streamed = np.concatenate([lowPass.process(u[start:start + chunk]) for start in range(0, u.shape[0], chunk)])
+    assert np.allclose(streamed, expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("order, q", FILTERS)
+def test_resetSettles(order, q):
+    # After a reset to vIn, a constant input of vIn stays at the settled output
+    lowPass = makeFilter(order, q)
+    lowPass.reset(2.0)
+    assert np.allclose(lowPass.process(np.full(500, 2.0)), lowPass.vOut(2.0), rtol=0, atol=1e-12)
+
+
+def test_firstOrderMatchesRC():
+    # A first order filter is exact for an RC network at the sample points
+    r, c = 10e3, 100e-9
+    lowPass = LowPassFilter(SAMPLE_RATE)
+    lowPass.setRC(r, c)
+    step = lowPass.process(np.ones(100))
+    times = np.arange(1, 101) / SAMPLE_RATE
+    assert np.allclose(step, 1 - np.exp(-times / (r * c)), rtol=0, atol=1e-12)
+    assert lowPass.getCutoff() == pytest.approx(1 / (2 * np.pi * r * c))
+
+
+def test_cutoffLimits():
+    lowPass = LowPassFilter(SAMPLE_RATE)
+    with pytest.raises(ValueError):
+        lowPass.setCutoff(SAMPLE_RATE / 2)
+    with pytest.raises(ValueError):
+        lowPass.setCutoff(100, order=3)
+    with pytest.raises(AttributeError):
+        lowPass.process([1.0])
+
+
+def makeCascade():
+    amplifier = Amplifier(preset="Diff-3.3-1.65-10")
+    return Cascade([makeFilter(1, None, 1000.0), amplifier, makeFilter(2, None)])
+
+
+def test_cascadeStaticPath():
+    # vOutArray (settled) matches vOut stage by stage, with filters at their DC gain
+    cascade = makeCascade()
+    vIns = np.linspace(1.4, 1.9, 51)
+    assert np.allclose(cascade.vOutArray(vIns), [cascade.vOut(v) for v in vIns], rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_cascadeChunksMatchOneShot(chunk):
+    u = 1.65 + 0.1 * signal()
+    expected = makeCascade().process(u)
+    cascade = makeCascade()
+    streamed = np.concatenate(list(cascade.processStream(u[start:start + chunk] for start in range(0, u.shape[0], chunk))))
+    assert np.allclose(streamed, expected, rtol=0, atol=1e-12)
+
+
+def test_cascadeResetSettles():
+    cascade = makeCascade()
+    cascade.reset(1.7)
+    assert np.allclose(cascade.process(np.full(300, 1.7)), cascade.vOut(1.7), rtol=0, atol=1e-12)
+
+
+def test_streamAmplifiedSensor():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    sensor = HallSensor(preset="DRV5055-A4")
+    distances = 20 + 5 * np.sin(np.arange(2000) * 0.005)
+    expected = makeCascade().process([calculateVoltage1D(magnet, sensor, distance) for distance in distances])
+    streamed = np.concatenate(list(streamAmplifiedSensor(magnet, sensor, makeCascade(), (distances[start:start + 300] for start in range(0, 2000, 300)))))
+    assert np.allclose(streamed, expected, rtol=0, atol=1e-12)
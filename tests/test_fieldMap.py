@@ -0,0 +1,113 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of field maps: the map does not depend on tiling or the number of processes, points inside the magnet are
+# NaN without warnings, and maps are returned in memory or written to the given file.
+import os
+import tempfile
+import warnings
+
+from Core import Backends
+from Core.FieldMap import calculateFieldMap
+from Core.FieldCalculations3D import calculate3DField
+from Core.Magnet import Magnet
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# Through the magnet, so the map has points inside the magnet and on its edges
+HORIZONTAL = (-6.0, 6.0)
+VERTICAL = (-4.0, 8.0)
+RESOLUTION = (41, 37)
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet(shape="cylinder"):
+    magnet = Magnet()
+    if shape == "cylinder":
+        magnet.setCylinderSize(6, 3)
+    elif shape == "cubic":
+        magnet.setCubicSize(6, 4, 3)
+    elif shape == "ring":
+        magnet.setRingSize(6, 2, 3)
+    else:
+        magnet.setSphereSize(6)
+    magnet.setGrade("N52")
+    return magnet
+
+
+@pytest.mark.parametrize("component", ["magnitude", "z", "vector"])
+def test_parallelMatchesSerial(component):
+    magnet = makeMagnet()
+    serial = calculateFieldMap(magnet, HORIZONTAL, VERTICAL, RESOLUTION, component=component, tileSize=16, processes=1)
+    parallel = calculateFieldMap(magnet, HORIZONTAL, VERTICAL, RESOLUTION, component=component, tileSize=16, processes=2)
+    assert np.array_equal(serial, parallel, equal_nan=True)
+
+
+def test_tilingDoesNotChangeMap():
+    magnet = makeMagnet()
+    whole = calculateFieldMap(magnet, HORIZONTAL, VERTICAL, RESOLUTION, processes=1)
+    tiled = calculateFieldMap(magnet, HORIZONTAL, VERTICAL, RESOLUTION, tileSize=7, processes=1)
+    # Same points, but numpy may vectorize tiles of other shapes differently, so only rounding differs
+    assert np.array_equal(np.isnan(whole), np.isnan(tiled))
+    assert np.allclose(whole, tiled, rtol=1e-12, atol=0, equal_nan=True)
+
+
+def test_matchesCalculate3DField():
+    magnet = makeMagnet()
+    field = calculateFieldMap(magnet, (-3.0, 3.0), (1.0, 7.0), (7, 7), plane="xz", offset=0.5, component="vector", processes=1)
+    x, z = np.meshgrid(np.linspace(-3, 3, 7), np.linspace(1, 7, 7))
+    points = np.stack((x, np.full_like(x, 0.5), z), axis=-1)
+    assert np.allclose(field, calculate3DField(magnet, points) * 1000, rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize("shape", ["cylinder", "cubic", "ring", "sphere"])
+def test_insideIsNaNWithoutWarnings(shape):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        field = calculateFieldMap(makeMagnet(shape), HORIZONTAL, VERTICAL, RESOLUTION, processes=1)
+    # The middle column is x = 0, rows below z = 0 pass through the magnet (or the bore of the ring)
+    column = field[:, RESOLUTION[0] // 2]
+    below = np.linspace(*VERTICAL, RESOLUTION[1]) < -0.5
+    if shape == "ring":
+        assert np.all(np.isfinite(column[below]))
+    else:
+        assert np.all(np.isnan(column[below & (np.linspace(*VERTICAL, RESOLUTION[1]) > -2.5)]))
+    # Well above the magnet the field is finite
+    assert np.all(np.isfinite(field[-5:]))
+
+
+def test_inMemoryLeavesNoFile(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    for processes in (1, 2):
+        field = calculateFieldMap(makeMagnet(), HORIZONTAL, VERTICAL, RESOLUTION, tileSize=16, processes=processes)
+        assert type(field) is np.ndarray
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_writesToPath(tmp_path, processes):
+    path = str(tmp_path / "map.npy")
+    field = calculateFieldMap(makeMagnet(), HORIZONTAL, VERTICAL, RESOLUTION, tileSize=16, processes=processes,
+                              path=path, dtype="float32")
+    assert isinstance(field, np.memmap)
+    assert field.dtype == np.float32 and field.shape == (RESOLUTION[1], RESOLUTION[0])
+    expected = calculateFieldMap(makeMagnet(), HORIZONTAL, VERTICAL, RESOLUTION, processes=1)
+    assert np.array_equal(np.load(path), expected.astype(np.float32), equal_nan=True)
+
+
+def test_invalidArguments():
+    magnet = makeMagnet()
+    with pytest.raises(ValueError):
+        calculateFieldMap(None, HORIZONTAL, VERTICAL, RESOLUTION)
+    with pytest.raises(ValueError):
+        calculateFieldMap(magnet, HORIZONTAL, VERTICAL, RESOLUTION, plane="xx")
+    with pytest.raises(ValueError):
+        calculateFieldMap(magnet, HORIZONTAL, VERTICAL, RESOLUTION, component="w")
+    with pytest.raises(ValueError):
+        calculateFieldMap(magnet, HORIZONTAL, VERTICAL, (0, 10))
+    with pytest.raises(ValueError):
+        calculateFieldMap(magnet, HORIZONTAL, VERTICAL, RESOLUTION, dtype="float16")
@@ -0,0 +1,92 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of hall effect switches and latches: hysteresis, state carried between calls and chunks, and the response
+# time delay of sampled outputs.
+from Core.HallSwitch import HallSwitch
+from Core.FieldCalculations import sweepSwitch
+from Core.Magnet import Magnet
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# A triangle wave through both thresholds of every preset
+FIELDS = np.concatenate((np.linspace(-30, 30, 301), np.linspace(30, -30, 301)))
+PRESETS = ["DRV5013-AD", "DRV5013-BC", "DRV5023-FA", "DRV5033-FA"]
+
+
+@pytest.mark.parametrize("preset", PRESETS)
+def test_statesMatchVoltage(preset):
+    # The array comparator follows the same hysteresis as consecutive scalar calls
+    reference, switch = HallSwitch(preset), HallSwitch(preset)
+    vOperate, vRelease = reference.getOutput()
+    expected = [reference.voltage(field) == vOperate for field in FIELDS]
+    assert switch.statesArray(FIELDS).tolist() == expected
+    assert switch.isOperated() == reference.isOperated()
+
+
+@pytest.mark.parametrize("preset", PRESETS)
+def test_chunksMatchOneShot(preset):
+    oneShot, chunked = HallSwitch(preset), HallSwitch(preset)
+    expected = oneShot.statesArray(FIELDS, sampleRate=1e6)
+    states = np.concatenate([chunked.statesArray(FIELDS[start:start + 37], sampleRate=1e6) for start in range(0, FIELDS.shape[0], 37)])
+    assert np.array_equal(states, expected)
+
+
+def test_hysteresis():
+    switch = HallSwitch("DRV5023-FA")
+    bop, brp = switch.getThresholds()
+    # Between the thresholds the output holds its previous state
+    assert switch.statesArray([0.0, (bop + brp) / 2, bop, (bop + brp) / 2, brp, (bop + brp) / 2]).tolist() == \
+        [False, False, True, True, False, False]
+
+
+def test_delay():
+    # The output lags the comparator by the response time, in whole samples
+    switch, delayed = HallSwitch("DRV5013-AD"), HallSwitch("DRV5013-AD")
+    sampleRate = 1e6
+    delay = int(round(delayed.getResponseTime() * sampleRate))
+    states = switch.statesArray(FIELDS)
+    lagged = delayed.statesArray(FIELDS, sampleRate)
+    assert delay > 0
+    assert lagged[:delay].tolist() == [False] * delay
+    assert np.array_equal(lagged[delay:], states[:-delay])
+
+
+def test_delayAfterUndelayedCall():
+    # A delay line that starts after an undelayed call is filled with the state before the chunk, not the initial state
+    switch = HallSwitch("DRV5013-AD")
+    bop, brp = switch.getThresholds()
+    assert switch.statesArray([bop + 1]).tolist() == [True]
+    states = switch.statesArray([0.0] * 20, sampleRate=1e6)
+    assert states.tolist() == [True] * 20
+
+
+def test_delayGrowsWithSampleRate():
+    # Raising the sample rate lengthens the delay line with the state before the chunk
+    switch = HallSwitch("DRV5013-AD")
+    bop, brp = switch.getThresholds()
+    switch.statesArray([bop + 1] * 20, sampleRate=1e5)
+    states = switch.statesArray([0.0] * 20, sampleRate=1e6)
+    assert states.tolist() == [True] * 20
+
+
+def test_reset():
+    switch = HallSwitch("DRV5013-AD")
+    switch.setInitialState(True)
+    bop, brp = switch.getThresholds()
+    switch.statesArray([brp - 1])
+    assert not switch.isOperated()
+    switch.reset()
+    assert switch.isOperated()
+
+
+def test_sweepSwitchHysteresis():
+    # The magnet approaches then retreats, the release point is farther away than the operate point for a switch
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    distance, strength, voltage, switchPoints = sweepSwitch(magnet, 1, 40, HallSwitch("DRV5023-FA"))
+    assert len(switchPoints) == 2
+    (operateDistance, operated), (releaseDistance, released) = switchPoints
+    assert operated and not released
+    assert releaseDistance > operateDistance
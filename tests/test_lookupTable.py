@@ -0,0 +1,125 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of firmware lookup tables: generated tables keep the position error within the bound against the chain
+# itself, survive the binary format unchanged, and the C header looks up the same distances as distance().
+import shutil
+import subprocess
+
+from Core import Backends
+from Core.LookupTable import LookupTable, generateLookupTable, readLookupTable
+from Core.FieldCalculations import calculateVoltage1D
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+import pytest
+
+np = pytest.importorskip("numpy")
+
+BITS = 12
+VREF = 3.3
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def makeTable(amplified=False, maxError=0.05):
+    amplifier = Amplifier(preset="Diff-3.3-1.65-10") if amplified else None
+    return generateLookupTable(makeMagnet(), HallSensor(preset="DRV5055-A4"), amplifier, 5, 40, BITS, maxError)
+
+
+def chainVoltage(distance, amplified):
+    voltage = calculateVoltage1D(makeMagnet(), HallSensor(preset="DRV5055-A4"), distance)
+    return Amplifier(preset="Diff-3.3-1.65-10").vOut(voltage) if amplified else voltage
+
+
+@pytest.mark.parametrize("amplified", [False, True])
+def test_errorWithinBound(amplified):
+    table = makeTable(amplified)
+    assert table.getMaxError() <= 0.05
+    # Checked with the scalar model: the output at the table distance, moved by the bound either way, brackets the
+    # center of the code
+    codes = np.linspace(table.getCodes()[0], table.getCodes()[-1], 60).astype(int)
+    for code, distance in zip(codes, table.distance(codes)):
+        target = (code + 0.5) * VREF / 2 ** BITS
+        near, far = chainVoltage(distance - 0.05, amplified), chainVoltage(distance + 0.05, amplified)
+        assert min(near, far) <= target <= max(near, far)
+
+
+def test_tighterBoundNeedsMorePoints():
+    loose, tight = makeTable(maxError=0.2), makeTable(maxError=0.02)
+    assert len(tight) > len(loose)
+    assert tight.getMaxError() <= 0.02 and loose.getMaxError() <= 0.2
+
+
+def test_firmwareInterpolation():
+    table = LookupTable([100, 200, 260], [0, -7, 50], 12, 0.5)
+    # C integer math, rounding to the nearest step: -3.01 to -3, -3.5 to -4 and 28.5 to 29, half away from zero
+    assert table.distance([100, 143, 150, 200, 230, 260]).tolist() == [0.0, -1.5, -2.0, -3.5, 11.0, 25.0]
+    # Codes outside the table use the first or last entry
+    assert table.distance([0, 4095]).tolist() == [0.0, 25.0]
+    assert table.getDistances() == [0.0, -3.5, 25.0]
+
+
+@pytest.mark.parametrize("bits", [12, 20])
+def test_binaryRoundTrip(tmp_path, bits):
+    table = LookupTable([3, 1000, 2 ** bits - 1], [40000, 20000, 5000], bits, 0.001)
+    copy = readLookupTable(table.toBytes())
+    assert copy.getCodes() == table.getCodes() and copy.getDistances() == table.getDistances()
+    assert copy.getBits() == bits and copy.getResolution() == 0.001
+    # 18 byte header, 2 or 4 bytes per code and 4 per distance
+    assert len(table.toBytes()) == 18 + 3 * (2 if bits <= 16 else 4) + 3 * 4
+
+    path = str(tmp_path / "table.bin")
+    table.writeBinary(path)
+    assert readLookupTable(path).getCodes() == table.getCodes()
+    with pytest.raises(ValueError):
+        readLookupTable(b"MTXX" + table.toBytes()[4:])
+
+
+def test_generatedRoundTrip():
+    table = makeTable(amplified=True)
+    copy = readLookupTable(table.toBytes())
+    codes = np.arange(0, 2 ** BITS)
+    assert np.array_equal(copy.distance(codes), table.distance(codes))
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="needs a C compiler")
+def test_cHeaderMatchesDistance(tmp_path):
+    table = makeTable(amplified=True)
+    table.writeCHeader(str(tmp_path / "table.h"), name="test_lut")
+    source = tmp_path / "main.c"
+    source.write_text("#include <stdio.h>\n#include \"table.h\"\n"
+                      "int main(void) { for (uint32_t code = 0; code < " + str(2 ** BITS) + "; code++) "
+                      "printf(\"%d\\n\", (int)test_lut_lookup((uint16_t)code)); return 0; }\n")
+    program = str(tmp_path / "main")
+    subprocess.check_call(["cc", "-std=c99", "-Wall", "-Werror", "-o", program, str(source)])
+    steps = [int(line) for line in subprocess.check_output([program]).split()]
+    expected = table.distance(np.arange(2 ** BITS)) / table.getResolution()
+    assert np.array_equal(steps, np.rint(expected))
+
+
+def test_invalidArguments():
+    magnet, sensor = makeMagnet(), HallSensor(preset="DRV5055-A4")
+    with pytest.raises(ValueError):
+        LookupTable([1, 1], [0, 0], 12, 0.001)
+    with pytest.raises(ValueError):
+        LookupTable([1, 2], [0], 12, 0.001)
+    with pytest.raises(ValueError):
+        generateLookupTable(magnet, sensor, None, 5, 40, BITS, 0.001)
+    with pytest.raises(ValueError):
+        generateLookupTable(None, sensor, None, 5, 40, BITS, 0.05)
+    # The output passes through a maximum at the magnet face of a ring, so it is not monotonic
+    ring = Magnet()
+    ring.setRingSize(10, 6, 3)
+    ring.setGrade("N52")
+    with pytest.raises(ValueError):
+        generateLookupTable(ring, sensor, None, 0, 20, BITS, 0.05)
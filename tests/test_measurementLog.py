@@ -0,0 +1,136 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of measurement logs: chunked statistics match statistics of all residuals at once, logs are read the same
+# whatever the chunk size or format, and a log generated from the model compares with zero residual.
+from Core import Backends
+from Core.MeasurementLog import readLog, ResidualStatistics, compareStream, compareLog
+from Core.FieldCalculations import calculateVoltage1D
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+import pytest
+
+np = pytest.importorskip("numpy")
+
+CHUNKS = [1, 7, 1000, 100000]
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def residuals(count=5000):
+    # Large offset and small spread, where a naive sum of squares loses the variance
+    return 1e3 + 0.01 * np.random.default_rng(0).standard_normal(count)
+
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_chunkedStatistics(chunk):
+    values = residuals()
+    statistics = ResidualStatistics(low=1e3 - 0.02, high=1e3 + 0.02, bins=40)
+    for start in range(0, values.shape[0], chunk):
+        statistics.update(values[start:start + chunk])
+    assert statistics.getCount() == values.shape[0]
+    assert statistics.getMean() == pytest.approx(values.mean(), rel=1e-14)
+    assert statistics.getStandardDeviation() == pytest.approx(values.std(), rel=1e-9)
+    assert statistics.getRMS() == pytest.approx(np.sqrt(np.mean(values ** 2)), rel=1e-12)
+
+    counts, edges, underflow, overflow = statistics.getHistogram()
+    assert np.array_equal(counts, np.histogram(values, bins=edges)[0])
+    assert underflow == (values < edges[0]).sum() and overflow == (values > edges[-1]).sum()
+    assert counts.sum() + underflow + overflow == values.shape[0]
+
+
+def test_merge():
+    values = residuals()
+    whole, first, second = ResidualStatistics(), ResidualStatistics(), ResidualStatistics()
+    whole.update(values)
+    first.update(values[:1234])
+    second.update(values[1234:])
+    first.merge(second)
+    assert first.getCount() == whole.getCount()
+    assert first.getMean() == pytest.approx(whole.getMean(), rel=1e-14)
+    assert first.getStandardDeviation() == pytest.approx(whole.getStandardDeviation(), rel=1e-9)
+    assert np.array_equal(first.getHistogram()[0], whole.getHistogram()[0])
+    with pytest.raises(ValueError):
+        first.merge(ResidualStatistics(bins=10))
+
+
+def test_skippedAndWorst():
+    statistics = ResidualStatistics()
+    statistics.update([0.01, np.nan, -0.05], distances=[5.0, 6.0, 7.0])
+    statistics.update([0.02, np.inf], distances=[8.0, 9.0])
+    assert statistics.getCount() == 3 and statistics.getSkipped() == 2
+    assert statistics.getWorst() == (-0.05, 7.0)
+    assert ResidualStatistics().getStandardDeviation() == 0.0
+    with pytest.raises(ValueError):
+        ResidualStatistics(low=0.1, high=-0.1)
+
+
+def writeCSV(path, distances, voltages, header=True):
+    with open(path, "w") as log:
+        log.write("# bench log\n")
+        if header:
+            log.write("time,distance,voltage\n")
+        for index, (distance, voltage) in enumerate(zip(distances, voltages)):
+            log.write("%d,%r,%r\n" % (index, float(distance), float(voltage)))
+
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_readCSV(tmp_path, chunk):
+    distances, voltages = np.linspace(5, 40, 1001), np.linspace(0, 3, 1001)
+    path = str(tmp_path / "log.csv")
+    writeCSV(path, distances, voltages)
+    chunks = list(readLog(path, columns=("distance", "voltage"), chunkSize=chunk))
+    assert all(chunkDistances.shape[0] <= chunk for chunkDistances, chunkVoltages in chunks)
+    assert np.array_equal(np.concatenate([chunkDistances for chunkDistances, chunkVoltages in chunks]), distances)
+    assert np.array_equal(np.concatenate([chunkVoltages for chunkDistances, chunkVoltages in chunks]), voltages)
+
+    # Without a header the first line is data, columns are selected by index
+    writeCSV(path, distances, voltages, header=False)
+    chunks = list(readLog(path, columns=(1, 2), chunkSize=chunk))
+    assert np.array_equal(np.concatenate([chunkDistances for chunkDistances, chunkVoltages in chunks]), distances)
+    with pytest.raises(ValueError):
+        list(readLog(path, columns=("distance", "voltage")))
+
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+def test_readBinary(tmp_path, chunk):
+    records = np.column_stack((np.linspace(5, 40, 1001), np.zeros(1001), np.linspace(0, 3, 1001))).astype("<f4")
+    path = str(tmp_path / "log.bin")
+    records.tofile(path)
+    chunks = list(readLog(path, columns=(0, 2), chunkSize=chunk, dtype="<f4", recordLength=3))
+    assert np.array_equal(np.concatenate([chunkDistances for chunkDistances, chunkVoltages in chunks]), records[:, 0])
+    assert np.array_equal(np.concatenate([chunkVoltages for chunkDistances, chunkVoltages in chunks]), records[:, 2])
+    with pytest.raises(ValueError):
+        list(readLog(path, columns=(0, 2), dtype="<f4", recordLength=4))
+
+
+def test_unknownFormat(tmp_path):
+    with pytest.raises(ValueError):
+        readLog(str(tmp_path / "log.xyz"))
+
+
+def test_modelLogHasNoResidual(tmp_path):
+    magnet, sensor = makeMagnet(), HallSensor(preset="DRV5055-A4")
+    distances = np.linspace(5, 40, 2001)
+    voltages = [calculateVoltage1D(magnet, sensor, distance) for distance in distances]
+    path = str(tmp_path / "log.csv")
+    writeCSV(path, distances, voltages)
+    statistics = compareLog(path, magnet, sensor, columns=("distance", "voltage"), chunkSize=300)
+    assert statistics.getCount() == distances.shape[0]
+    assert abs(statistics.getWorst()[0]) < 1e-12
+
+    # An offset in the measurements shows up as the mean residual
+    offset = compareStream([(distances, np.asarray(voltages) + 0.01)], magnet, sensor)
+    assert offset.getMean() == pytest.approx(0.01, rel=1e-9)
+    assert offset.getStandardDeviation() < 1e-12
+    with pytest.raises(ValueError):
+        compareStream([], None, sensor)
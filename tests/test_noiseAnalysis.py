@@ -0,0 +1,144 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of the noise analysis: the analytic signal matches finite differences of the output, each noise source
+# scales as specified, and clipped outputs have infinite resolution without warnings.
+import warnings
+
+from Core import Backends
+from Core.NoiseAnalysis import NoiseAnalysis
+from Core.FieldCalculations import calculateVoltage1D
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+import pytest
+
+np = pytest.importorskip("numpy")
+
+BANDWIDTH = 1000.0
+# Close enough that the most sensitive sensor and the amplified output clip
+DISTANCES = np.linspace(4, 40, 73)
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def makeChain():
+    sensors = [HallSensor(preset="DRV5055-A1"), HallSensor(preset="DRV5055-A4"), HallSensor(preset="DRV5055-A4")]
+    for sensor in sensors:
+        sensor.setNoiseDensity(130)
+    amplifier = Amplifier(preset="Diff-3.3-1.65-10")
+    amplifier.setNoiseDensity(20)
+    return sensors, [None, None, amplifier]
+
+
+def chainOutput(sensor, amplifier, distance):
+    voltage = calculateVoltage1D(makeMagnet(), sensor, distance)
+    return voltage if amplifier is None else amplifier.vOut(voltage)
+
+
+def test_outputMatchesScalarModel():
+    sensors, amplifiers = makeChain()
+    result = NoiseAnalysis(BANDWIDTH).analyze(makeMagnet(), DISTANCES, sensors, amplifiers)
+    expected = [[chainOutput(sensor, amplifier, distance) for distance in DISTANCES] for sensor, amplifier in zip(sensors, amplifiers)]
+    assert np.allclose(result["output"], expected, rtol=1e-12, atol=0)
+
+
+def test_signalMatchesFiniteDifferences():
+    sensors, amplifiers = makeChain()
+    result = NoiseAnalysis(BANDWIDTH).analyze(makeMagnet(), DISTANCES, sensors, amplifiers)
+    step = 1e-5
+    for row, (sensor, amplifier) in enumerate(zip(sensors, amplifiers)):
+        difference = np.array([(chainOutput(sensor, amplifier, distance + step) - chainOutput(sensor, amplifier, distance - step)) / (2 * step)
+                               for distance in DISTANCES])
+        linear = result["signal"][row] != 0
+        assert np.allclose(result["signal"][row][linear], difference[linear], rtol=1e-6, atol=1e-9)
+        # Where the output is clipped it does not move
+        assert np.all(difference[~linear] == 0)
+    assert np.any(result["signal"][0] == 0) and np.any(result["signal"][2] == 0) and np.all(result["signal"][1] != 0)
+
+
+def test_noiseSources():
+    sensors, amplifiers = makeChain()
+    analysis = NoiseAnalysis(BANDWIDTH)
+    analysis.setADC(12)
+    result = analysis.analyze(makeMagnet(), DISTANCES, sensors, amplifiers)
+    root = BANDWIDTH ** 0.5
+    gain = Amplifier(preset="Diff-3.3-1.65-10").gainArray(result["output"][1])
+    linear = result["signal"][2] != 0
+
+    # Sensor noise is its magnetic noise through the sensitivity, and the amplifier gain after it
+    assert np.allclose(result["sensorNoise"][1], sensors[1].getSensitivity() * 130e-6 * root, rtol=1e-12)
+    assert np.allclose(result["sensorNoise"][2][linear], result["sensorNoise"][1][linear] * gain[linear], rtol=1e-12)
+    assert np.all(result["amplifierNoise"][:2] == 0)
+    assert np.allclose(result["amplifierNoise"][2][linear], gain[linear] * 20e-9 * root, rtol=1e-12)
+    assert np.all(result["adcNoise"] == 3.3 / 2 ** 12 / 12 ** 0.5)
+    total = np.sqrt(result["sensorNoise"] ** 2 + result["amplifierNoise"] ** 2 + result["adcNoise"] ** 2)
+    assert np.allclose(result["noise"], total, rtol=1e-12)
+    moving = result["signal"] != 0
+    assert np.allclose(result["resolution"][moving], total[moving] / np.abs(result["signal"][moving]), rtol=1e-12)
+
+    # Noise adds in quadrature, a wider bandwidth raises the resolution by its square root
+    analysis.setADC(None)
+    narrow = analysis.analyze(makeMagnet(), DISTANCES, sensors, amplifiers)["resolution"]
+    analysis.setBandwidth(4 * BANDWIDTH)
+    wide = analysis.analyze(makeMagnet(), DISTANCES, sensors, amplifiers)["resolution"]
+    assert np.allclose(wide[np.isfinite(wide)], 2 * narrow[np.isfinite(narrow)], rtol=1e-12)
+
+
+def test_clippedIsInfiniteWithoutWarnings():
+    sensors, amplifiers = makeChain()
+    # Without noise sources clipped outputs have zero noise and zero signal
+    noiseless = [HallSensor(preset="DRV5055-A4"), HallSensor(preset="DRV5055-A4")]
+    for sensor in noiseless:
+        sensor.setNoiseDensity(0)
+    analysis = NoiseAnalysis(BANDWIDTH)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = analysis.analyze(makeMagnet(), DISTANCES, sensors, amplifiers)
+        quiet = analysis.analyze(makeMagnet(), DISTANCES, noiseless, [None, Amplifier(preset="Diff-3.3-1.65-10")])
+    clipped = result["signal"][2] == 0
+    assert np.all(np.isinf(result["resolution"][2][clipped])) and np.all(np.isfinite(result["resolution"][2][~clipped]))
+    assert np.all(np.isinf(quiet["resolution"][1][quiet["signal"][1] == 0]))
+    assert np.all(quiet["resolution"][0] == 0)
+
+    # Outputs outside the ADC range are clipped by the ADC
+    analysis.setADC(12, vRef=2.0)
+    limited = analysis.analyze(makeMagnet(), DISTANCES, sensors, amplifiers)
+    assert np.all(np.isinf(limited["resolution"][limited["output"] >= 2.0]))
+
+
+def test_sharedAmplifier():
+    # One amplifier used by several rows gives the same result as one amplifier per row
+    sensors, amplifiers = makeChain()
+    shared = NoiseAnalysis(BANDWIDTH).analyze(makeMagnet(), DISTANCES, sensors, [amplifiers[2]] * 3)
+    separate = NoiseAnalysis(BANDWIDTH).analyze(makeMagnet(), DISTANCES, sensors, [Amplifier(preset="Diff-3.3-1.65-10") for sensor in sensors])
+    assert np.array_equal(shared["output"], separate["output"])
+    assert np.array_equal(shared["signal"], separate["signal"])
+
+
+def test_sweepResolution():
+    sensors, amplifiers = makeChain()
+    distance, resolution = NoiseAnalysis(BANDWIDTH).sweepResolution(makeMagnet(), 1, 40, sensors, amplifiers)
+    assert distance.shape == (390,) and resolution.shape == (3, 390)
+    assert np.array_equal(resolution, NoiseAnalysis(BANDWIDTH).analyze(makeMagnet(), distance, sensors, amplifiers)["resolution"])
+
+
+def test_invalidArguments():
+    with pytest.raises(ValueError):
+        NoiseAnalysis(0)
+    analysis = NoiseAnalysis(BANDWIDTH)
+    with pytest.raises(ValueError):
+        analysis.setADC(0)
+    with pytest.raises(ValueError):
+        analysis.analyze(makeMagnet(), DISTANCES, [HallSensor(preset="DRV5055-A4")], [None, None])
+    with pytest.raises(ValueError):
+        analysis.analyze(None, DISTANCES, [HallSensor(preset="DRV5055-A4")])
@@ -0,0 +1,217 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Float32 error bounds of every available array backend against the float64 reference, over every magnet shape
+# (including thin and far away geometries), sensor type and amplifier type. Errors are measured in units of float32
+# eps, relative to the scales given at the top of Backends.py.
+import math
+
+from Core import Backends
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor, _OUTPUT_LIMITS
+from Core.Amplifier import Amplifier
+from Core.FieldCalculations import sweepSensors, sweepAmplifiedSensors
+from Core.Calibration import Calibration
+from Core.NoiseAnalysis import NoiseAnalysis
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# Largest allowed error, in float32 eps
+BOUND = 8
+EPS = float(np.finfo(np.float32).eps)
+STRENGTH = 1.46
+
+# Distances from 0.05 to 2000, covering the near field and the far field where the reference formulas cancel
+DISTANCES = np.geomspace(0.05, 2000, 2000)
+FIELDS = np.linspace(-200, 200, 4001)
+INPUTS = np.linspace(-3.3, 3.3, 6601)
+
+GEOMETRIES = [("cylinder", (6, 1)), ("cylinder", (1, 20)), ("cylinder", (20, 0.1)),
+              ("cubic", (6, 4, 3)), ("cubic", (6, 4, 0.3)), ("cubic", (50, 1, 1)),
+              ("ring", (6, 3, 6)), ("ring", (10, 9.9, 3)), ("ring", (20, 2, 0.2)),
+              ("sphere", (6,))]
+AMPLIFIERS = [("diff", 10, 1.65), ("noninv", 3, None), ("inv", -2, None), ("log", None, None), ("diffLog", None, 1.65)]
+DIODE = (0.026, 7e-9, 100)
+
+
+@pytest.fixture(params=[name for name in Backends.availableBackends() if name != "python"])
+def backend(request):
+    return Backends._instance(request.param)
+
+
+@pytest.fixture
+def precision(monkeypatch):
+    # Selects the precision for the rest of the test, restored afterwards
+    def select(name):
+        monkeypatch.setattr(Backends, "_precision", name)
+    select("float64")
+    return select
+
+
+def geometryId(geometry):
+    return geometry[0] + "-" + "x".join(str(size) for size in geometry[1])
+
+
+def fieldTruth(shape, dimensions):
+    # Float64 field and the scale its error is measured against
+    if shape == "sphere":
+        field = Backends._instance("numpy").field1D(shape, dimensions, STRENGTH, DISTANCES)
+    else:
+        field = Backends._stableField1D(np, shape, dimensions, STRENGTH, DISTANCES)
+    scale = np.abs(field)
+    if shape == "ring":
+        # Outer and inner cylinders
+        diameter, iDiameter, thickness = dimensions
+        scale = sum(np.abs(Backends._stableField1D(np, "cylinder", (part, thickness), STRENGTH, DISTANCES)) for part in (diameter, iDiameter))
+    return field, scale
+
+
+def slopeTruth(shape, dimensions):
+    # Float64 field slope and the scale its error is measured against
+    if shape in ("cylinder", "ring"):
+        slope = Backends._stableField1DSlope(np, shape, dimensions, STRENGTH, DISTANCES)
+    else:
+        slope = Backends._instance("numpy").field1DSlope(shape, dimensions, STRENGTH, DISTANCES)
+    scale = np.abs(slope)
+    if shape == "ring":
+        diameter, iDiameter, thickness = dimensions
+        scale = sum(np.abs(Backends._stableField1DSlope(np, "cylinder", (part, thickness), STRENGTH, DISTANCES)) for part in (diameter, iDiameter))
+    elif shape == "cubic":
+        # The cubic slope subtracts two terms, its error is relative to the larger one
+        length, width, thickness = dimensions
+        sides = length ** 2 + width ** 2
+
+        def atanSlope(z):
+            root = np.sqrt(4 * z ** 2 + sides)
+            u = (length * width) / (2 * z * root)
+            return (length * width / 2) * (8 * z ** 2 + sides) / ((1 + u ** 2) * z ** 2 * root ** 3)
+
+        scale = (STRENGTH / math.pi) * (atanSlope(DISTANCES) + atanSlope(thickness + DISTANCES))
+    return slope, scale
+
+
+def assertWithinBound(actual, expected, scale, valid=None):
+    assert actual.dtype == np.float32
+    ratio = np.abs(actual.astype(float) - expected) / (EPS * np.maximum(scale, 1e-300))
+    if valid is not None:
+        ratio = ratio[valid]
+    assert ratio.shape[0] > 0
+    assert float(np.max(ratio)) <= BOUND
+
+
+@pytest.mark.parametrize("geometry", GEOMETRIES, ids=geometryId)
+def test_field1D(backend, precision, geometry):
+    shape, dimensions = geometry
+    expected, scale = fieldTruth(shape, dimensions)
+    precision("float32")
+    assertWithinBound(backend.field1D(shape, dimensions, STRENGTH, DISTANCES), expected, scale)
+
+
+@pytest.mark.parametrize("geometry", GEOMETRIES, ids=geometryId)
+def test_field1DSlope(backend, precision, geometry):
+    shape, dimensions = geometry
+    expected, scale = slopeTruth(shape, dimensions)
+    precision("float32")
+    assertWithinBound(backend.field1DSlope(shape, dimensions, STRENGTH, DISTANCES), expected, scale)
+
+
+@pytest.mark.parametrize("sensorType", sorted(_OUTPUT_LIMITS))
+def test_sensorVoltage(backend, precision, sensorType):
+    limits = _OUTPUT_LIMITS[sensorType]
+    vQ, vMin, vMax = limits
+    expected = backend.sensorVoltage(limits, 0.025, -150, 150, FIELDS)
+    precision("float32")
+    actual = backend.sensorVoltage(limits, 0.025, -150, 150, FIELDS)
+    # Outputs within a few eps of a clipping limit may clip differently
+    valid = (np.abs(expected - vMin) > 1e-5) & (np.abs(expected - vMax) > 1e-5) & (np.abs(np.abs(FIELDS) - 150) > 1e-4)
+    assertWithinBound(actual, expected, abs(vQ) + np.abs(FIELDS * 0.025), valid)
+
+
+@pytest.mark.parametrize("ampType, gain, diffVoltage", AMPLIFIERS)
+def test_amplifierOut(backend, precision, ampType, gain, diffVoltage):
+    offset = diffVoltage or 0.0
+    vIns = INPUTS
+    if ampType in ("log", "diffLog"):
+        # Inputs that round onto the diff voltage in float32 are outside of the log domain
+        vIns = INPUTS[INPUTS > offset + 1e-4]
+    expected = backend.amplifierOut(ampType, gain, diffVoltage, DIODE, -3.3, 3.3, vIns)
+    precision("float32")
+    actual = backend.amplifierOut(ampType, gain, diffVoltage, DIODE, -3.3, 3.3, vIns)
+    # Rounding the input to float32 moves it by eps relative to its magnitude, scaled by the gain
+    if ampType in ("log", "diffLog"):
+        scale = 0.026 * (np.abs(vIns) + offset) / (vIns - offset) + np.abs(expected)
+    else:
+        scale = abs(gain) * (np.abs(vIns) + offset)
+    valid = np.abs(np.abs(expected) - 3.3) > 1e-5
+    assertWithinBound(actual, expected, scale, valid)
+
+
+@pytest.mark.parametrize("name", ["float64", "float32"])
+def test_sweepPrecision(precision, name):
+    # The sweeps follow the selected precision, float64 returns lists
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    sensors = [HallSensor(preset="DRV5055-A1"), HallSensor(preset="DRV5055-A3")]
+    amplifiers = [Amplifier(preset="Diff-3.3-1.65-10")] * 2
+    reference = sweepAmplifiedSensors(magnet, 1, 50, sensors, amplifiers, precision="float64")
+    precision(name)
+    for results in (sweepSensors(magnet, 1, 50, sensors), sweepAmplifiedSensors(magnet, 1, 50, sensors, amplifiers)):
+        distance, strength, voltages = results
+        if name == "float64":
+            assert isinstance(distance, list) and isinstance(voltages[0], list)
+        else:
+            assert distance.dtype == strength.dtype == voltages.dtype == np.float32
+            assert voltages.shape == (len(sensors), len(distance))
+    assert np.array_equal(voltages, np.asarray(reference[2], dtype=name))
+
+
+def makeChain():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    return magnet, HallSensor(preset="DRV5055-A3"), Amplifier(preset="Diff-3.3-1.65-10")
+
+
+@pytest.mark.parametrize("name", ["float64", "float32"])
+def test_gainArrayRails(precision, name):
+    # Outputs on the rails are clipped, their gain is 0 whatever the precision
+    amplifier = Amplifier(preset="Diff-3.3-1.65-10")
+    precision(name)
+    # 1.98 V drives the output exactly onto the upper rail, which float32 rounds to 3.2999999523
+    gain = amplifier.gainArray([1.0, 1.7, 1.9, 1.98, 3.0])
+    assert list(gain) == [0.0, 10.0, 10.0, 0.0, 0.0]
+
+
+def test_fitFloat32(precision):
+    # The fit runs in float64, so selecting float32 gives the same result
+    magnet, sensor, amplifier = makeChain()
+    calibration = Calibration(magnet, sensor, amplifier)
+    generator = np.random.default_rng(0)
+    units = 200
+    distances = np.arange(5, 40, 1.0)
+    remanence = magnet.getStrengthGauss() * (1 + 0.02 * generator.standard_normal(units))
+    offset = 0.01 * generator.standard_normal(units)
+    gap = 0.2 * generator.standard_normal(units)
+    voltages = calibration.model(distances, remanence=remanence, offset=offset, gap=gap)
+    voltages = voltages + 1e-3 * generator.standard_normal(voltages.shape)
+    # Part of every curve is on the rails
+    assert np.any(voltages >= 3.3) and np.any(voltages < 3.3)
+
+    reference = calibration.fit(distances, voltages)
+    precision("float32")
+    result = calibration.fit(distances, voltages)
+    assert np.all(result[5])
+    for expected, actual in zip(reference, result):
+        assert np.array_equal(expected, actual)
+
+
+def test_noiseAnalysisFloat32(precision):
+    # Clipped outputs have an infinite resolution in either precision
+    magnet, sensor, amplifier = makeChain()
+    analysis = NoiseAnalysis(100)
+    reference = analysis.analyze(magnet, [6, 9, 20], [sensor], [amplifier])["resolution"]
+    precision("float32")
+    resolution = analysis.analyze(magnet, [6, 9, 20], [sensor], [amplifier])["resolution"]
+    assert np.array_equal(reference, resolution)
+    assert np.isinf(resolution[0, 0]) and np.isinf(resolution[0, 1]) and np.isfinite(resolution[0, 2])
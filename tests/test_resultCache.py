@@ -0,0 +1,142 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of the on disk result store: hits return the stored sweep, keys cover every setting, and the store is
+# bounded with least recently used eviction.
+import os
+import time
+
+from Core import Backends
+from Core import ResultCache as ResultCacheModule
+from Core.ResultCache import ResultCache
+from Core.FieldCalculations import sweepSensors, sweepAmplifiedSensors
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def resultPath(cache, key):
+    # Results are spread over subdirectories by the first two characters of the key
+    return os.path.join(cache.getDirectory(), key[:2], key + ".npy")
+
+
+def makeMagnet(diameter=6):
+    magnet = Magnet()
+    magnet.setCylinderSize(diameter, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def test_missThenHit(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    magnet, sensors = makeMagnet(), [HallSensor(preset="DRV5055-A1"), HallSensor(preset="DRV5055-A3")]
+    distance, strength, voltages = cache.sweepSensors(magnet, 1, 40, sensors)
+    assert cache.getStatistics()["misses"] == 1 and cache.getStatistics()["stores"] == 1
+
+    hit = cache.sweepSensors(makeMagnet(), 1, 40, [HallSensor(preset="DRV5055-A1"), HallSensor(preset="DRV5055-A3")])
+    assert cache.getStatistics()["hits"] == 1
+    expected = sweepSensors(magnet, 1, 40, sensors)
+    for stored, reference in zip(hit, expected):
+        assert np.array_equal(stored, np.asarray(reference))
+    assert np.array_equal(voltages, hit[2])
+
+
+def test_amplifiedSweep(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    magnet, sensors = makeMagnet(), [HallSensor(preset="DRV5055-A3")]
+    amplifiers = [Amplifier(preset="Diff-3.3-1.65-10")]
+    cache.sweepAmplifiedSensors(magnet, 1, 40, sensors, amplifiers)
+    distance, strength, voltages = cache.sweepAmplifiedSensors(magnet, 1, 40, sensors, amplifiers)
+    assert cache.getStatistics()["hits"] == 1
+    assert np.array_equal(voltages, np.asarray(sweepAmplifiedSensors(magnet, 1, 40, sensors, amplifiers)[2]))
+
+
+def test_keysCoverSettings(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    sensor = HallSensor(preset="DRV5055-A3")
+    cache.sweepSensors(makeMagnet(), 1, 20, [sensor])
+    cache.sweepSensors(makeMagnet(8), 1, 20, [sensor])
+    cache.sweepSensors(makeMagnet(), 1, 21, [sensor])
+    cache.sweepSensors(makeMagnet(), 1, 20, [HallSensor(preset="DRV5055-A1")])
+    assert cache.getStatistics()["misses"] == 4 and cache.getStatistics()["hits"] == 0
+
+
+def test_wholeNumberDistancesShareKey(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    sensors = [HallSensor(preset="DRV5055-A3")]
+    cache.sweepSensors(makeMagnet(), 1, 50, sensors)
+    cache.sweepSensors(makeMagnet(), 1.0, 50.0, sensors)
+    assert cache.getStatistics()["hits"] == 1
+    with pytest.raises(ValueError):
+        cache.sweepSensors(makeMagnet(), 1.5, 50, sensors)
+
+
+def test_precisionIsPartOfKey(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    sensors = [HallSensor(preset="DRV5055-A3")]
+    cache.sweepSensors(makeMagnet(), 1, 20, sensors)
+    monkeypatch.setattr(Backends, "_precision", "float32")
+    distance, strength, voltages = cache.sweepSensors(makeMagnet(), 1, 20, sensors)
+    assert cache.getStatistics()["misses"] == 2
+    assert voltages.dtype == np.float32
+
+
+def test_evictsLeastRecentlyUsed(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    keys = [cache.key({"result": index}) for index in range(4)]
+    for index, key in enumerate(keys):
+        cache.store(key, np.zeros(1000))
+        # Distinct modification times, oldest first
+        past = time.time() - 100 + index
+        os.utime(resultPath(cache, key), (past, past))
+    size = os.stat(resultPath(cache, keys[0])).st_size
+    # Reading the oldest result makes it the most recently used
+    assert cache.load(keys[0]) is not None
+
+    cache.setMaxBytes(2 * size)
+    assert cache.evict() == 2 * size
+    assert cache.load(keys[1]) is None and cache.load(keys[2]) is None
+    assert cache.load(keys[0]) is not None and cache.load(keys[3]) is not None
+    assert cache.getStatistics()["evictions"] == 2
+
+
+def test_storeOnlyWalksWhenOverBudget(tmp_path, monkeypatch):
+    # The running size spares store() a walk of the store while it fits
+    cache = ResultCache(str(tmp_path))
+    cache.store(cache.key({"result": -1}), np.zeros(10))
+    walks = []
+    walk = os.walk
+
+    def countedWalk(*args, **kwargs):
+        walks.append(args)
+        return walk(*args, **kwargs)
+
+    monkeypatch.setattr(ResultCacheModule.os, "walk", countedWalk)
+    for index in range(20):
+        cache.store(cache.key({"result": index}), np.zeros(10))
+    assert walks == []
+
+    size = os.stat(resultPath(cache, cache.key({"result": 0}))).st_size
+    cache.setMaxBytes(5 * size)
+    cache.store(cache.key({"result": 20}), np.zeros(10))
+    assert len(walks) == 1
+    stored = [name for root, directories, files in walk(str(tmp_path)) for name in files if name.endswith(".npy")]
+    assert len(stored) == 5
+
+
+def test_clear(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key({"result": 0})
+    cache.store(key, np.zeros(10))
+    cache.clear()
+    assert cache.load(key) is None
+    # The running size starts again from zero
+    cache.store(key, np.zeros(10))
+    assert cache.load(key) is not None
@@ -0,0 +1,94 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of sensor arrays and the position estimator: array voltages match the scalar model, and the estimator
+# recovers position, strength and gap from noiseless readings, including at zero gap over a sensor.
+from Core import Backends
+from Core.SensorArray import SensorArray, ArrayPositionEstimator
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+import pytest
+
+np = pytest.importorskip("numpy")
+
+POSITIONS = [0, 10, 20, 30, 40]
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def makeArray():
+    array = SensorArray()
+    for position in POSITIONS:
+        array.addSensor(HallSensor(preset="DRV5055-A4"), position)
+    return array
+
+
+def test_voltagesArrayMatchesVoltages():
+    array, magnet = makeArray(), makeMagnet()
+    positions = [-5.0, 3.0, 17.5, 40.0]
+    expected = [array.voltages(magnet, position, 4.0) for position in positions]
+    assert np.allclose(array.voltagesArray(magnet, positions, 4.0), expected, rtol=1e-12, atol=0)
+
+
+def test_recoversPosition():
+    array, magnet = makeArray(), makeMagnet()
+    truth = np.linspace(0, 40, 401)
+    estimator = ArrayPositionEstimator(array, magnet, 4.0)
+    estimator.setInitialPosition(0.0)
+    position, strength, gap, residual, converged = estimator.estimate(array.voltagesArray(magnet, truth, 4.0))
+    assert np.all(converged)
+    assert np.max(np.abs(position - truth)) < 1e-4
+
+
+def test_streamMatchesOneShot():
+    array, magnet = makeArray(), makeMagnet()
+    readings = array.voltagesArray(magnet, np.linspace(0, 40, 200), 4.0)
+    oneShot = ArrayPositionEstimator(array, magnet, 4.0)
+    oneShot.setInitialPosition(0.0)
+    expected = oneShot.estimate(readings)
+    streamed = ArrayPositionEstimator(array, magnet, 4.0)
+    streamed.setInitialPosition(0.0)
+    blocks = list(streamed.estimateStream(readings[start:start + 50] for start in range(0, 200, 50)))
+    assert np.allclose(np.concatenate([block[0] for block in blocks]), expected[0], rtol=0, atol=1e-6)
+
+
+def test_fitsStrengthAndGap():
+    array, magnet = makeArray(), makeMagnet()
+    # The magnet is 5 percent weaker than nominal, and runs at a gap of 5 instead of 4
+    weak = makeMagnet()
+    weak.setRemanence(magnet.getStrengthGauss() * 0.95)
+    truth = np.linspace(5, 35, 31)
+    estimator = ArrayPositionEstimator(array, magnet, 4.0, fitStrength=True, fitGap=True)
+    estimator.setInitialPosition(5.0)
+    position, strength, gap, residual, converged = estimator.estimate(array.voltagesArray(weak, truth, 5.0))
+    assert np.all(converged)
+    assert np.max(np.abs(position - truth)) < 1e-3
+    assert np.allclose(strength, weak.getStrengthGauss(), rtol=1e-4)
+    assert np.allclose(gap, 5.0, atol=1e-3)
+
+
+@pytest.mark.parametrize("fitGap", [False, True])
+def test_zeroGapOverSensor(fitGap):
+    # The distance to the sensor under the magnet is 0, the jacobian must stay finite
+    array, magnet = makeArray(), makeMagnet()
+    truth = np.array([10.0, 10.5, 20.0])
+    estimator = ArrayPositionEstimator(array, magnet, 0.0, fitGap=fitGap)
+    estimator.setInitialPosition(10.0)
+    position, strength, gap, residual, converged = estimator.estimate(array.voltagesArray(magnet, truth, 0.0))
+    assert np.all(np.isfinite(position)) and np.all(np.isfinite(gap)) and np.all(np.isfinite(residual))
+    assert np.max(np.abs(position - truth)) < 1e-3
+
+
+def test_readingsShape():
+    estimator = ArrayPositionEstimator(makeArray(), makeMagnet(), 4.0)
+    with pytest.raises(ValueError):
+        estimator.estimate(np.zeros((3, len(POSITIONS) + 1)))
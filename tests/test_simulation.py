@@ -0,0 +1,122 @@
+# Author: Colin Pollard
+# Date: 10/19/2026
+# Behavior of the cached sweep simulation: results match the sweep functions, and a setter change only reruns the
+# stages that depend on the changed component.
+from Core import Backends
+from Core.Simulation import Simulation
+from Core.FieldCalculations import sweepSensors, sweepAmplifiedSensors
+from Core.Magnet import Magnet
+from Core.HallSensor import HallSensor
+from Core.Amplifier import Amplifier
+from Core.Cascade import Cascade, LowPassFilter
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(autouse=True)
+def float64(monkeypatch):
+    monkeypatch.setattr(Backends, "_precision", "float64")
+
+
+def makeMagnet():
+    magnet = Magnet()
+    magnet.setCylinderSize(6, 3)
+    magnet.setGrade("N52")
+    return magnet
+
+
+def makeSimulation(amplified=True, magnet=None):
+    sensors = [HallSensor(preset="DRV5055-A1"), HallSensor(preset="DRV5055-A3"), HallSensor(preset="DRV5055-A4")]
+    amplifiers = [Amplifier(preset="Diff-3.3-1.65-10") for sensor in sensors] if amplified else None
+    return Simulation(magnet or makeMagnet(), 1, 40, sensors, amplifiers)
+
+
+def counts(simulation):
+    evaluations = simulation.getEvaluations()
+    return evaluations["field"], evaluations["sensor"], evaluations["amplifier"]
+
+
+def test_matchesSweeps():
+    simulation = makeSimulation()
+    distance, strength, voltages = simulation.run()
+    expected = sweepAmplifiedSensors(makeMagnet(), 1, 40, simulation.getSensors(), simulation.getAmplifiers())
+    assert distance == expected[0]
+    assert np.allclose(strength, expected[1], rtol=1e-12, atol=0)
+    assert np.allclose(voltages, expected[2], rtol=1e-12, atol=0)
+
+    sensorsOnly = makeSimulation(amplified=False)
+    distance, strength, voltages = sensorsOnly.run()
+    assert np.allclose(voltages, sweepSensors(makeMagnet(), 1, 40, sensorsOnly.getSensors())[2], rtol=1e-12, atol=0)
+
+
+def test_unchangedRunIsCached():
+    simulation = makeSimulation()
+    first = simulation.run()
+    assert counts(simulation) == (1, 3, 3)
+    assert simulation.run() == first
+    assert counts(simulation) == (1, 3, 3)
+
+
+def test_amplifierChangeRerunsAmplifierOnly():
+    simulation = makeSimulation()
+    simulation.run()
+    simulation.getAmplifiers()[1].setGain(20)
+    distance, strength, voltages = simulation.run()
+    assert counts(simulation) == (1, 3, 4)
+    expected = sweepAmplifiedSensors(makeMagnet(), 1, 40, simulation.getSensors(), simulation.getAmplifiers())[2]
+    assert np.allclose(voltages, expected, rtol=1e-12, atol=0)
+
+
+def test_sensorChangeRerunsSensorAndAmplifier():
+    simulation = makeSimulation()
+    simulation.run()
+    simulation.getSensors()[2].setSensitivity(50)
+    simulation.run()
+    assert counts(simulation) == (1, 4, 4)
+
+
+def test_magnetChangeRerunsEverything():
+    magnet = makeMagnet()
+    simulation = makeSimulation(magnet=magnet)
+    simulation.run()
+    magnet.setRemanence(10000)
+    simulation.run()
+    assert counts(simulation) == (2, 6, 6)
+
+
+def test_setRangeRerunsEverything():
+    simulation = makeSimulation()
+    simulation.run()
+    simulation.setRange(1, 20)
+    distance, strength, voltages = simulation.run()
+    assert counts(simulation) == (2, 6, 6)
+    assert len(distance) == 190 and len(voltages[0]) == 190
+
+
+def test_invalidate():
+    simulation = makeSimulation()
+    simulation.run()
+    simulation.invalidate()
+    simulation.run()
+    assert counts(simulation) == (2, 6, 6)
+
+
+def test_cascadeStageChange():
+    # A filter reconfigured inside a cascade reruns that cascade
+    sensors = [HallSensor(preset="DRV5055-A3"), HallSensor(preset="DRV5055-A3")]
+    lowPass = LowPassFilter(10000.0)
+    lowPass.setCutoff(300.0)
+    cascades = [Cascade([Amplifier(preset="Diff-3.3-1.65-10"), lowPass]), Cascade([Amplifier(preset="Diff-3.3-1.65-10")])]
+    simulation = Simulation(makeMagnet(), 1, 40, sensors, cascades)
+    simulation.run()
+    lowPass.setCutoff(500.0)
+    simulation.run()
+    assert counts(simulation) == (1, 2, 3)
+
+
+def test_oneAmplifierPerSensor():
+    with pytest.raises(ValueError):
+        Simulation(makeMagnet(), 1, 40, [HallSensor(preset="DRV5055-A3")], [])
+    with pytest.raises(ValueError):
+        Simulation(None, 1, 40, [HallSensor(preset="DRV5055-A3")])